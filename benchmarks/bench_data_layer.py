@@ -0,0 +1,305 @@
+# benchmarks/bench_data_layer.py
+"""
+数据层基准测试（无需显示器和 PyQt）。
+
+生成不同规模的合成题库和游戏记录，在临时目录中测量 logic/data_manager.py 各个操作的
+吞吐量、延迟分位数和峰值内存，结果以 JSON 输出，方便比较存储层改动前后的性能。
+
+用法:
+    python benchmarks/bench_data_layer.py                    # 完整规模（1k/10k/100k 题，10k~1M 条记录）
+    python benchmarks/bench_data_layer.py --quick            # 小规模快速检查
+    python benchmarks/bench_data_layer.py --backend sqlite --output bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logic.data_manager as dm
+from logic.quiz_session import QUIZ_LENGTH
+
+PROBLEM_SIZES = [1_000, 10_000, 100_000]
+RECORD_SIZES = [10_000, 100_000, 1_000_000]
+QUICK_PROBLEM_SIZES = [1_000]
+QUICK_RECORD_SIZES = [10_000]
+OPS_PER_MUTATION = 1_000 # 单题修改、追加记录这类操作每轮执行的次数
+LOAD_REPEATS = 5
+
+TAGS = ["Probability", "Brain Teaser", "Math", "Coding", "Finance", "Statistics", "Game Theory"]
+SOURCES = ["Optiver", "SIG", "Citadel", "Jane Street", "IMC", ""]
+WORDS = ("dice coin card expected value probability random walk martingale bet game player win lose "
+         "draw ball urn option price stock variance mean distribution sample").split()
+CHINESE = "概率期望随机游走硬币骰子赌局玩家方差均值分布抽样"
+
+
+# --- 合成数据 ---
+def _sentence(rng, n_words):
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    if rng.random() < 0.3:
+        words.append(''.join(rng.choice(CHINESE) for _ in range(rng.randint(4, 12))))
+    return ' '.join(words)
+
+def generate_problems(count, rng):
+    problems = []
+    for problem_id in range(1, count + 1):
+        is_programming = rng.random() < 0.15
+        attempts = rng.randint(0, 12)
+        problems.append({
+            "id": problem_id,
+            "title": f"{_sentence(rng, 3).title()} {problem_id}",
+            "source": rng.choice(SOURCES),
+            "tags": rng.sample(TAGS, rng.randint(1, 2)),
+            "description": _sentence(rng, rng.randint(30, 90)),
+            "is_programming": is_programming,
+            "python_solution": _sentence(rng, 40) if is_programming else "",
+            "cpp_solution": _sentence(rng, 40) if is_programming else "",
+            "answer": "" if is_programming else f"{rng.randint(1, 99)}/{rng.randint(1, 99)}",
+            "notes": _sentence(rng, rng.randint(0, 40)),
+            "attempts": attempts,
+            "correct": rng.randint(0, attempts),
+            "is_saved": rng.random() < 0.1,
+        })
+    return problems
+
+def generate_game_records(count, rng):
+    start = datetime.datetime(2025, 1, 1)
+    records = []
+    for i in range(count):
+        difficulty = rng.choice(["easy", "medium", "hard"])
+        records.append({
+            "timestamp": (start + datetime.timedelta(seconds=37 * i)).isoformat(),
+            "level_id": f"{difficulty[0].upper()}{rng.randint(1, 20):02d}",
+            "difficulty": difficulty,
+            "time_taken": round(rng.uniform(3, 90), 2),
+            "moves_taken": rng.randint(3, 40),
+            "optimal_moves": rng.randint(3, 30),
+            "score": rng.choice([0, 100, 200, 300]),
+        })
+    return records
+
+
+# --- 运行环境 ---
+def use_data_dir(directory, backend):
+    """把 data_manager 的所有数据文件指向临时目录，并清空进程内的缓存"""
+    dm.flush_pending_writes()
+    for name in ("PROBLEMS_FILE", "GAME_STATS_FILE", "LEGACY_GAME_STATS_FILE", "GAME_SESSIONS_FILE",
+                 "ATTEMPT_JOURNAL_FILE", "DATABASE_FILE", "PROBLEMS_SNAPSHOT_FILE", "REVIEW_SCHEDULE_FILE",
+                 "DUPLICATE_SIGNATURES_FILE", "RELATED_PROBLEMS_FILE"):
+        setattr(dm, name, os.path.join(directory, os.path.basename(getattr(dm, name))))
+    if dm._sqlite_store is not None:
+        dm._sqlite_store.close()
+    dm.STORAGE_BACKEND = backend
+    dm._sqlite_store = None
+    dm._repository = None
+    dm._review_scheduler = None
+    dm._duplicate_detector = None
+    dm._related_problems = None
+    dm._session_summary = None
+    drop_caches()
+
+def drop_caches():
+    """模拟程序重新启动：丢弃进程内的加载缓存，下次读取必须访问磁盘"""
+    dm.flush_pending_writes()
+    dm._load_cache.clear()
+
+
+# --- 测量 ---
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, flush_seconds=None, peak_bytes=None):
+    """把每次调用的耗时（秒）汇总为吞吐量和延迟分位数（毫秒）"""
+    values = sorted(latencies)
+    total = sum(values)
+    result = {
+        "ops": len(values),
+        "total_s": round(total, 6),
+        "ops_per_s": round(len(values) / total, 2) if total > 0 else None,
+        "latency_ms": {
+            "mean": round(total / len(values) * 1000, 4) if values else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 4),
+            "p90": round(percentile(values, 90) * 1000, 4),
+            "p99": round(percentile(values, 99) * 1000, 4),
+            "max": round(values[-1] * 1000, 4) if values else 0.0,
+        },
+    }
+    if flush_seconds is not None:
+        # 写操作由后台线程落盘，界面线程看到的是调用耗时，完整代价还要加上等待落盘的时间
+        result["flush_s"] = round(flush_seconds, 6)
+    if peak_bytes is not None:
+        result["peak_memory_bytes"] = peak_bytes
+    return result
+
+def time_calls(fn, count, setup=None):
+    latencies = []
+    for i in range(count):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def time_flush():
+    start = time.perf_counter()
+    dm.flush_pending_writes()
+    return time.perf_counter() - start
+
+def peak_memory(fn, setup=None):
+    """单次调用期间 Python 分配的峰值内存（字节），单独测量以免 tracemalloc 的开销影响计时"""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        fn(0)
+        dm.flush_pending_writes()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# --- 题库操作 ---
+def bench_problem_bank(size, backend, rng):
+    directory = tempfile.mkdtemp(prefix="quantbank_bench_")
+    try:
+        use_data_dir(directory, backend)
+        problems = generate_problems(size, rng)
+        with open(dm.PROBLEMS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(problems, f, ensure_ascii=False, indent=4)
+        del problems
+        results = {}
+        load = lambda i: dm.load_problems()
+
+        if backend == 'json':
+            def no_snapshot():
+                drop_caches()
+                if os.path.exists(dm.PROBLEMS_SNAPSHOT_FILE):
+                    os.remove(dm.PROBLEMS_SNAPSHOT_FILE)
+            results["load_problems_cold_json"] = summarize(
+                time_calls(load, LOAD_REPEATS, setup=no_snapshot), peak_bytes=peak_memory(load, setup=no_snapshot))
+            dm.load_problems(); dm.flush_pending_writes() # 生成快照
+        results["load_problems_cold"] = summarize(
+            time_calls(load, LOAD_REPEATS, setup=drop_caches), peak_bytes=peak_memory(load, setup=drop_caches))
+        dm.load_problems()
+        results["load_problems_warm"] = summarize(time_calls(load, LOAD_REPEATS * 20), peak_bytes=peak_memory(load))
+
+        bank = dm.load_problems()
+        save = lambda i: dm.save_problems(bank)
+        latencies = time_calls(save, LOAD_REPEATS)
+        results["save_problems"] = summarize(latencies, flush_seconds=time_flush(), peak_bytes=peak_memory(save))
+
+        ids = [p['id'] for p in dm.get_problem_repository()]
+        update = lambda i: dm.update_problem_stats(rng.choice(ids), rng.random() < 0.6)
+        latencies = time_calls(update, OPS_PER_MUTATION)
+        results["update_problem_stats"] = summarize(latencies, flush_seconds=time_flush(), peak_bytes=peak_memory(update))
+
+        # 限时测验结束时一次提交整轮结果
+        batch = lambda i: dm.record_attempts([(rng.choice(ids), rng.random() < 0.6) for _ in range(QUIZ_LENGTH)])
+        latencies = time_calls(batch, OPS_PER_MUTATION // QUIZ_LENGTH)
+        results["record_attempts_quiz"] = summarize(latencies, flush_seconds=time_flush(), peak_bytes=peak_memory(batch))
+
+        toggle = lambda i: dm.toggle_problem_saved_status(rng.choice(ids))
+        latencies = time_calls(toggle, OPS_PER_MUTATION)
+        results["toggle_problem_saved_status"] = summarize(latencies, flush_seconds=time_flush(), peak_bytes=peak_memory(toggle))
+        dm.flush_pending_writes()
+        return results
+    finally:
+        dm.flush_pending_writes()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# --- 游戏记录操作 ---
+def bench_game_history(size, backend, rng):
+    directory = tempfile.mkdtemp(prefix="quantbank_bench_")
+    try:
+        use_data_dir(directory, backend)
+        with open(dm.PROBLEMS_FILE, 'w', encoding='utf-8') as f:
+            json.dump([], f)
+        dm.save_game_stats(generate_game_records(size, rng))
+        drop_caches()
+        results = {}
+
+        def no_summary():
+            # 删除已保存的每局汇总，强制从头聚合全部记录
+            drop_caches()
+            dm._session_summary = None
+            if os.path.exists(dm.GAME_SESSIONS_FILE):
+                os.remove(dm.GAME_SESSIONS_FILE)
+            if dm._sqlite_store is not None:
+                with dm._sqlite_store.conn:
+                    dm._sqlite_store._reset_game_sessions()
+        sessions = lambda i: dm.get_game_sessions()
+        results["get_game_sessions_full"] = summarize(
+            time_calls(sessions, 3, setup=no_summary), peak_bytes=peak_memory(sessions, setup=no_summary))
+
+        extra = generate_game_records(OPS_PER_MUTATION, rng)
+        add = lambda i: dm.add_game_record(extra[i % len(extra)])
+        latencies = time_calls(add, OPS_PER_MUTATION)
+        results["add_game_record"] = summarize(latencies, flush_seconds=time_flush(), peak_bytes=peak_memory(add))
+
+        def one_more():
+            dm.add_game_record(extra[0])
+        results["get_game_sessions_incremental"] = summarize(
+            time_calls(sessions, 100, setup=one_more), peak_bytes=peak_memory(sessions, setup=one_more))
+        return results
+    finally:
+        dm.flush_pending_writes()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(problem_sizes, record_sizes, backend, seed):
+    rng = random.Random(seed)
+    report = {
+        "benchmark": "data_layer",
+        "backend": backend,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "ops_per_mutation": OPS_PER_MUTATION,
+        "problem_bank": {},
+        "game_history": {},
+    }
+    for size in problem_sizes:
+        print(f"题库 {size} 题 ...", file=sys.stderr)
+        report["problem_bank"][str(size)] = bench_problem_bank(size, backend, rng)
+    for size in record_sizes:
+        print(f"游戏记录 {size} 条 ...", file=sys.stderr)
+        report["game_history"][str(size)] = bench_game_history(size, backend, rng)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QuantBank 数据层基准测试")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--problems", type=int, nargs="*", help="题库规模，默认 1000 10000 100000")
+    parser.add_argument("--records", type=int, nargs="*", help="游戏记录规模，默认 10000 100000 1000000")
+    parser.add_argument("--quick", action="store_true", help="只跑最小规模")
+    parser.add_argument("--seed", type=int, default=20250720)
+    parser.add_argument("--output", help="把 JSON 结果写入文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    problem_sizes = args.problems if args.problems is not None else (QUICK_PROBLEM_SIZES if args.quick else PROBLEM_SIZES)
+    record_sizes = args.records if args.records is not None else (QUICK_RECORD_SIZES if args.quick else RECORD_SIZES)
+    report = run(problem_sizes, record_sizes, args.backend, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
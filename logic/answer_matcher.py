@@ -0,0 +1,171 @@
+# logic/answer_matcher.py
+
+import ast
+import operator
+import re
+from fractions import Fraction
+
+# 一个答案里的多个可接受写法，如 "1/2 or 0.5"、"A | B"、"甲；乙"
+ALTERNATIVE_SEPARATOR = re.compile(r"\s+or\s+|\s*(?:\||;|；|或)\s*", re.IGNORECASE)
+MIXED_NUMBER = re.compile(r"^([+-]?\d+)\s+(\d+)\s*/\s*(\d+)$")
+DECIMAL = re.compile(r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:e([+-]?\d+))?$", re.IGNORECASE)
+INFINITY_WORDS = {"infinite", "infinity", "inf", "∞", "无穷", "无穷大", "无限"}
+MAX_RELATIVE_ERROR = Fraction(1, 100) # 按小数精度放宽时，相对误差最多 1%
+MAX_EXPONENT = 64          # 算式中乘方的指数上限
+MAX_DECIMAL_EXPONENT = 100 # 科学计数法的指数上限，1e9999999 这样的输入直接视为不匹配，不去构造巨大的分数
+MAX_BITS = 4096            # 算式的底数和中间结果的分子、分母最多这么多位，超过时视为不匹配，避免判分卡住界面
+
+_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Pow: operator.pow,
+}
+
+
+def _decimal_tolerance(text):
+    """小数写法隐含的精度：最后一位的一半，如 0.105 -> 0.0005；整数和分数视为精确值"""
+    mantissa = text.lower().split('e')[0]
+    if '.' not in mantissa:
+        return Fraction(0)
+    places = len(mantissa.split('.')[1])
+    exponent = int(text.lower().split('e')[1]) if 'e' in text.lower() else 0
+    return Fraction(1, 2) * Fraction(10) ** (exponent - places)
+
+def _bits(value):
+    return max(value.numerator.bit_length(), value.denominator.bit_length())
+
+def _evaluate(node):
+    """只允许数字和四则运算/乘方的表达式求值（精确有理数运算），数值过大时抛出 ValueError"""
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return Fraction(str(node.value))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        value = _evaluate(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow):
+            if right.denominator != 1 or abs(right) > MAX_EXPONENT:
+                raise ValueError("不支持的乘方")
+            right = int(right)
+            if _bits(left) * abs(right) > MAX_BITS: # 先估计结果的位数，不去真正计算巨大的乘方
+                raise ValueError("数值过大")
+        result = _OPERATORS[type(node.op)](left, right)
+        if _bits(result) > MAX_BITS:
+            raise ValueError("数值过大")
+        return result
+    raise ValueError("不支持的表达式")
+
+def parse_number(text):
+    """
+    把一个答案写法解析成 (精确值, 允许误差, 是否百分数)，不是数值时返回None。
+    支持整数、小数、分数、带分数（1 7/8）、百分数（84%）和简单的算式（(1/2)^3、3*7/36）。
+    """
+    text = text.strip().replace('\u00a0', ' ')
+    if not text:
+        return None
+    is_percent = text.endswith('%')
+    if is_percent:
+        text = text[:-1].strip()
+    try:
+        match = MIXED_NUMBER.match(text)
+        decimal = None if match else DECIMAL.match(text)
+        if match:
+            whole, numerator, denominator = match.groups()
+            sign = -1 if whole.startswith('-') else 1
+            value = sign * (abs(int(whole)) + Fraction(int(numerator), int(denominator)))
+            tolerance = Fraction(0)
+        elif decimal:
+            if decimal.group(1) is not None and abs(int(decimal.group(1))) > MAX_DECIMAL_EXPONENT:
+                return None
+            value, tolerance = Fraction(text), _decimal_tolerance(text)
+        else:
+            expression = text.replace('^', '**').replace('×', '*').replace('÷', '/')
+            value, tolerance = _evaluate(ast.parse(expression, mode='eval')), Fraction(0)
+    except (ValueError, ZeroDivisionError, SyntaxError, OverflowError, RecursionError):
+        return None
+    if is_percent:
+        value, tolerance = value / 100, tolerance / 100
+    return value, tolerance, is_percent
+
+def normalize_text(text):
+    """文字答案的比较形式：忽略大小写、多余空白和结尾的句号"""
+    text = ' '.join(text.casefold().split()).strip(' .。')
+    return "∞" if text in INFINITY_WORDS else text
+
+
+class AnswerMatcher:
+    """
+    由一道题的标准答案预先编译出的判分器。
+    数值答案按有理数精确比较；用户或标准答案写成小数时，允许该小数精度范围内（且相对误差不超过 1%）的误差。
+    """
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.numbers = [] # [(精确值, 允许误差, 是否百分数)]
+        self.texts = {normalize_text(answer)}
+        for alternative in ALTERNATIVE_SEPARATOR.split(answer):
+            if not alternative.strip():
+                continue
+            number = parse_number(alternative)
+            if number is not None:
+                self.numbers.append(number)
+            else:
+                self.texts.add(normalize_text(alternative))
+
+    @staticmethod
+    def _close(expected, actual):
+        value, tolerance, _ = expected
+        user_value, user_tolerance, _ = actual
+        difference = abs(user_value - value)
+        if difference == 0:
+            return True
+        allowed = max(tolerance, user_tolerance)
+        return difference <= allowed and difference <= MAX_RELATIVE_ERROR * abs(value)
+
+    def matches(self, user_answer):
+        if normalize_text(user_answer) in self.texts:
+            return True
+        if not self.numbers:
+            return False
+        actual = parse_number(user_answer)
+        if actual is None:
+            return False
+        for expected in self.numbers:
+            if self._close(expected, actual):
+                return True
+            # 标准答案是百分数时，也接受不带 % 的百分数值（答案 84%，输入 84）
+            if expected[2] and not actual[2] and self._close(expected, (actual[0] / 100, actual[1] / 100, True)):
+                return True
+        return False
+
+
+class MatcherCache:
+    """
+    按题目id缓存编译好的判分器，注册为 ProblemRepository 的监听器，题目被修改或删除时作废对应的条目。
+    取用时也会核对答案文本，答案被原地修改过就重新编译。
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._matchers = {}
+        repository.add_listener(self._on_repository_changed)
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._matchers.clear()
+        elif event in ('updated', 'removed'):
+            self._matchers.pop(problem['id'], None)
+
+    def get(self, problem):
+        answer = problem.get('answer', '') or ''
+        matcher = self._matchers.get(problem['id'])
+        if matcher is None or matcher.answer != answer:
+            matcher = self._matchers[problem['id']] = AnswerMatcher(answer)
+        return matcher
+
+    def precompile(self):
+        """为所有非编程题预先编译判分器"""
+        for problem in self.repository:
+            if not problem.get('is_programming', False):
+                self.get(problem)
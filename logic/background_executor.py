@@ -0,0 +1,27 @@
+# logic/background_executor.py
+
+import threading
+from concurrent.futures import Future
+
+
+class BackgroundExecutor:
+    """
+    在后台整体建立派生索引（相关题目模型、查重签名等）用的执行器，用法和 concurrent.futures 的 executor 一样：
+    submit 返回 Future，界面线程用 done() 判断是否建好，没建好时继续使用旧的结果。
+    每个任务在一个守护线程里执行，程序退出时不等待还没建完的索引（下次启动会重新建立）。
+    """
+
+    def __init__(self, name="BackgroundBuild"):
+        self.name = name
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+        threading.Thread(target=run, name=self.name, daemon=True).start()
+        return future
@@ -0,0 +1,151 @@
+# logic/bank_validator.py
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from logic.problem_repository import CONTENT_FIELDS, content_hash
+
+KNOWN_TAGS = ("Math", "Probability", "Coding", "Finance", "Brain Teaser") # 编辑器中可以选择的标签
+TEXT_FIELDS = ("title", "source", "description", "python_solution", "cpp_solution", "answer", "notes")
+COUNT_FIELDS = ("attempts", "correct")
+PARALLEL_THRESHOLD = 20000 # 需要检查的题目达到这个数量时才分给进程池（进程启动和传输数据本身也有开销）
+CHUNK_SIZE = 1000 # 每个子任务检查的题目数
+MAX_WORKERS = 4
+
+ERROR = "error"     # 会影响练习或保存的问题
+WARNING = "warning" # 可以保留，但可能是录入错误
+
+
+def _blank(value):
+    return not value or (isinstance(value, str) and not value.strip())
+
+def problem_rule_error(data):
+    """编辑器保存时的规则：合法时返回None，否则返回错误提示"""
+    if _blank(data.get('title')):
+        return "标题不能为空！"
+    is_coding = data.get('is_programming', False)
+    if is_coding and _blank(data.get('python_solution')) and _blank(data.get('cpp_solution')):
+        return "编程题至少需要提供一种代码解法！"
+    if not is_coding and _blank(data.get('answer')):
+        return "非编程题必须提供答案与解析！"
+    return None
+
+def content_key(problem):
+    """
+    检查结果的缓存键。内容哈希把缺少的字段和值为 null 的字段视为相同，
+    check_content 却区分二者（缺少文本字段是允许的，null 是错误），所以再带上每个内容字段是否存在。
+    """
+    return (content_hash(problem), tuple(field in problem for field in CONTENT_FIELDS))
+
+def check_content(problem):
+    """
+    只依赖题目内容字段的检查，返回 ((级别, 说明), ...)。
+    结果只由内容字段的值和是否存在决定，可以按 content_key 缓存。
+    """
+    issues = []
+    for field in TEXT_FIELDS:
+        if field in problem and not isinstance(problem[field], str):
+            issues.append((ERROR, f"字段 {field} 应为文本"))
+    if not isinstance(problem.get('is_programming', False), bool):
+        issues.append((ERROR, "字段 is_programming 应为 true 或 false"))
+    tags = problem.get('tags', [])
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        issues.append((ERROR, "字段 tags 应为文本列表"))
+    else:
+        issues.extend((WARNING, f"未知标签: {tag}") for tag in tags if tag not in KNOWN_TAGS)
+    error = problem_rule_error(problem)
+    if error:
+        issues.append((ERROR, error))
+    return tuple(issues)
+
+def check_contents(problems):
+    """批量执行 check_content（进程池的子任务，必须是模块级函数）"""
+    return [check_content(problem) for problem in problems]
+
+def check_record(problem):
+    """id、练习统计和收藏状态的检查；这些字段每次答题都会变，检查也很便宜，不缓存"""
+    issues = []
+    problem_id = problem.get('id')
+    if not isinstance(problem_id, int) or isinstance(problem_id, bool):
+        issues.append((ERROR, "缺少 id 或 id 不是整数"))
+    counts = [problem.get(field, 0) for field in COUNT_FIELDS]
+    valid = [isinstance(value, int) and not isinstance(value, bool) and value >= 0 for value in counts]
+    issues.extend((ERROR, f"字段 {field} 应为非负整数") for field, ok in zip(COUNT_FIELDS, valid) if not ok)
+    if all(valid) and counts[1] > counts[0]:
+        issues.append((ERROR, "答对次数大于总次数"))
+    if not isinstance(problem.get('is_saved', False), bool):
+        issues.append((ERROR, "字段 is_saved 应为 true 或 false"))
+    return issues
+
+def check_cross_record(problems):
+    """跨记录的检查：重复的 id（错误）和完全相同的标题（警告），返回 [(位置, 题目id, 级别, 说明)]"""
+    issues, first_by_id, first_by_title = [], {}, {}
+    for position, problem in enumerate(problems):
+        if not isinstance(problem, dict):
+            continue
+        problem_id = problem.get('id')
+        if isinstance(problem_id, int):
+            if problem_id in first_by_id:
+                issues.append((position, problem_id, ERROR, f"id {problem_id} 与第 {first_by_id[problem_id] + 1} 条记录重复"))
+            else:
+                first_by_id[problem_id] = position
+        title = problem.get('title')
+        if isinstance(title, str) and title.strip():
+            key = " ".join(title.casefold().split())
+            if key in first_by_title:
+                issues.append((position, problem_id, WARNING, f"标题与第 {first_by_title[key] + 1} 条记录相同"))
+            else:
+                first_by_title[key] = position
+    return issues
+
+
+class BankValidator:
+    """
+    整个题库的完整性检查：编辑器的保存规则、字段类型，以及重复 id 等跨记录的问题。
+    内容相关的检查结果按内容缓存（见 content_key），再次检查时只处理新增或修改过的题目；
+    需要检查的题目很多时分块交给进程池并行处理。可以在后台线程中调用，同一时间只有一次检查在使用缓存。
+    """
+
+    def __init__(self, parallel_threshold=PARALLEL_THRESHOLD):
+        self.parallel_threshold = parallel_threshold
+        self._cache = {} # content_key -> ((级别, 说明), ...)
+        self._lock = threading.Lock()
+
+    def validate(self, problems):
+        """检查一组题目（原始记录列表），返回按记录位置排列的 [(位置, 题目id, 级别, 说明)]"""
+        with self._lock:
+            return self._validate(problems)
+
+    def _validate(self, problems):
+        keys = [content_key(p) if isinstance(p, dict) else None for p in problems]
+        pending = {}
+        for key, problem in zip(keys, problems):
+            if key is not None and key not in self._cache:
+                pending.setdefault(key, problem)
+        self._cache.update(zip(pending, self._check_many(list(pending.values()))))
+        self._cache = {key: self._cache[key] for key in keys if key is not None} # 已删除或改过的题目的结果不再保留
+
+        issues = []
+        for position, (problem, key) in enumerate(zip(problems, keys)):
+            if key is None:
+                issues.append((position, None, ERROR, "记录不是 JSON 对象"))
+                continue
+            problem_id = problem.get('id')
+            issues.extend((position, problem_id, level, message) for level, message in check_record(problem) + list(self._cache[key]))
+        issues.extend(check_cross_record(problems))
+        issues.sort(key=lambda issue: issue[0])
+        return issues
+
+    def _check_many(self, problems):
+        if len(problems) < self.parallel_threshold:
+            return check_contents(problems)
+        chunks = [problems[start:start + CHUNK_SIZE] for start in range(0, len(problems), CHUNK_SIZE)]
+        try:
+            # 用 spawn 启动子进程：校验可能在后台线程里进行，fork 会把其他线程持有的锁一起复制过去
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(MAX_WORKERS, os.cpu_count() or 1), mp_context=context) as pool:
+                return [result for chunk in pool.map(check_contents, chunks) for result in chunk]
+        except (OSError, BrokenProcessPool):
+            return check_contents(problems) # 无法启动子进程时（受限环境等）退回单进程
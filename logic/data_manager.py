@@ -1,8 +1,26 @@
 # logic/data_manager.py
 
+import csv
+import hashlib
 import json
+import marshal
 import os
 import sys
+import threading
+import zipfile
+from logic.problem_repository import ProblemRepository
+from logic.search_index import SearchIndex
+from logic.review_scheduler import ReviewScheduler
+from logic.weighted_sampler import WeightedSampler
+from logic.answer_matcher import MatcherCache
+from logic.duplicate_detector import DuplicateDetector, encode_signatures, decode_signatures
+from logic.related_problems import RelatedProblems, encode_related, decode_related
+from logic.bank_validator import BankValidator, problem_rule_error
+from logic.sort_index import SortIndex, SORT_KEYS
+from logic.problem_filter import ProblemFilter, FacetIndex
+from logic.persistence_worker import PersistenceWorker, atomic_write
+from logic.background_executor import BackgroundExecutor
+from logic.lru_cache import LRUCache
 
 def get_base_path():
     """获取项目根目录的路径"""
@@ -15,78 +33,909 @@ def get_base_path():
 
 # --- 在这里定义所有的全局文件名常量 ---
 PROBLEMS_FILE = os.path.join(get_base_path(), 'quant_problems.json')
-GAME_STATS_FILE = os.path.join(get_base_path(), 'game_stats.json')
+# 游戏记录使用 JSON Lines 格式（每行一条记录），旧版的 JSON 数组文件会被自动迁移（旧文件保持不动）
+GAME_STATS_FILE = os.path.join(get_base_path(), 'game_stats.jsonl')
+LEGACY_GAME_STATS_FILE = os.path.join(get_base_path(), 'game_stats.json')
+# 已完成聚合的每局汇总，记录处理到了游戏记录文件的哪个位置
+GAME_SESSIONS_FILE = os.path.join(get_base_path(), 'game_sessions.json')
+SESSION_LENGTH = 10 # 每10个回合记录为一局
+# 题库的追加日志：每次答题、收藏、编辑、添加或删除一道题只追加一行，定期合并回题库文件
+ATTEMPT_JOURNAL_FILE = os.path.join(get_base_path(), 'quant_problems.journal')
+JOURNAL_COMPACT_THRESHOLD = 64 * 1024 # 日志超过这个字节数就自动合并
+DATABASE_FILE = os.path.join(get_base_path(), 'quant_bank.db')
+# 题库的二进制快照：JSON 仍是可手动编辑的唯一数据源，快照只用来加速读取
+PROBLEMS_SNAPSHOT_FILE = os.path.join(get_base_path(), 'quant_problems.snapshot')
+SNAPSHOT_VERSION = 1 # 快照结构变化时递增，旧快照会被自动丢弃
+# 间隔重复的复习排期（只保存复习过的题目）
+REVIEW_SCHEDULE_FILE = os.path.join(get_base_path(), 'review_schedule.json')
+# 近似重复检测的 MinHash 签名（派生数据，按内容哈希复用，删除后会自动重新计算）
+DUPLICATE_SIGNATURES_FILE = os.path.join(get_base_path(), 'duplicate_signatures.npz')
+# 每道题的相关题目（派生数据，按内容哈希复用）
+RELATED_PROBLEMS_FILE = os.path.join(get_base_path(), 'related_problems.json')
+
+# --- 存储后端：默认使用JSON文件，设置环境变量 QUANTBANK_STORAGE=sqlite 切换到SQLite ---
+STORAGE_BACKEND = os.environ.get('QUANTBANK_STORAGE', 'json')
+_sqlite_store = None
+
+def _get_sqlite_store():
+    """使用SQLite后端时返回数据库连接，否则返回None（第一次打开新数据库时自动从JSON迁移）"""
+    global _sqlite_store
+    if STORAGE_BACKEND != 'sqlite':
+        return None
+    if _sqlite_store is None:
+        from logic.sqlite_backend import SqliteStore
+        _sqlite_store = SqliteStore(DATABASE_FILE)
+        if _sqlite_store.is_empty():
+            migrate_json_to_sqlite()
+    return _sqlite_store
+
+def migrate_json_to_sqlite():
+    """一次性把现有的JSON题库和游戏记录迁移到SQLite数据库"""
+    from logic.sqlite_backend import SqliteStore
+    store = _sqlite_store or SqliteStore(DATABASE_FILE)
+    store.migrate_from_json(_load_problems_json(), _load_game_stats_json())
+    return store
+
+# --- 后台写盘：界面线程只把写操作放进队列，由后台线程原子地写入磁盘 ---
+def _on_file_written(path):
+    """后台线程写完一个文件后，把对应缓存的签名更新为文件的新签名（缓存数据本身已经是最新的）"""
+    if path in (PROBLEMS_FILE, ATTEMPT_JOURNAL_FILE):
+        _refresh_cached_signature(PROBLEMS_FILE, _problems_signature())
+    elif path == GAME_STATS_FILE:
+        _refresh_cached_signature(GAME_STATS_FILE, _file_signature(GAME_STATS_FILE))
+
+_writer = PersistenceWorker(on_written=_on_file_written)
+
+_background = BackgroundExecutor() # 耗时的派生索引在后台整体建立，界面线程期间沿用旧的结果
+
+def flush_pending_writes(timeout=None):
+    """等待所有排队中的写操作完成（程序退出时调用）"""
+    return _writer.flush(timeout)
+
+# --- 加载缓存：按文件身份(设备号+inode)、修改时间和大小判断文件是否发生变化 ---
+_load_cache = {} # key -> (文件签名, 已解析的数据)
+_cache_lock = threading.RLock() # 后台写盘线程也会更新缓存签名
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _get_cached(key, signature, pending_keys=()):
+    """
+    文件签名没变时返回缓存的数据。
+    如果这些文件还有我们自己排队中的写操作，缓存的数据比磁盘更新，同样直接返回。
+    """
+    with _cache_lock:
+        entry = _load_cache.get(key)
+        if entry is not None and (entry[0] == signature or _writer.has_pending(*pending_keys)):
+            return entry[1]
+        return None
+
+def _set_cached(key, signature, data):
+    with _cache_lock:
+        _load_cache[key] = (signature, data)
+
+def _current_cached(key, signature, pending_keys=()):
+    """准备修改缓存的数据前调用：缓存仍然有效时返回它，已经过期就直接作废"""
+    with _cache_lock:
+        data = _get_cached(key, signature, pending_keys)
+        if data is None:
+            _load_cache.pop(key, None)
+        return data
+
+def _refresh_cached_signature(key, signature):
+    with _cache_lock:
+        entry = _load_cache.get(key)
+        if entry is not None:
+            _load_cache[key] = (signature, entry[1])
+
+def _replace_cached_data(key, data):
+    """缓存的数据在内存中被修改过（签名不变，之后的写盘完成时照常更新）"""
+    with _cache_lock:
+        entry = _load_cache.get(key)
+        if entry is not None:
+            _load_cache[key] = (entry[0], data)
+
+def _problems_signature():
+    return (_file_signature(PROBLEMS_FILE), _file_signature(ATTEMPT_JOURNAL_FILE))
 
 # --- 题库相关函数 ---
 def load_problems():
-    """从JSON文件加载所有题目"""
+    """
+    加载所有题目。
+    JSON文件没有变化时直接返回上次解析的结果（多个调用方共享同一个列表，不要直接修改它）。
+    SQLite 存储建立仓库之后直接返回仓库中的题目，不等待排队中的写操作提交。
+    """
+    store = _get_sqlite_store()
+    if store is not None:
+        if _repository is not None:
+            return _repository.all() # 数据库只会被我们自己修改，所有修改都先反映在仓库里
+        return store.load_problems()
+    return _load_problems_json()
+
+def _load_problems_json():
+    """从JSON文件加载所有题目，并重放练习日志得到最新的统计数据"""
+    global _journal_bytes
+    signature = _problems_signature()
+    cached = _get_cached(PROBLEMS_FILE, signature, (PROBLEMS_FILE, ATTEMPT_JOURNAL_FILE))
+    if cached is not None:
+        return cached
+    # 我们自己排队中的写操作都已经反映在缓存里（见 _get_cached），走到这里说明文件被外部修改过，直接重新读取
     if not os.path.exists(PROBLEMS_FILE):
         with open(PROBLEMS_FILE, 'w') as f:
             json.dump([], f)
-        return []
-    with open(PROBLEMS_FILE, 'r', encoding='utf-8') as f:
+        problems = []
+    else:
+        problems = _read_problems_base()
+    _journal_bytes = _replay_journal(problems)
+    _set_cached(PROBLEMS_FILE, _problems_signature(), problems)
+    return problems
+
+def _read_problems_base():
+    """读取题库文件本身（不含练习日志），优先使用和它内容一致的二进制快照"""
+    snapshot = _read_problems_snapshot()
+    file_signature = _file_signature(PROBLEMS_FILE)
+    if snapshot is not None and snapshot[2] == file_signature:
+        return snapshot[3] # 文件自快照生成后没有动过，连JSON都不用读
+    with open(PROBLEMS_FILE, 'rb') as f:
+        raw = f.read()
+    digest = hashlib.blake2b(raw).hexdigest()
+    if snapshot is not None and snapshot[1] == digest:
+        problems = snapshot[3] # 文件被touch过但内容没变
+    else:
         try:
-            return json.load(f)
-        except json.JSONDecodeError:
+            problems = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
             return []
+    _write_problems_snapshot(digest, file_signature, problems)
+    return problems
+
+def _read_problems_snapshot():
+    """返回 (版本, 内容哈希, 文件签名, 题目列表)，快照不存在或不可用时返回None"""
+    try:
+        with open(PROBLEMS_SNAPSHOT_FILE, 'rb') as f:
+            snapshot = marshal.loads(f.read()) # 一次读入整个文件；marshal.load 直接读文件对象会逐个对象地小块读取
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snapshot, tuple) or len(snapshot) != 4 or snapshot[0] != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+def _write_problems_snapshot(digest, file_signature, problems):
+    # 在调用线程里先序列化，之后对题目的修改不会影响写进快照的内容
+    data = marshal.dumps((SNAPSHOT_VERSION, digest, file_signature, problems))
+    _writer.submit(PROBLEMS_SNAPSHOT_FILE, lambda: _commit_problems_snapshot(data))
+
+def _commit_problems_snapshot(data):
+    try:
+        atomic_write(PROBLEMS_SNAPSHOT_FILE, data)
+    except OSError:
+        pass # 快照只是加速手段，写不了就下次重新解析JSON
+
+def _write_problems_file(problems):
+    """把整个题库交给后台线程写盘；刚提交的内容就是最新数据，直接放进缓存"""
+    global _journal_bytes
+    snapshot = [dict(p) for p in problems] # 后台线程序列化期间，界面线程可能继续修改题目
+    _set_cached(PROBLEMS_FILE, _problems_signature(), problems)
+    if _journal_bytes > 0 or os.path.exists(ATTEMPT_JOURNAL_FILE):
+        # 日志里还记着复习排期，删除日志之前先把排期整体写进排期文件（写盘线程按提交顺序执行）
+        _write_review_schedule(load_review_schedule())
+    _journal_bytes = 0
+    # 新的题库文件已经包含了日志中的所有记录，排队中的日志追加可以丢弃
+    _writer.submit(PROBLEMS_FILE, lambda: _commit_problems_file(snapshot), supersedes=(ATTEMPT_JOURNAL_FILE,))
+
+def _commit_problems_file(problems):
+    """（后台线程）原子地写入题库文件和快照，然后丢弃已合并的日志"""
+    raw = json.dumps(problems, ensure_ascii=False, indent=4).encode('utf-8')
+    atomic_write(PROBLEMS_FILE, raw)
+    _commit_problems_snapshot(marshal.dumps(
+        (SNAPSHOT_VERSION, hashlib.blake2b(raw).hexdigest(), _file_signature(PROBLEMS_FILE), problems)))
+    if os.path.exists(ATTEMPT_JOURNAL_FILE):
+        os.remove(ATTEMPT_JOURNAL_FILE)
 
 def save_problems(problems):
-    """将所有题目保存到JSON文件"""
-    with open(PROBLEMS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(problems, f, ensure_ascii=False, indent=4)
+    """保存所有题目，并用它们重建共享的题库仓库"""
+    global _repository, _repository_source
+    store = _get_sqlite_store()
+    if store is not None:
+        snapshot = [dict(p) for p in problems]
+        _writer.submit(None, lambda: store.save_problems(snapshot))
+    else:
+        _write_problems_file(problems)
+    if _repository is not None:
+        _repository_source = problems # 先记下来源：监听者在 reset 通知里读取仓库时不会再次触发重新加载
+        _repository.load(problems)
+    elif store is not None:
+        # 数据库的写入还在排队，之后直接从这份数据建立的仓库读取
+        _repository = ProblemRepository(problems)
+        _repository_source = problems
 
-def update_problem_stats(problem_id, was_correct):
-    """更新一道题的尝试次数和正确次数"""
+# --- 共享的题库仓库 ---
+_repository = None
+_repository_source = None # 仓库是由哪一次加载结果建立的
+
+def get_problem_repository():
+    """
+    获取所有页面共享的题库仓库。
+    首次调用时加载并建立索引；之后只有JSON文件被外部修改时才会重新加载。
+    """
+    global _repository, _repository_source
+    if _repository is not None and _get_sqlite_store() is not None:
+        return _repository # 数据库只会被我们自己修改，仓库始终是最新的
     problems = load_problems()
-    problem_found = False
-    for p in problems:
-        if p.get('id') == problem_id:
-            p['attempts'] = p.get('attempts', 0) + 1
-            if was_correct:
-                p['correct'] = p.get('correct', 0) + 1
-            problem_found = True
-            break
-    if problem_found:
-        save_problems(problems)
-    return problem_found
+    if _repository is None:
+        _repository = ProblemRepository(problems)
+        _repository_source = problems
+    elif problems is not _repository_source:
+        _repository_source = problems # 同上，必须在 load 发出 reset 通知之前
+        _repository.load(problems)
+    return _repository
+
+def _save_repository():
+    """把仓库的当前内容（连同无法建立索引、等待修正的记录）写回文件（仓库已经是最新状态，无需重建索引）"""
+    global _repository_source
+    repository = get_problem_repository()
+    problems = repository.all() + repository.skipped
+    _write_problems_file(problems)
+    _repository_source = problems
+
+def add_problem(data):
+    """添加一道新题，自动分配id，返回新题目"""
+    repository = get_problem_repository()
+    data['id'] = repository.next_id()
+    repository.add(data)
+    store = _get_sqlite_store()
+    if store is not None:
+        snapshot = dict(data)
+        _writer.submit(None, lambda: store.add_problem(snapshot))
+    else:
+        _journal_problem_changes([{"op": "put", "problem": data}])
+    return data
+
+def update_problem(problem_id, data):
+    """用新数据替换一道已有的题目，找不到时返回None"""
+    problem = get_problem_repository().update(problem_id, data)
+    if problem is None:
+        return None
+    store = _get_sqlite_store()
+    if store is not None:
+        snapshot = dict(problem)
+        _writer.submit(None, lambda: store.update_problem(snapshot))
+    else:
+        _journal_problem_changes([{"op": "put", "problem": problem}])
+    return problem
+
+def delete_problem(problem_id):
+    """删除一道题目，返回被删除的题目"""
+    problem = get_problem_repository().remove(problem_id)
+    if problem is None:
+        return None
+    store = _get_sqlite_store()
+    if store is not None:
+        _writer.submit(None, lambda: store.delete_problem(problem_id))
+    else:
+        _journal_problem_changes([{"op": "delete", "id": problem_id}])
+    return problem
+
+# --- 全文搜索 ---
+_search_index = None
+
+def get_search_index():
+    """共享的全文搜索索引，第一次使用时在后台建立（搜索时如果还没建好就等它完成），之后随题库仓库增量更新"""
+    global _search_index
+    repository = get_problem_repository()
+    if _search_index is None or _search_index.repository is not repository:
+        _search_index = SearchIndex(repository, executor=_background)
+    return _search_index
+
+def search_problems(query, limit=None):
+    """在标题、描述、答案、备注和代码解法中搜索，返回按相关度排序的题目id列表"""
+    return get_search_index().search(query, limit)
+
+# --- 派生数据的缓存文件 ---
+_snapshots_queued = set() # 已经排队、还没执行的快照保存
+
+def _submit_snapshot_write(path, encode):
+    """
+    派生数据变化后排队保存；这个文件已经有排队中的保存时跳过，它执行时才调用 encode 取快照，会包含这次的变化。
+    批量导入时每道题都会触发一次变化，这样只在写盘线程空闲时序列化一次。
+    """
+    if path in _snapshots_queued:
+        return
+    _snapshots_queued.add(path)
+    def write():
+        _snapshots_queued.discard(path) # 先清标记再取快照，之后的变化会排队新的保存
+        atomic_write(path, encode())
+    _writer.submit(path, write)
+
+# --- 近似重复检测 ---
+_duplicate_detector = None
+
+def load_duplicate_signatures():
+    """
+    读取保存的 MinHash 签名：题目id -> (内容哈希, 签名)，文件不存在或无法读取时返回空字典。
+    不等待排队中的保存：文件是原子替换的，读到旧版本时按内容哈希对不上的题目会重新计算。
+    """
+    if not os.path.exists(DUPLICATE_SIGNATURES_FILE):
+        return {}
+    try:
+        return decode_signatures(DUPLICATE_SIGNATURES_FILE)
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        return {}
+
+def _write_duplicate_signatures(detector):
+    _submit_snapshot_write(DUPLICATE_SIGNATURES_FILE, lambda: encode_signatures(detector.snapshot()))
+
+def get_duplicate_detector():
+    """共享的近似重复检测器，第一次使用时读取保存的签名，在后台只为新增或修改过的题目重新计算"""
+    global _duplicate_detector
+    repository = get_problem_repository()
+    if _duplicate_detector is None or _duplicate_detector.repository is not repository:
+        _duplicate_detector = DuplicateDetector(repository, load_duplicate_signatures(), on_changed=_write_duplicate_signatures, executor=_background)
+    return _duplicate_detector
+
+def find_similar_problems(data, limit=None, wait=True):
+    """
+    与一道题（可以是还没保存的题目数据）可能重复的题目 [(题目id, 相似度)]；data 带 id 时排除它自己。
+    wait 为 False 时不等待后台建立查重索引，还没建好就返回空列表（用于浏览时的提示）。
+    """
+    return get_duplicate_detector().similar_to(data, limit=limit, wait=wait)
+
+def find_duplicate_pairs():
+    """整个题库中可能重复的题目对 [(题目id, 题目id, 相似度)]，按相似度从高到低排列"""
+    return get_duplicate_detector().duplicate_pairs()
+
+def warm_up_indexes():
+    """程序启动后调用：在后台预先建立查重索引和全文搜索索引，之后浏览、搜索和保存题目时不必等待"""
+    get_duplicate_detector()
+    get_search_index()
+
+# --- 相关题目推荐 ---
+_related_problems = None
+
+def load_related_problems():
+    """
+    读取保存的相关题目列表：题目id -> (内容哈希, ((相关题目id, 相似度), ...))，文件不存在或无法读取时返回空字典。
+    和查重签名一样不等待排队中的保存，旧版本中内容哈希对不上的题目会重新计算。
+    """
+    if not os.path.exists(RELATED_PROBLEMS_FILE):
+        return {}
+    try:
+        with open(RELATED_PROBLEMS_FILE, 'rb') as f:
+            return decode_related(f.read())
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def _write_related_problems(related):
+    _submit_snapshot_write(RELATED_PROBLEMS_FILE, lambda: encode_related(related.snapshot(), related.k))
+
+def get_related_problems():
+    """共享的相关题目索引，第一次使用时读取保存的列表，之后随题库仓库增量更新；需要整体建立模型时在后台进行"""
+    global _related_problems
+    repository = get_problem_repository()
+    if _related_problems is None or _related_problems.repository is not repository:
+        _related_problems = RelatedProblems(repository, load_related_problems(), on_changed=_write_related_problems, executor=_background)
+    return _related_problems
+
+def find_related_problems(problem_id):
+    """一道题最相关的几道题 ((题目id, 相似度), ...)，按相似度从高到低排列"""
+    return get_related_problems().related(problem_id)
+
+def related_problems_building():
+    """相关题目模型是否正在后台整体建立（期间 find_related_problems 返回原来的列表）"""
+    return get_related_problems().building
+
+# --- 题目校验 ---
+def validate_problem(data):
+    """按编辑器的规则检查一道题，合法时返回None，否则返回错误提示"""
+    return problem_rule_error(data)
+
+_bank_validator = None
+
+def validate_problem_bank():
+    """
+    检查整个题库（加载到的原始记录，包括仓库建立索引时会被覆盖掉的重复 id），
+    返回 [(记录位置, 题目id, 级别, 说明)]；只有新增或修改过的题目会被重新检查。
+    """
+    return _get_bank_validator().validate(load_problems())
+
+def validate_problem_bank_async():
+    """在后台线程中校验整个题库（结果同 validate_problem_bank），返回 Future；题目先在调用线程里复制一份"""
+    snapshot = [dict(p) if isinstance(p, dict) else p for p in load_problems()]
+    return _background.submit(_get_bank_validator().validate, snapshot)
+
+def _get_bank_validator():
+    global _bank_validator
+    if _bank_validator is None:
+        _bank_validator = BankValidator()
+    return _bank_validator
+
+# --- 批量导入/导出 (CSV, JSON Lines) ---
+PROBLEM_FIELDS = [
+    "id", "title", "source", "tags", "description", "is_programming", "python_solution",
+    "cpp_solution", "answer", "notes", "attempts", "correct", "is_saved"
+]
+
+def _detect_format(path, file_format):
+    file_format = (file_format or os.path.splitext(path)[1].lstrip('.')).lower()
+    if file_format in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if file_format == 'csv':
+        return 'csv'
+    raise ValueError(f"不支持的文件格式: {file_format or path}")
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', '是')
+    return bool(value)
+
+def _parse_int(value):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 0
+
+def _normalize_problem(raw):
+    """把导入的一条原始记录整理成和编辑器保存的格式一致的题目"""
+    def text(key):
+        value = raw.get(key)
+        return value.strip() if isinstance(value, str) else ""
+    tags = raw.get("tags") or []
+    if isinstance(tags, str): # CSV中多个标签用分号分隔
+        tags = tags.replace(',', ';').split(';')
+    data = {
+        "title": text("title"), "source": text("source"),
+        "tags": [t.strip() for t in tags if isinstance(t, str) and t.strip()],
+        "description": text("description"), "notes": text("notes"),
+        "is_programming": _parse_bool(raw.get("is_programming", False)),
+        "python_solution": text("python_solution"), "cpp_solution": text("cpp_solution"), "answer": text("answer"),
+    }
+    if data["is_programming"]: data["answer"] = ""
+    else: data["python_solution"] = ""; data["cpp_solution"] = ""
+    data["attempts"] = _parse_int(raw.get("attempts"))
+    data["correct"] = min(_parse_int(raw.get("correct")), data["attempts"])
+    data["is_saved"] = _parse_bool(raw.get("is_saved", False))
+    return data
+
+def _iter_import_records(path, file_format):
+    """逐条读取待导入的记录，产出 (行号, 原始记录或None)"""
+    if file_format == 'csv':
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+    else:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    raw = json.loads(line)
+                except json.JSONDecodeError:
+                    raw = None
+                yield line_num, raw if isinstance(raw, dict) else None
+
+def _dedupe_key(problem):
+    return (problem.get("title", "").strip().lower(), problem.get("source", "").strip().lower())
+
+def import_problems(path, file_format=None):
+    """
+    从CSV或JSON Lines文件批量导入题目。
+    逐条读取并按编辑器的规则校验，按 (标题, 公司) 去重，批量分配id，最后只写一次文件。
+    和题库中已有题目（或同一批中先读到的题）近似重复（换了说法）的题仍会导入，但会在结果中列出，方便之后在编辑器里核对。
+    返回 {"added": 导入数量, "duplicates": 重复跳过的数量, "errors": [(行号, 错误信息), ...],
+          "similar": [(行号, 标题, 最相似的题目id, 相似度), ...]}。
+    """
+    file_format = _detect_format(path, file_format)
+    repository = get_problem_repository()
+    detector = get_duplicate_detector()
+    seen = {_dedupe_key(p) for p in repository}
+    next_id = repository.next_id()
+    added, duplicates, errors, similar = [], 0, [], []
+    for line_num, raw in _iter_import_records(path, file_format):
+        if raw is None:
+            errors.append((line_num, "无法解析的记录")); continue
+        data = _normalize_problem(raw)
+        error = validate_problem(data)
+        if error:
+            errors.append((line_num, error)); continue
+        key = _dedupe_key(data)
+        if key in seen:
+            duplicates += 1; continue
+        seen.add(key)
+        matches = detector.similar_to(data, limit=1)
+        if matches:
+            similar.append((line_num, data["title"], *matches[0]))
+        data["id"] = next_id; next_id += 1
+        detector.include(data) # 同一批里后面的题也要和它比较
+        added.append(data)
+    if added:
+        for data in added:
+            repository.add(data)
+        store = _get_sqlite_store()
+        if store is not None:
+            snapshot = [dict(p) for p in added]
+            _writer.submit(None, lambda: store.add_problems(snapshot))
+        else:
+            _save_repository()
+    return {"added": len(added), "duplicates": duplicates, "errors": errors, "similar": similar}
+
+def export_problems(path, problem_ids=None, file_format=None):
+    """把题目（默认全部）逐条写出为CSV或JSON Lines文件，返回导出的数量"""
+    file_format = _detect_format(path, file_format)
+    repository = get_problem_repository()
+    problems = repository if problem_ids is None else (repository.get(i) for i in problem_ids if i in repository)
+    count = 0
+    if file_format == 'csv':
+        # utf-8-sig 让 Excel 能正确识别中文
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=PROBLEM_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for p in problems:
+                row = dict(p); row["tags"] = ";".join(p.get("tags", []))
+                writer.writerow(row); count += 1
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            for p in problems:
+                f.write(json.dumps(p, ensure_ascii=False) + "\n"); count += 1
+    return count
+
+# --- 题库日志 ---
+_journal_bytes = 0 # 日志当前的大小（包括还在排队中的追加）
+
+def _replay_journal(problems):
+    """
+    把日志中的记录按顺序叠加到刚从文件读出的题目列表上（原地修改），返回日志的字节数。
+    没有 op 的是答题记录；"put" 整体替换或追加一道题，"delete" 删除一道题，"saved" 设置收藏状态。
+    """
+    if not os.path.exists(ATTEMPT_JOURNAL_FILE):
+        return 0
+    positions = {p.get('id'): n for n, p in enumerate(problems) if isinstance(p, dict)}
+    removed = False
+    with open(ATTEMPT_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue # 程序中途退出时最后一行可能写了一半，跳过
+            if not isinstance(entry, dict):
+                continue
+            op = entry.get('op')
+            if op == 'put':
+                problem = entry.get('problem')
+                if isinstance(problem, dict):
+                    n = positions.setdefault(problem.get('id'), len(problems))
+                    if n == len(problems): problems.append(problem)
+                    else: problems[n] = problem
+                continue
+            n = positions.get(entry.get('id'))
+            if n is None:
+                continue
+            p = problems[n]
+            if op == 'delete':
+                problems[n] = None; del positions[entry['id']]; removed = True
+            elif op == 'saved':
+                p['is_saved'] = bool(entry.get('value'))
+            elif op is None:
+                p['attempts'] = p.get('attempts', 0) + 1
+                if entry.get('correct'):
+                    p['correct'] = p.get('correct', 0) + 1
+        size = f.tell()
+    if removed:
+        problems[:] = [p for p in problems if p is not None]
+    return size
+
+def _append_journal(entries):
+    """把一组日志记录作为一段交给后台线程追加到日志（在调用线程里先序列化），返回日志的字节数"""
+    global _journal_bytes
+    # 内存中的题目已经包含这些修改，只要缓存之前有效，它就仍然有效
+    _current_cached(PROBLEMS_FILE, _problems_signature(), (PROBLEMS_FILE, ATTEMPT_JOURNAL_FILE))
+    text = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    _writer.append(ATTEMPT_JOURNAL_FILE, text)
+    _journal_bytes += len(text.encode('utf-8'))
+    return _journal_bytes
+
+def _append_attempts(attempts, review_states):
+    """
+    把一组答题记录 [(题目id, 是否正确)] 追加到日志，返回日志的字节数。
+    每条记录带上这道题答题后的复习排期，排期文件只在日志合并时整体重写。
+    """
+    return _append_journal({"id": problem_id, "correct": was_correct, "review": list(review_states[problem_id])}
+                           for problem_id, was_correct in attempts)
+
+def _journal_problem_changes(entries, in_place=False):
+    """
+    单道题的修改（添加、编辑、删除、收藏）只追加到日志，不在界面线程复制整个题库；日志太大时才合并。
+    in_place 为 False 时题目列表有增减或替换，把加载缓存换成仓库当前的列表（只是引用，不复制题目）。
+    """
+    global _repository_source
+    if not in_place:
+        repository = get_problem_repository()
+        problems = repository.all() + repository.skipped
+        _replace_cached_data(PROBLEMS_FILE, problems)
+        _repository_source = problems
+    if _append_journal(entries) >= JOURNAL_COMPACT_THRESHOLD:
+        compact_attempt_journal()
+
+def compact_attempt_journal():
+    """把题库日志合并回题库文件（日志超过阈值或程序退出时调用）"""
+    if _journal_bytes > 0 or os.path.exists(ATTEMPT_JOURNAL_FILE):
+        _save_repository()
+
+def update_problem_stats(problem_id, was_correct):
+    """更新一道题的尝试次数和正确次数（只追加一条日志或更新一行，不重写题库）"""
+    return record_attempts([(problem_id, was_correct)]) > 0
+
+def record_attempts(attempts):
+    """
+    提交一组答题结果 [(题目id, 是否正确)]，返回实际记录的条数。
+    内存中的统计和复习排期逐条更新，落盘只有一次：JSON 存储把所有记录（连同新的排期）作为一段追加到日志，
+    SQLite 存储在同一个事务里更新统计和排期。限时测验结束时用它一次性提交整轮的结果。
+    """
+    repository = get_problem_repository()
+    scheduler = get_review_scheduler()
+    recorded, review_states = [], {}
+    for problem_id, was_correct in attempts:
+        p = repository.get(problem_id)
+        if p is None:
+            continue
+        p['attempts'] = p.get('attempts', 0) + 1
+        if was_correct:
+            p['correct'] = p.get('correct', 0) + 1
+        repository.stats_changed(problem_id)
+        review_states[problem_id] = scheduler.review(problem_id, was_correct) # 答题后按结果重新排期
+        recorded.append((problem_id, bool(was_correct)))
+    if not recorded:
+        return 0
+    store = _get_sqlite_store()
+    if store is not None:
+        _writer.submit(None, lambda: store.record_attempts(recorded, review_states))
+    else:
+        if _append_attempts(recorded, review_states) >= JOURNAL_COMPACT_THRESHOLD:
+            compact_attempt_journal()
+    return len(recorded)
 
 def toggle_problem_saved_status(problem_id):
     """切换一道题的is_saved布尔值"""
-    problems = load_problems()
-    problem_found = False
-    new_status = False
-    for p in problems:
-        if p.get('id') == problem_id:
-            current_status = p.get('is_saved', False)
-            p['is_saved'] = not current_status
-            new_status = p['is_saved']
-            problem_found = True
-            break
-    if problem_found:
-        save_problems(problems)
-    return new_status
+    repository = get_problem_repository()
+    p = repository.get(problem_id)
+    if p is None:
+        return False
+    p['is_saved'] = not p.get('is_saved', False)
+    repository.reindex(problem_id)
+    store = _get_sqlite_store()
+    if store is not None:
+        is_saved = p['is_saved']
+        _writer.submit(None, lambda: store.set_problem_saved(problem_id, is_saved))
+    else:
+        _journal_problem_changes([{"op": "saved", "id": problem_id, "value": p['is_saved']}], in_place=True)
+    return p['is_saved']
+
+# --- 排序 ---
+_sort_indexes = {} # 排序方式 -> SortIndex
+
+def get_sort_index(order_by):
+    """某种排序方式（SORT_KEYS 中的一种）的有序索引，第一次使用时建立，之后随题库仓库增量维护"""
+    repository = get_problem_repository()
+    index = _sort_indexes.get(order_by)
+    if index is None or index.repository is not repository:
+        index = _sort_indexes[order_by] = SortIndex(repository, SORT_KEYS[order_by])
+    return index
+
+def query_problem_ids(tag=None, source=None, saved=None, unfinished=False, order_by=None):
+    """
+    按条件筛选并排序题目，返回id列表。
+    order_by 可选 'title'（标题自然顺序）、'accuracy'（正确率从低到高）、'errors'（错误次数从多到少）、
+    'attempts'（总次数从多到少）或 None（题库原顺序）。
+    SQLite后端直接下推为带索引的查询，JSON后端使用仓库的二级索引；排序使用维护好的有序索引，不重新计算排序键。
+    SQLite后端还有排队中的写操作时，数据库比仓库旧，同样使用仓库的二级索引，不等待写盘。
+    """
+    store = _get_sqlite_store()
+    if store is not None and _writer.idle():
+        if order_by != 'title':
+            return store.query_problem_ids(tag, source, saved, unfinished, order_by)
+        # 标题的自然顺序无法写成 SQL 排序，筛选下推后再按有序索引排列
+        return get_sort_index(order_by).order(store.query_problem_ids(tag, source, saved, unfinished, None))
+    repository = get_problem_repository()
+    candidates = None
+    for ids in (repository.ids_with_tag(tag) if tag is not None else None,
+                repository.ids_from_source(source) if source is not None else None,
+                repository.saved_ids() if saved else None):
+        if ids is not None:
+            candidates = set(ids) if candidates is None else candidates & ids
+    if order_by is not None and saved is not False and not unfinished:
+        index = get_sort_index(order_by)
+        return list(index.ordered_ids()) if candidates is None else index.order(candidates)
+    if candidates is None:
+        problems = repository.all()
+    else:
+        # 遍历候选集合而不是整个题库，再按题库原顺序排列
+        problems = sorted((repository.get(i) for i in candidates), key=repository.position)
+    if saved is False:
+        problems = [p for p in problems if not p.get('is_saved', False)]
+    if unfinished:
+        problems = [p for p in problems if p.get('correct', 0) == 0]
+    if order_by is not None:
+        return get_sort_index(order_by).order(p['id'] for p in problems)
+    return [p['id'] for p in problems]
+
+# --- 组合筛选 ---
+_facet_index = None
+
+def get_facet_index():
+    """共享的组合筛选位图索引，第一次使用时建立，之后随题库仓库增量维护"""
+    global _facet_index
+    repository = get_problem_repository()
+    if _facet_index is None or _facet_index.repository is not repository:
+        _facet_index = FacetIndex(repository)
+    return _facet_index
+
+def _query_arguments(problem_filter):
+    """
+    能写成 query_problem_ids 参数的筛选条件（至多一个标签、一个公司，收藏与否、未完成）返回对应的参数，否则返回None。
+    编辑器的筛选下拉框和标签下拉框组合出的都是这种条件。
+    """
+    f = problem_filter
+    if (f.empty or f.names or f.conditions or f.programming is not None or f.finished is True or len(f.tags) > 1
+            or (f.sources is not None and len(f.sources) != 1)):
+        return None
+    return {"tag": next(iter(f.tags), None), "source": next(iter(f.sources)) if f.sources is not None else None,
+            "saved": f.saved, "unfinished": f.finished is False}
+
+def filter_problem_ids(problem_filter, order_by=None):
+    """
+    满足组合筛选条件（ProblemFilter）的题目id，按题库原顺序或 order_by（取值同 query_problem_ids）排列。
+    SQLite后端上简单的条件下推为带索引的 SQL 查询（见 query_problem_ids），其余条件在位图索引上完成。
+    """
+    arguments = _query_arguments(problem_filter) if _get_sqlite_store() is not None else None
+    if arguments is not None:
+        return query_problem_ids(order_by=order_by, **arguments)
+    ids = get_facet_index().ids(problem_filter)
+    return ids if order_by is None else get_sort_index(order_by).order(ids)
+
+def sample_problem_id(problem_filter):
+    """在满足组合筛选条件的题目中均匀随机抽一道，没有时返回None"""
+    return get_facet_index().random_id(problem_filter)
 
 # --- 游戏统计相关函数 ---
+# 游戏记录还有写操作在排队时，读取不等待写盘：磁盘上 base 之前的部分已经稳定，之后的记录都在 records 里。
+# base 对 JSON 存储是记录文件的字节数，对 SQLite 存储是 game_records 的 seq；整体覆盖还没写完时为 None
+_game_records_tail = None # {"base": ..., "records": [排队中的记录]}
+
+def _pending_game_records():
+    """还有排队中的游戏记录写操作时返回 (base, 排队中的记录)，否则返回 None（磁盘上已经是最新的）"""
+    if not _writer.has_pending(GAME_STATS_FILE):
+        return None
+    return _game_records_tail["base"], list(_game_records_tail["records"])
+
+def _game_stats_end(store):
+    if store is not None:
+        return store.last_game_seq()
+    return os.path.getsize(GAME_STATS_FILE) if os.path.exists(GAME_STATS_FILE) else 0
+
 def load_game_stats():
-    """从JSON文件加载所有游戏记录"""
+    """加载所有游戏记录"""
+    store = _get_sqlite_store()
+    if store is not None:
+        pending = _pending_game_records()
+        if pending is None:
+            return store.load_game_stats()
+        base, records = pending
+        return (store.load_game_stats(base) if base else []) + records
+    return _load_game_stats_json()
+
+def _load_game_stats_json():
+    """从JSON Lines文件加载所有游戏记录（文件没有变化时直接返回缓存）"""
+    _migrate_legacy_game_stats()
+    signature = _file_signature(GAME_STATS_FILE)
+    cached = _get_cached(GAME_STATS_FILE, signature, (GAME_STATS_FILE,))
+    if cached is not None:
+        return cached
+    pending = _pending_game_records()
+    if pending is None:
+        stats = list(_iter_game_records_json())
+    else:
+        base, records = pending
+        stats = (_read_game_record_lines(0, base)[0] if base else []) + records
+    _set_cached(GAME_STATS_FILE, signature, stats)
+    return stats
+
+def _migrate_legacy_game_stats():
+    """
+    把旧版 game_stats.json（整个JSON数组）转换为 JSON Lines。
+    旧文件原样保留（它是仓库里自带的初始数据），之后只读写新文件；新文件存在时不再迁移。
+    """
+    if not os.path.exists(LEGACY_GAME_STATS_FILE) or os.path.exists(GAME_STATS_FILE):
+        return
+    with open(LEGACY_GAME_STATS_FILE, 'r', encoding='utf-8') as f:
+        try:
+            stats = json.load(f)
+        except json.JSONDecodeError:
+            stats = []
+    _commit_game_stats_file(_encode_game_records(stats)) # 迁移直接同步完成，之后的读取都依赖新文件
+
+def _encode_game_records(stats):
+    return ''.join(json.dumps(record, ensure_ascii=False) + "\n" for record in stats).encode('utf-8')
+
+def _commit_game_stats_file(data):
+    atomic_write(GAME_STATS_FILE, data)
+
+def _write_game_stats_file(stats):
+    global _game_records_tail
+    data = _encode_game_records(stats)
+    _game_records_tail = {"base": None, "records": list(stats)}
+    _set_cached(GAME_STATS_FILE, _file_signature(GAME_STATS_FILE), list(stats))
+    _writer.submit(GAME_STATS_FILE, lambda: _commit_game_stats_file(data))
+    _reset_session_summary() # 整个文件被替换，之前的汇总作废
+
+def _iter_game_records_json():
+    _migrate_legacy_game_stats()
     if not os.path.exists(GAME_STATS_FILE):
-        return []
+        return
     with open(GAME_STATS_FILE, 'r', encoding='utf-8') as f:
+        yield from _parse_record_lines(f)
+
+def _parse_record_lines(lines):
+    for line in lines:
+        if not line.strip():
+            continue
         try:
-            return json.load(f)
+            yield json.loads(line)
         except json.JSONDecodeError:
-            return []
+            continue # 跳过写了一半的行
+
+def _read_game_record_lines(start, end):
+    """读取记录文件 [start, end) 中已经写完整的行，返回 (记录列表, 这些行的字节数)"""
+    try:
+        with open(GAME_STATS_FILE, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+    except FileNotFoundError:
+        return [], 0
+    complete = data[:data.rfind(b'\n') + 1] # 只处理已经写完整的行
+    return list(_parse_record_lines(complete.decode('utf-8').splitlines())), len(complete)
+
+def iter_game_records():
+    """按时间顺序逐条读取游戏记录（惰性读取，不会一次性加载整个文件；有排队中的写操作时从内存读取）"""
+    if _writer.has_pending(GAME_STATS_FILE):
+        return iter(list(load_game_stats()))
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.iter_game_records()
+    return _iter_game_records_json()
 
 def save_game_stats(stats):
-    """将所有游戏记录保存到JSON文件"""
-    with open(GAME_STATS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(stats, f, ensure_ascii=False, indent=4)
+    """保存所有游戏记录（整体覆盖）"""
+    global _game_records_tail
+    store = _get_sqlite_store()
+    if store is not None:
+        snapshot = [dict(r) for r in stats]
+        _game_records_tail = {"base": None, "records": list(snapshot)}
+        _writer.submit(GAME_STATS_FILE, lambda: store.save_game_stats(snapshot))
+        return
+    _write_game_stats_file(stats)
 
 def add_game_record(record):
-    """添加一条新的游戏记录"""
-    stats = load_game_stats()
-    stats.append(record)
-    save_game_stats(stats)
+    """添加一条新的游戏记录（只在文件末尾追加一行）"""
+    global _game_records_tail
+    store = _get_sqlite_store()
+    if store is None:
+        _migrate_legacy_game_stats()
+    if not _writer.has_pending(GAME_STATS_FILE):
+        # 磁盘上的记录已经是最新的，从当前末尾开始记下之后排队的记录
+        _game_records_tail = {"base": _game_stats_end(store), "records": []}
+    snapshot = dict(record)
+    _game_records_tail["records"].append(snapshot)
+    if store is not None:
+        _writer.submit(GAME_STATS_FILE, lambda: store.add_game_record(snapshot), merge=False)
+        return
+    stats = _current_cached(GAME_STATS_FILE, _file_signature(GAME_STATS_FILE), (GAME_STATS_FILE,))
+    if stats is not None:
+        stats.append(record)
+    _writer.append(GAME_STATS_FILE, json.dumps(record, ensure_ascii=False) + "\n")
 
 def clear_game_stats():
     """清空所有的游戏得分/历史记录"""
@@ -94,38 +943,211 @@ def clear_game_stats():
 
 def reset_problem_practice_stats():
     """重置所有题目的练习统计（尝试次数和正确次数），但不改变收藏状态"""
-    problems = load_problems()
-    for p in problems:
+    repository = get_problem_repository()
+    for p in repository:
         p['attempts'] = 0
         p['correct'] = 0
-    save_problems(problems)
+        repository.stats_changed(p['id'])
+    store = _get_sqlite_store()
+    if store is not None:
+        _writer.submit(None, store.reset_problem_practice_stats)
+    else:
+        _save_repository()
+    clear_review_schedule()
+
+# --- 判分 ---
+_matcher_cache = None
+
+def get_answer_matchers():
+    """共享的判分器缓存，第一次使用时为所有非编程题编译判分器，题目被修改时自动作废"""
+    global _matcher_cache
+    repository = get_problem_repository()
+    if _matcher_cache is None or _matcher_cache.repository is not repository:
+        _matcher_cache = MatcherCache(repository)
+        _matcher_cache.precompile()
+    return _matcher_cache
 
+def check_problem_answer(problem_id, user_answer):
+    """判断用户的答案是否与标准答案等价（分数、小数、百分数、算式或多个可接受答案之一）"""
+    problem = get_problem_repository().get(problem_id)
+    if problem is None:
+        return False
+    return get_answer_matchers().get(problem).matches(user_answer)
+
+# --- 按薄弱程度加权抽题 ---
+MAX_WEIGHTED_SAMPLERS = 8 # 最多同时维护这么多个练习分类的抽题器，最久没用的注销监听后丢弃
+# 筛选条件 -> WeightedSampler；键是解析后的条件，写法不同（大小写、空格）的同一个分类共用一个抽题器
+_weighted_samplers = LRUCache(MAX_WEIGHTED_SAMPLERS, on_evict=lambda _, sampler: sampler.detach())
+
+def sample_weak_problem_id(category):
+    """在练习分类中按薄弱程度（平滑后的错误率）加权随机抽一道题，分类为空时返回None"""
+    repository = get_problem_repository()
+    problem_filter = ProblemFilter.parse(category)
+    sampler = _weighted_samplers.get(problem_filter)
+    if sampler is None or sampler.repository is not repository:
+        sampler = WeightedSampler(repository, problem_filter, get_facet_index())
+        _weighted_samplers.put(problem_filter, sampler)
+    return sampler.sample()
+
+# --- 间隔重复复习 ---
+_review_scheduler = None
+_review_schedule_queued = None # 最近一次交给写盘线程的完整排期（还没写完时代替磁盘上的排期）
+
+def load_review_schedule():
+    """
+    读取所有复习过的题目的排期：题目id -> (到期时间, 难度系数, 间隔天数, 连续答对次数)。
+    JSON 存储先读排期文件，再叠加练习日志中还没合并的排期。
+    不等待排队中的写操作：调度器建立之后内存中的排期就是最新的，之前排队中的只有整体写入的排期。
+    """
+    if _review_scheduler is not None:
+        return dict(_review_scheduler.states()) # 带排期的答题记录只在调度器建立之后才会提交
+    if _writer.has_pending(REVIEW_SCHEDULE_FILE):
+        return dict(_review_schedule_queued)
+    store = _get_sqlite_store()
+    if store is not None:
+        return store.load_review_schedule()
+    states = {}
+    if os.path.exists(REVIEW_SCHEDULE_FILE):
+        try:
+            with open(REVIEW_SCHEDULE_FILE, 'r', encoding='utf-8') as f:
+                states = {int(problem_id): tuple(state) for problem_id, state in json.load(f).items()}
+        except (OSError, ValueError):
+            states = {}
+    if os.path.exists(ATTEMPT_JOURNAL_FILE):
+        with open(ATTEMPT_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # 写了一半的最后一行
+                if isinstance(entry, dict) and isinstance(entry.get('review'), list) and entry.get('id') is not None:
+                    states[entry['id']] = tuple(entry['review'])
+    return states
+
+def get_review_scheduler():
+    """共享的复习调度器，第一次使用时从排期文件和题库建立"""
+    global _review_scheduler
+    repository = get_problem_repository()
+    if _review_scheduler is None or _review_scheduler.repository is not repository:
+        _review_scheduler = ReviewScheduler(repository, load_review_schedule())
+    return _review_scheduler
+
+def next_review_problem_id():
+    """最该复习的已到期题目id，没有到期题目时返回None"""
+    return get_review_scheduler().next_due()
+
+def next_review_time():
+    """最早的到期时间（时间戳）"""
+    return get_review_scheduler().next_due_time()
+
+def _write_review_schedule(states):
+    # 状态都是不可变的元组，浅拷贝之后就可以交给后台线程序列化；排队中的旧版本会被合并掉
+    global _review_schedule_queued
+    snapshot = _review_schedule_queued = dict(states)
+    _writer.submit(REVIEW_SCHEDULE_FILE, lambda: atomic_write(
+        REVIEW_SCHEDULE_FILE, json.dumps({str(i): list(s) for i, s in snapshot.items()}).encode('utf-8')))
+
+def clear_review_schedule():
+    """清空所有复习排期（重置练习统计时调用）"""
+    global _review_schedule_queued
+    if _review_scheduler is not None:
+        _review_scheduler.reset()
+    store = _get_sqlite_store()
+    if store is not None:
+        _review_schedule_queued = {}
+        _writer.submit(REVIEW_SCHEDULE_FILE, store.clear_review_schedule)
+    else:
+        _write_review_schedule({})
+
+
+# --- 每局汇总（增量聚合） ---
+_session_summary = None
+
+def _empty_session_summary(file_id=None):
+    # file_id: 汇总对应的游戏记录文件(设备号, inode)；offset: 已经处理到的字节位置
+    return {"file_id": file_id, "offset": 0, "sessions": []}
+
+def _load_session_summary():
+    global _session_summary
+    if _session_summary is None:
+        try:
+            with open(GAME_SESSIONS_FILE, 'r', encoding='utf-8') as f:
+                _session_summary = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _session_summary = _empty_session_summary()
+    return _session_summary
+
+def _save_session_summary(summary):
+    global _session_summary
+    _session_summary = summary
+    data = json.dumps(summary, ensure_ascii=False).encode('utf-8')
+    _writer.submit(GAME_SESSIONS_FILE, lambda: atomic_write(GAME_SESSIONS_FILE, data))
+
+def _remove_session_summary_file():
+    if os.path.exists(GAME_SESSIONS_FILE):
+        os.remove(GAME_SESSIONS_FILE)
+
+def _reset_session_summary():
+    global _session_summary
+    _session_summary = _empty_session_summary()
+    _writer.submit(GAME_SESSIONS_FILE, _remove_session_summary_file)
+
+def _fold_game_records(sessions, records):
+    """把新的回合记录依次并入每局汇总：最后一局不满10轮时先补满它"""
+    for record in records:
+        score = record.get("score", 0)
+        if sessions and sessions[-1]["num_rounds"] < SESSION_LENGTH:
+            sessions[-1]["total_score"] += score
+            sessions[-1]["num_rounds"] += 1
+        else:
+            # 使用这一局第一条记录的时间戳
+            sessions.append({"timestamp": record.get("timestamp"), "total_score": score, "num_rounds": 1})
 
 def get_game_sessions():
     """
-    加载所有游戏回合记录，并将它们按10个一组进行聚合。
-    返回一个包含每局游戏信息的列表。
-    """
-    stats = load_game_stats()
-    sessions = []
-    
-    # 每10个记录为一局
-    session_length = 10
-    for i in range(0, len(stats), session_length):
-        session_records = stats[i:i+session_length]
-        
-        # 确保这是一组完整的10局（或最后一组不完整的）
-        if not session_records:
-            continue
-            
-        total_score = sum(r.get("score", 0) for r in session_records)
-        # 使用这一局第一条记录的时间戳
-        timestamp = session_records[0].get("timestamp")
-        
-        sessions.append({
-            "timestamp": timestamp,
-            "total_score": total_score,
-            "num_rounds": len(session_records)
-        })
-        
-    return sessions
\ No newline at end of file
+    将所有游戏回合记录按10个一组聚合，返回一个包含每局游戏信息的列表。
+    汇总结果会持久化，每次只处理上次之后新追加的记录。
+    不等待排队中的写操作：只聚合磁盘上已经稳定的部分，排队中的记录从内存中补上。
+    """
+    store = _get_sqlite_store()
+    if store is None:
+        _migrate_legacy_game_stats()
+    pending = _pending_game_records()
+    base = pending[0] if pending is not None else None
+    if pending is not None and not base:
+        # 整个记录文件正在被替换（或者原来就是空的）：所有记录都在内存中
+        sessions = []
+        _fold_game_records(sessions, pending[1])
+        return sessions
+    if store is not None:
+        sessions, changes = store.get_game_sessions(SESSION_LENGTH, base)
+        if changes is not None:
+            _writer.submit(None, lambda: store.save_game_sessions(changes))
+    else:
+        sessions = _sync_session_summary(base)
+    if pending is not None:
+        _fold_game_records(sessions, pending[1])
+    return sessions
+
+def _sync_session_summary(end=None):
+    """把记录文件 end 字节之前（默认整个文件）新追加的记录并入持久化的汇总，返回每局汇总的副本"""
+    summary = _load_session_summary()
+    try:
+        st = os.stat(GAME_STATS_FILE)
+        file_id, size = [st.st_dev, st.st_ino], st.st_size
+    except FileNotFoundError:
+        file_id, size = None, 0
+    end = size if end is None else end
+    changed = False
+    if summary["file_id"] != file_id or summary["offset"] > end:
+        # 记录文件被替换或截断过，从头重新聚合
+        summary = _empty_session_summary(file_id)
+        changed = True
+    if summary["offset"] < end:
+        records, consumed = _read_game_record_lines(summary["offset"], end)
+        _fold_game_records(summary["sessions"], records)
+        summary["offset"] += consumed
+        changed = changed or bool(consumed)
+    if changed:
+        _save_session_summary(summary)
+    return [dict(session) for session in summary["sessions"]]
@@ -0,0 +1,310 @@
+# logic/duplicate_detector.py
+
+import hashlib
+import io
+import re
+import numpy as np
+from logic.problem_repository import content_hash
+
+SHINGLE_SIZE = 4          # 按字符切片的长度（中英文通用）
+NUM_PERMUTATIONS = 64     # MinHash 签名长度
+BANDS = 16                # LSH 分段数，每段 ROWS 行：相似度 0.5 的题目约有 64% 的概率成为候选，0.7 时约 98%
+ROWS = NUM_PERMUTATIONS // BANDS
+DUPLICATE_THRESHOLD = 0.5 # 估计的 Jaccard 相似度达到这个值才认为可能重复
+SIGNATURE_VERSION = 1     # 切片或哈希方式变化时递增，旧的签名文件会被丢弃
+
+NON_WORD = re.compile(r"[^0-9a-z\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+SHINGLE_BASE = np.uint64(1000003)
+MINHASH_BATCH = 64 # 批量计算签名时每批的题目数，限制中间矩阵的大小
+PAIR_BLOCK = 1 << 16 # 列出重复题目对时每批比较的候选对数
+
+def _permutation_parameter(name, index):
+    # 由固定字符串导出，保证不同机器、不同 numpy 版本算出的签名一致
+    return int.from_bytes(hashlib.blake2b(f"{name}{index}".encode('ascii'), digest_size=8).digest(), 'little')
+
+# 乘法移位哈希族 h(x) = (a * x + b) mod 2^64 >> 32，a 取奇数；uint64 运算的溢出回绕正好就是 mod 2^64
+_A = np.array([_permutation_parameter("a", i) | 1 for i in range(NUM_PERMUTATIONS)], dtype=np.uint64)[:, None]
+_B = np.array([_permutation_parameter("b", i) for i in range(NUM_PERMUTATIONS)], dtype=np.uint64)[:, None]
+
+
+def normalize_text(problem):
+    """参与查重的文字：标题和描述，小写、去掉标点、合并空白"""
+    text = " ".join(problem.get(field) or "" for field in ("title", "description")).lower()
+    return NON_WORD.sub(" ", text).strip()
+
+def shingle_hashes(text):
+    """
+    文字中所有长度为 SHINGLE_SIZE 的字符切片的 64 位哈希，用滚动多项式一次性向量化计算。
+    重复的切片不影响取最小值，所以不需要去重。
+    """
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    width = min(SHINGLE_SIZE, len(codes)) # 比切片还短的文字整体作为一个切片
+    count = len(codes) - width + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(width):
+        hashes = hashes * SHINGLE_BASE + codes[offset:offset + count]
+    return hashes
+
+def minhash_many(problems):
+    """批量计算签名（没有任何文字的题目为None）：把一批题目的切片哈希拼在一起，一次矩阵运算后按题分段取最小值"""
+    signatures = [None] * len(problems)
+    pending = [(n, shingle_hashes(text)) for n, text in enumerate(map(normalize_text, problems)) if text]
+    for start in range(0, len(pending), MINHASH_BATCH):
+        batch = pending[start:start + MINHASH_BATCH]
+        offsets = np.cumsum([0] + [len(hashes) for _, hashes in batch[:-1]])
+        permuted = np.multiply(_A, np.concatenate([hashes for _, hashes in batch])); permuted += _B
+        # 右移是单调的，先取最小值再移位，少一遍对整个矩阵的运算
+        minimums = (np.minimum.reduceat(permuted, offsets, axis=1) >> np.uint64(32)).astype(np.uint32).T.copy()
+        for row, (n, _) in enumerate(batch):
+            signatures[n] = minimums[row]
+    return signatures
+
+def minhash(problem):
+    """一道题的 MinHash 签名（uint32 数组），没有任何文字时返回None"""
+    return minhash_many([problem])[0]
+
+def similarity(signature_a, signature_b):
+    """两个签名相同位置取值相等的比例，即 Jaccard 相似度的估计"""
+    return float(np.count_nonzero(signature_a == signature_b)) / NUM_PERMUTATIONS
+
+
+def encode_signatures(signatures):
+    """把 {题目id: (内容哈希, 签名)} 序列化成 .npz 字节串"""
+    ids = list(signatures)
+    buffer = io.BytesIO()
+    np.savez(buffer,
+             params=np.array([SIGNATURE_VERSION, NUM_PERMUTATIONS, SHINGLE_SIZE], dtype=np.int64),
+             ids=np.array(ids, dtype=np.int64),
+             hashes=np.array([signatures[i][0] for i in ids], dtype='U32'),
+             signatures=np.array([signatures[i][1] for i in ids], dtype=np.uint32).reshape(len(ids), NUM_PERMUTATIONS))
+    return buffer.getvalue()
+
+def decode_signatures(file):
+    """读取 encode_signatures 写出的文件，参数不一致时返回空字典"""
+    with np.load(file) as data:
+        if data['params'].tolist() != [SIGNATURE_VERSION, NUM_PERMUTATIONS, SHINGLE_SIZE]:
+            return {}
+        return {int(i): (str(h), s) for i, h, s in zip(data['ids'], data['hashes'], data['signatures'])}
+
+
+def _pairs(rows):
+    """一个桶里的所有两两组合 (前一道题, 后一道题)，按行分成每批最多约 PAIR_BLOCK 对"""
+    count = len(rows)
+    start = 0
+    while start < count - 1:
+        # 从 start 开始的每一行分别和它后面的所有行组合，凑够 PAIR_BLOCK 对为一批
+        widths = count - 1 - np.arange(start, count - 1)
+        end = start + max(1, int(np.searchsorted(np.cumsum(widths), PAIR_BLOCK, side='right')))
+        widths = widths[:end - start]
+        firsts = np.repeat(np.arange(start, end), widths)
+        seconds = np.arange(len(firsts)) - np.repeat(np.cumsum(widths) - widths, widths) + firsts + 1
+        yield rows[firsts], rows[seconds]
+        start = end
+
+
+def _band_keys(signature):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+def _build(problems, cached):
+    """
+    整体计算所有题目的签名和 LSH 桶，按内容哈希复用 cached 中的签名（可以在后台线程执行：题目的内容字段只会被整体替换）。
+    返回 (签名字典, 桶, 签名是否有变化)。
+    """
+    keys = [content_hash(p) for p in problems]
+    stale = [n for n, p in enumerate(problems) if cached.get(p['id'], (None,))[0] != keys[n]]
+    computed = dict(zip(stale, minhash_many([problems[n] for n in stale])))
+    signatures, buckets = {}, {}
+    for n, problem in enumerate(problems):
+        entry = signatures[problem['id']] = (keys[n], computed[n]) if n in computed else cached[problem['id']]
+        if entry[1] is not None:
+            for key in _band_keys(entry[1]):
+                buckets.setdefault(key, set()).add(problem['id'])
+    return signatures, buckets, bool(stale) or len(cached) != len(signatures)
+
+
+class DuplicateDetector:
+    """
+    用 MinHash + LSH 查找可能重复（换了说法）的题目。
+    每道题的签名分成 BANDS 段，任意一段完全相同的题目进入同一个桶；查询时只和同桶的题目比较签名，
+    不需要两两比较整个题库。签名按内容哈希缓存，题目被修改时只重新计算这一道题。
+    整体重建（创建时、仓库整体重新加载后）有 executor 时在后台进行：查询默认等它完成，
+    wait=False 的查询在建好之前直接返回空结果；建立期间变化的题目在建好后逐一补上。
+    注册为 ProblemRepository 的监听器；签名有变化时调用 on_changed(检测器)，由调用方负责保存。
+    """
+
+    def __init__(self, repository, signatures=None, on_changed=None, executor=None):
+        self.repository = repository
+        self.on_changed = on_changed
+        self.executor = executor
+        self._signatures = dict(signatures or {}) # 题目id -> (内容哈希, 签名)，重建时按内容哈希复用
+        self._buckets = {} # (段号, 段内容) -> {题目id}
+        self._stale = True
+        self._building = None # 后台正在进行的整体重建（Future）
+        self._pending = set() # 重建开始以后内容变化过的题目
+        self.rebuild()
+        repository.add_listener(self._on_repository_changed)
+
+    def rebuild(self):
+        self._pending = set()
+        if self.executor is None:
+            self._install(_build(self.repository.all(), self._signatures))
+        else:
+            self._building = self.executor.submit(_build, self.repository.all(), self._signatures)
+
+    def _install(self, result):
+        self._signatures, self._buckets, changed = result
+        self._stale = False
+        pending, self._pending = self._pending, set()
+        for problem_id in pending:
+            problem = self.repository.get(problem_id)
+            if problem is None:
+                self._remove(problem_id)
+            else:
+                changed = self._refresh_problem(problem) or changed
+        if changed and self.on_changed:
+            self.on_changed(self)
+
+    def _refresh_problem(self, problem):
+        """内容变化时重新计算一道题的签名，返回签名是否有变化"""
+        key = content_hash(problem)
+        entry = self._signatures.get(problem['id'])
+        if entry is not None and entry[0] == key:
+            return False # 只改了收藏状态等，签名不变
+        self._remove(problem['id'])
+        self._add(problem['id'], (key, minhash(problem)))
+        return True
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._stale = True; self._building = None # 整体重新加载时推迟到下一次查询再重建（签名按内容哈希复用）
+        elif event == 'stats' or (self._stale and self._building is None):
+            return
+        elif self._building is not None:
+            self._pending.add(problem['id'])
+        elif event in ('added', 'updated'):
+            if self._refresh_problem(problem) and self.on_changed:
+                self.on_changed(self)
+        elif event == 'removed':
+            self._remove(problem['id'])
+            if self.on_changed: self.on_changed(self)
+
+    # --- 桶维护 ---
+    def _add(self, problem_id, entry):
+        self._signatures[problem_id] = entry
+        if entry[1] is not None:
+            for key in _band_keys(entry[1]):
+                self._buckets.setdefault(key, set()).add(problem_id)
+
+    def _remove(self, problem_id):
+        entry = self._signatures.pop(problem_id, None)
+        if entry is None or entry[1] is None:
+            return
+        for key in _band_keys(entry[1]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(problem_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _ensure_fresh(self, wait=True):
+        """需要时重建；后台重建还没完成时 wait 为 False 则返回 False，否则等它完成"""
+        if self._stale and self._building is None:
+            self.rebuild()
+        if self._building is not None:
+            if not wait and not self._building.done():
+                return False
+            building, self._building = self._building, None
+            self._install(building.result())
+        return True
+
+    @property
+    def ready(self):
+        """索引是否已经建好（查询不需要等待）"""
+        return not self._stale or (self._building is not None and self._building.done())
+
+    def include(self, problem):
+        """
+        在一道题加入仓库之前先把它放进桶里，导入时同一批里后面的题也会和它比较。
+        之后加入仓库时内容哈希相同，不会重新计算。
+        """
+        self._ensure_fresh()
+        if self._refresh_problem(problem) and self.on_changed:
+            self.on_changed(self)
+
+    # --- 查询 ---
+    def signatures(self):
+        self._ensure_fresh()
+        return self._signatures
+
+    def snapshot(self):
+        """签名字典的浅拷贝，用于保存（可以在后台线程调用，不会触发重建）"""
+        return dict(self._signatures)
+
+    def _signature_of(self, problem):
+        entry = self._signatures.get(problem.get('id'))
+        if entry is not None and entry[0] == content_hash(problem):
+            return entry[1]
+        return minhash(problem)
+
+    def similar_to(self, problem, threshold=DUPLICATE_THRESHOLD, limit=None, wait=True):
+        """
+        返回与一道题（可以是还没保存的题目数据）可能重复的题目 [(题目id, 相似度)]，按相似度从高到低排列。
+        结果不包括这道题自己；wait 为 False 且索引还在后台建立时返回空列表。
+        """
+        if not self._ensure_fresh(wait):
+            return []
+        signature = self._signature_of(problem)
+        if signature is None:
+            return []
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        candidates.discard(problem.get('id'))
+        matches = [(i, similarity(signature, self._signatures[i][1])) for i in candidates]
+        matches = sorted((m for m in matches if m[1] >= threshold), key=lambda m: m[1], reverse=True)
+        return matches if limit is None else matches[:limit]
+
+    def duplicate_pairs(self, threshold=DUPLICATE_THRESHOLD):
+        """
+        整个题库中可能重复的题目对 [(题目id, 题目id, 相似度)]，只比较落在同一个桶里的题目。
+        候选对按桶逐批（每批最多约 PAIR_BLOCK 对）用矩阵比较签名，只留下达到阈值的，不会先把所有候选对收集起来；
+        同一对题目可能同时落在几个桶里，只由它们第一个相同的段负责，不需要再去重。
+        """
+        self._ensure_fresh()
+        ids = np.array([i for i, (_, signature) in self._signatures.items() if signature is not None], dtype=np.int64)
+        if len(ids) < 2:
+            return []
+        signatures = np.array([self._signatures[i][1] for i in ids.tolist()])
+        # 每道题每一段的桶编号：段内容相同的题编号相同，和 _buckets 的分桶一致
+        labels = np.column_stack([np.unique(signatures[:, band * ROWS:(band + 1) * ROWS], axis=0, return_inverse=True)[1].ravel()
+                                  for band in range(BANDS)]).astype(np.int32)
+        found, batch = [], []
+        def compare(band):
+            firsts, seconds = (np.concatenate(parts) for parts in zip(*batch))
+            batch.clear()
+            # 前面的段里已经有相同的，这一对由那一段负责
+            owned = ~(labels[firsts, :band] == labels[seconds, :band]).any(axis=1)
+            firsts, seconds = firsts[owned], seconds[owned]
+            scores = np.count_nonzero(signatures[firsts] == signatures[seconds], axis=1) / NUM_PERMUTATIONS
+            keep = scores >= threshold
+            found.append((firsts[keep], seconds[keep], scores[keep]))
+        pending = 0
+        for band in range(BANDS):
+            order = np.argsort(labels[:, band], kind='stable')
+            starts = np.flatnonzero(np.diff(labels[order, band], prepend=-1))
+            ends = np.append(starts[1:], len(order))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if end - start < 2:
+                    continue
+                for firsts, seconds in _pairs(order[start:end]):
+                    batch.append((firsts, seconds)); pending += len(firsts)
+                    if pending >= PAIR_BLOCK:
+                        compare(band); pending = 0
+            if batch:
+                compare(band); pending = 0
+        if not found:
+            return []
+        firsts, seconds, scores = (np.concatenate(parts) for parts in zip(*found))
+        firsts, seconds = np.minimum(ids[firsts], ids[seconds]), np.maximum(ids[firsts], ids[seconds])
+        order = np.lexsort((seconds, firsts, -scores))
+        return list(zip(firsts[order].tolist(), seconds[order].tolist(), scores[order].tolist()))
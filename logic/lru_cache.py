@@ -0,0 +1,53 @@
+# logic/lru_cache.py
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    容量有限的最近最少使用缓存；可选按条目大小（如字节数）计算容量。
+    on_evict(键, 值) 在条目被挤出、被同一个键的新值替换或被清空时调用，用于释放条目持有的资源（如注销监听）。
+    """
+
+    def __init__(self, capacity, sizeof=None, on_evict=None):
+        self.capacity = capacity
+        self.sizeof = sizeof # None 时每个条目算作 1
+        self.on_evict = on_evict
+        self._items = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        value = self._items.get(key, default)
+        if key in self._items:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self._items:
+            old = self._items.pop(key)
+            self._size -= self._cost(old)
+            if self.on_evict is not None and old is not value:
+                self.on_evict(key, old)
+        self._items[key] = value
+        self._size += self._cost(value)
+        while self._size > self.capacity and len(self._items) > 1:
+            evicted_key, evicted = self._items.popitem(last=False)
+            self._size -= self._cost(evicted)
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted)
+
+    def clear(self):
+        items = list(self._items.items()) if self.on_evict is not None else ()
+        self._items.clear()
+        self._size = 0
+        for key, value in items:
+            self.on_evict(key, value)
+
+    def _cost(self, value):
+        return 1 if self.sizeof is None else self.sizeof(value)
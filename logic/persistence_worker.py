@@ -0,0 +1,107 @@
+# logic/persistence_worker.py
+
+import os
+import sys
+import tempfile
+import threading
+import traceback
+
+
+def atomic_write(path, data):
+    """先写临时文件再改名覆盖目标文件，程序中途退出也不会留下写了一半的文件"""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class PersistenceWorker:
+    """
+    后台写盘线程（write-behind）。
+    界面线程只把写操作放进队列就返回；同一个文件还没执行的覆盖式写入会被合并成最后一次，
+    连续的追加写会合并成一次写入。所有操作按提交顺序执行。
+    """
+
+    def __init__(self, on_written=None):
+        self._cond = threading.Condition()
+        self._pending = []  # [key, 写函数, 追加的文本列表]，写函数和文本列表二选一
+        self._active_key = None
+        self._busy = False
+        self._thread = None
+        self.on_written = on_written  # 每完成一个写操作后以 key 调用（在后台线程中）
+        self.last_error = None
+
+    def submit(self, key, write_fn, supersedes=(), merge=True):
+        """
+        提交一个整体覆盖式的写操作。
+        队列中 key 相同、或 key 属于 supersedes 的未执行操作都已被这次写入包含，直接丢弃。
+        key 为 None 的操作不参与合并；merge 为 False 的增量写也不丢弃任何操作，key 只用于 has_pending 查询。
+        """
+        with self._cond:
+            if key is not None and merge:
+                dropped = {key, *supersedes}
+                self._pending = [op for op in self._pending if op[0] is None or op[0] not in dropped]
+            self._pending.append([key, write_fn, None])
+            self._start()
+
+    def append(self, path, text):
+        """提交一次追加写；紧挨着的对同一文件的追加会合并成一次写入"""
+        with self._cond:
+            if self._pending and self._pending[-1][0] == path and self._pending[-1][2] is not None:
+                self._pending[-1][2].append(text)
+            else:
+                self._pending.append([path, None, [text]])
+            self._start()
+
+    def has_pending(self, *keys):
+        """这些 key 是否还有排队中或正在执行的写操作"""
+        with self._cond:
+            if self._active_key is not None and self._active_key in keys:
+                return True
+            return any(op[0] in keys for op in self._pending if op[0] is not None)
+
+    def idle(self):
+        """队列为空、也没有正在执行的写操作（不阻塞）"""
+        with self._cond:
+            return not self._pending and not self._busy
+
+    def flush(self, timeout=None):
+        """阻塞直到队列中的写操作全部完成（程序退出或需要读取磁盘上的最新数据时调用）"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="PersistenceWorker", daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                key, write_fn, texts = self._pending.pop(0)
+                self._active_key = key; self._busy = True
+            try:
+                if write_fn is not None:
+                    write_fn()
+                else:
+                    with open(key, 'a', encoding='utf-8') as f:
+                        f.write(''.join(texts))
+                if self.on_written is not None and key is not None:
+                    self.on_written(key)
+            except Exception as e:
+                self.last_error = e
+                traceback.print_exc(file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._active_key = None; self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,296 @@
+# logic/problem_filter.py
+
+import operator
+import random
+import re
+from functools import reduce
+
+# 练习统计条件可以使用的字段：(尝试次数, 答对次数) -> 值；没做过的题没有正确率，不满足任何正确率条件
+CONDITION_FIELDS = {
+    'attempts': lambda attempts, correct: attempts,
+    'correct': lambda attempts, correct: correct,
+    'errors': lambda attempts, correct: attempts - correct,
+    'accuracy': lambda attempts, correct: correct / attempts if attempts > 0 else None,
+}
+OPERATORS = {'<=': operator.le, '>=': operator.ge, '<': operator.lt, '>': operator.gt, '=': operator.eq}
+CONDITION_PATTERN = re.compile(r'^(attempts|correct|errors|accuracy)\s*(<=|>=|<|>|=)\s*(\d+(?:\.\d+)?)(%?)$', re.IGNORECASE)
+TERM_SEPARATOR = re.compile(r'\s+AND\s+', re.IGNORECASE) # 与练习分类的 " AND " 组合写法相同
+KEYWORDS = {
+    'all': {},
+    'saved': {'saved': True},
+    'unsaved': {'saved': False},
+    'finished': {'finished': True},
+    'unfinished': {'finished': False},
+    'programming': {'programming': True},
+}
+
+_CONFLICT = object()
+
+def _both(a, b):
+    """两个取值条件同时满足：一方不限（None）时取另一方；互相矛盾时返回 _CONFLICT"""
+    if a is None or a == b:
+        return b
+    return a if b is None else _CONFLICT
+
+
+class ProblemFilter:
+    """
+    多个维度组合成的题目筛选条件，维度之间都是“并且”的关系：
+    tags 中的标签必须全部带有；names 中每一项是标签或公司名（和练习分类的写法一样）；
+    sources 不为 None 时公司必须是其中之一；saved / finished / programming 为 None 时不限；
+    conditions 是练习统计的比较条件 (字段, 比较符, 数值)，如 ('accuracy', '<', 0.5)。
+    两个条件可以用 & 组合成同时满足二者的条件。
+    """
+
+    def __init__(self, tags=(), names=(), sources=None, saved=None, finished=None, programming=None, conditions=()):
+        self.tags = frozenset(tags)
+        self.names = frozenset(names)
+        self.sources = None if sources is None else frozenset(sources)
+        self.saved, self.finished, self.programming = saved, finished, programming
+        self.conditions = tuple(conditions)
+        for field, op, _ in self.conditions:
+            if field not in CONDITION_FIELDS or op not in OPERATORS:
+                raise ValueError(f"无法识别的条件: {field} {op}")
+        self.empty = _CONFLICT in (saved, finished, programming) # 互相矛盾的条件，不匹配任何题目
+
+    @classmethod
+    def parse(cls, text):
+        """
+        解析练习分类的写法，用 AND 连接多个条件，例如 "Probability AND Citadel AND unfinished AND accuracy<50%"。
+        关键字见 KEYWORDS；统计条件支持 attempts / correct / errors / accuracy，正确率可以写成小数或百分数；
+        其余的词按标签或公司名处理。
+        """
+        result = cls()
+        for term in TERM_SEPARATOR.split(text.strip()):
+            term = term.strip()
+            if not term:
+                continue
+            match = CONDITION_PATTERN.match(term)
+            if term.lower() in KEYWORDS:
+                result &= cls(**KEYWORDS[term.lower()])
+            elif match:
+                field, op, number, percent = match.groups()
+                value = float(number) / 100 if percent else float(number)
+                result &= cls(conditions=[(field.lower(), op, value)])
+            else:
+                result &= cls(names=[term])
+        return result
+
+    def __and__(self, other):
+        sources = self.sources if other.sources is None else other.sources if self.sources is None else self.sources & other.sources
+        return ProblemFilter(self.tags | other.tags, self.names | other.names, sources,
+                             _both(self.saved, other.saved), _both(self.finished, other.finished),
+                             _both(self.programming, other.programming), self.conditions + other.conditions)
+
+    def _key(self):
+        return (self.tags, self.names, self.sources, self.saved, self.finished, self.programming, self.conditions)
+
+    def __eq__(self, other):
+        return isinstance(other, ProblemFilter) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def stats_match(self, attempts, correct):
+        """只看练习统计的部分（finished 和 conditions）"""
+        if self.finished is not None and (correct > 0) != self.finished:
+            return False
+        for field, op, value in self.conditions:
+            actual = CONDITION_FIELDS[field](attempts, correct)
+            if actual is None or not OPERATORS[op](actual, value):
+                return False
+        return True
+
+    def matches(self, problem):
+        """逐题判断，与 FacetIndex 的位图运算结果一致；用于判断新增或修改的单道题"""
+        if self.empty:
+            return False
+        tags = problem.get('tags', [])
+        source = problem.get('source', '').strip()
+        if not self.tags.issubset(tags) or not all(name in tags or name == source for name in self.names):
+            return False
+        if self.sources is not None and source not in self.sources:
+            return False
+        if self.saved is not None and problem.get('is_saved', False) != self.saved:
+            return False
+        if self.programming is not None and bool(problem.get('is_programming', False)) != self.programming:
+            return False
+        return self.stats_match(problem.get('attempts', 0), problem.get('correct', 0))
+
+
+# 一个字节中为 1 的位，用于把位图转换成题目列表
+BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+SELECT_BLOCK = 256 # 随机抽取时先按这么多字节一块统计 1 的个数，再在命中的块里逐字节查找
+
+SAVED = ('saved',)
+PROGRAMMING = ('programming',)
+
+def _facet_keys(problem):
+    """一道题所在的（统计以外的）维度取值"""
+    keys = [('tag', tag) for tag in problem.get('tags', [])]
+    source = problem.get('source', '').strip()
+    if source:
+        keys.append(('source', source))
+    if problem.get('is_saved', False):
+        keys.append(SAVED)
+    if problem.get('is_programming', False):
+        keys.append(PROGRAMMING)
+    return frozenset(keys)
+
+def _stats_key(problem):
+    return (problem.get('attempts', 0), problem.get('correct', 0))
+
+def _build_bitmap(slots, size):
+    buffer = bytearray((size + 7) // 8)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetIndex:
+    """
+    组合筛选用的位图索引：每个维度取值对应一个位图（Python 的大整数，第 i 位表示题库顺序为 i 的题目），
+    包括标签、公司、收藏、编程题，以及按 (尝试次数, 答对次数) 分组的练习统计。
+    组合筛选只是几次整数的与/或运算；正确率、尝试次数等范围条件先在为数不多的统计分组上判断，再把满足的分组并起来。
+    只有一个维度取值的条件（全部、一个标签、一个公司、收藏）随机抽题时直接用仓库的 IdPool，O(1)，与题库大小无关。
+    注册为 ProblemRepository 的监听器，一道题变化时只改动它所在的几个位图；仓库整体重新加载后在下一次查询时重建。
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._generation = None # 建立索引时仓库的 generation，不同时说明仓库已经整体重新加载
+        repository.add_listener(self._on_repository_changed)
+
+    def _rebuild(self):
+        repository = self.repository
+        slots_by_key, slots_by_stats = {}, {}
+        self._ids, self._slot_of, self._keys_of, self._stats_of = [], {}, {}, {}
+        for problem in repository:
+            slot = self._place(problem)
+            keys, stats = _facet_keys(problem), _stats_key(problem)
+            self._keys_of[problem['id']], self._stats_of[problem['id']] = keys, stats
+            for key in keys:
+                slots_by_key.setdefault(key, []).append(slot)
+            slots_by_stats.setdefault(stats, []).append(slot)
+        size = len(self._ids)
+        self._all = _build_bitmap(self._slot_of.values(), size)
+        self._bitmaps = {key: _build_bitmap(slots, size) for key, slots in slots_by_key.items()}
+        self._stats = {key: _build_bitmap(slots, size) for key, slots in slots_by_stats.items()}
+        self._generation = repository.generation
+
+    def _place(self, problem):
+        """题目在位图中的位置就是它在题库中的顺序（删除的题留下空位，重建时才收紧）"""
+        slot = self.repository.position(problem)
+        if slot >= len(self._ids):
+            self._ids.extend([None] * (slot + 1 - len(self._ids)))
+        self._ids[slot] = problem['id']; self._slot_of[problem['id']] = slot
+        return slot
+
+    def _ensure_current(self):
+        if self._generation != self.repository.generation:
+            self._rebuild()
+
+    # --- 增量维护 ---
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset' or self._generation != self.repository.generation:
+            return # 下一次查询时重建
+        if event == 'removed':
+            self._discard(problem['id'])
+        elif event in ('added', 'updated', 'stats'):
+            self._discard(problem['id'])
+            bit = 1 << self._place(problem)
+            keys, stats = _facet_keys(problem), _stats_key(problem)
+            self._keys_of[problem['id']], self._stats_of[problem['id']] = keys, stats
+            self._all |= bit
+            for key in keys:
+                self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+            self._stats[stats] = self._stats.get(stats, 0) | bit
+
+    def _discard(self, problem_id):
+        slot = self._slot_of.pop(problem_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = None
+        mask = ~(1 << slot)
+        self._all &= mask
+        for key in self._keys_of.pop(problem_id):
+            self._bitmaps[key] &= mask
+            if not self._bitmaps[key]: del self._bitmaps[key]
+        stats = self._stats_of.pop(problem_id)
+        self._stats[stats] &= mask
+        if not self._stats[stats]: del self._stats[stats]
+
+    # --- 查询 ---
+    def bitmap(self, problem_filter):
+        """满足条件的题目组成的位图"""
+        self._ensure_current()
+        if problem_filter.empty:
+            return 0
+        bitmaps = self._bitmaps
+        result = self._all
+        for tag in problem_filter.tags:
+            result &= bitmaps.get(('tag', tag), 0)
+        for name in problem_filter.names:
+            result &= bitmaps.get(('tag', name), 0) | bitmaps.get(('source', name), 0)
+        if problem_filter.sources is not None:
+            result &= reduce(operator.or_, (bitmaps.get(('source', source), 0) for source in problem_filter.sources), 0)
+        for key, wanted in ((SAVED, problem_filter.saved), (PROGRAMMING, problem_filter.programming)):
+            if wanted is not None:
+                result = result & bitmaps.get(key, 0) if wanted else result & ~bitmaps.get(key, 0)
+        if problem_filter.finished is not None or problem_filter.conditions:
+            result &= reduce(operator.or_, (bitmap for (attempts, correct), bitmap in self._stats.items()
+                                            if problem_filter.stats_match(attempts, correct)), 0)
+        return result
+
+    def count(self, problem_filter):
+        return self.bitmap(problem_filter).bit_count()
+
+    def ids(self, problem_filter):
+        """满足条件的题目id，按题库原顺序排列"""
+        bitmap = self.bitmap(problem_filter)
+        data, ids = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'), self._ids
+        return [ids[offset * 8 + bit] for offset, byte in enumerate(data) if byte for bit in BYTE_BITS[byte]]
+
+    def _single_pool(self, problem_filter):
+        """条件只涉及一个维度取值时返回仓库中对应的 IdPool，否则返回None"""
+        f, repository = problem_filter, self.repository
+        if (f.empty or f.conditions or f.finished is not None or f.programming is not None or f.saved is False
+                or f.sources == frozenset()):
+            return None
+        terms = len(f.tags) + len(f.names) + (1 if f.saved else 0) + (len(f.sources) if f.sources is not None else 0)
+        if terms == 0:
+            return repository.all_ids()
+        if terms != 1:
+            return None
+        if f.saved:
+            return repository.saved_ids()
+        if f.sources:
+            return repository.ids_from_source(next(iter(f.sources)))
+        if f.tags:
+            return repository.ids_with_tag(next(iter(f.tags)))
+        name = next(iter(f.names)) # 标签或公司名：只有其中一种存在时才是单个集合
+        tagged, from_source = repository.ids_with_tag(name), repository.ids_from_source(name)
+        return from_source if not tagged else tagged if not from_source else None
+
+    def random_id(self, problem_filter, rng=random):
+        """在满足条件的题目中均匀随机抽一道，没有时返回None"""
+        pool = self._single_pool(problem_filter)
+        if pool is not None:
+            return pool.choice(rng) if pool else None
+        bitmap = self.bitmap(problem_filter)
+        count = bitmap.bit_count()
+        if not count:
+            return None
+        rank = rng.randrange(count)
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        for start in range(0, len(data), SELECT_BLOCK):
+            block = data[start:start + SELECT_BLOCK]
+            block_count = int.from_bytes(block, 'little').bit_count()
+            if rank >= block_count:
+                rank -= block_count
+                continue
+            for offset, byte in enumerate(block, start):
+                bits = BYTE_BITS[byte]
+                if rank < len(bits):
+                    return self._ids[offset * 8 + bits[rank]]
+                rank -= len(bits)
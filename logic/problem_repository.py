@@ -0,0 +1,288 @@
+# logic/problem_repository.py
+
+import hashlib
+import json
+import random
+from collections import defaultdict
+from collections.abc import Set
+
+# 题目的内容字段（不含练习统计和收藏状态），内容哈希只由它们决定
+CONTENT_FIELDS = ("title", "source", "tags", "description", "is_programming",
+                  "python_solution", "cpp_solution", "answer", "notes")
+
+
+def content_hash(problem):
+    """题目内容的哈希，用作渲染结果、相似度等派生数据的缓存键；练习统计的变化不影响它"""
+    content = [problem.get(field) for field in CONTENT_FIELDS]
+    return hashlib.blake2b(json.dumps(content, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def indexable(problem):
+    """能放进仓库、建立索引的记录：JSON 对象，整数 id，source 是文本，tags 是文本列表"""
+    if not isinstance(problem, dict):
+        return False
+    problem_id, tags = problem.get('id'), problem.get('tags', [])
+    return (isinstance(problem_id, int) and not isinstance(problem_id, bool) and isinstance(problem.get('source', ''), str)
+            and isinstance(tags, list) and all(isinstance(tag, str) for tag in tags))
+
+
+class IdPool(Set):
+    """
+    支持 O(1) 添加、删除和随机抽取的 id 集合（数组 + 位置表）。
+    删除时把最后一个元素换到被删位置，数组始终保持紧凑，随机抽取只需要一次下标访问。
+    """
+
+    def __init__(self, ids=()):
+        self._ids = []
+        self._positions = {}
+        for problem_id in ids:
+            self.add(problem_id)
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        return set(iterable) # 集合运算（& | -）的结果用普通 set 表示
+
+    def __contains__(self, problem_id):
+        return problem_id in self._positions
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, problem_id):
+        if problem_id not in self._positions:
+            self._positions[problem_id] = len(self._ids)
+            self._ids.append(problem_id)
+
+    def discard(self, problem_id):
+        index = self._positions.pop(problem_id, None)
+        if index is None:
+            return
+        last = self._ids.pop()
+        if index < len(self._ids):
+            self._ids[index] = last
+            self._positions[last] = index
+
+    def choice(self, rng=random):
+        return self._ids[rng.randrange(len(self._ids))]
+
+
+class ProblemRepository:
+    """
+    常驻内存的题库仓库。
+    以 id 为键建立哈希索引，并维护 tags / source / is_saved 三个二级索引，
+    所有页面共享同一个实例，按 id 查找和按分类筛选都不再需要扫描整个题库。
+    二级索引都是 IdPool，练习时可以直接在分类里随机抽题。
+    """
+
+    SAVED_CATEGORY = "saved"
+    ALL_CATEGORY = "all"
+    CATEGORY_SEPARATOR = " AND " # 组合分类，如 "Probability AND Citadel"
+    MAX_REJECTION_SAMPLES = 32 # 组合分类先在最小的集合里抽样碰运气，多次不中再求交集
+
+    def __init__(self, problems=None):
+        self._listeners = []
+        self.generation = 0 # 每次整体重新加载加一，派生索引据此判断自己是否已经过期
+        self.load(problems or [])
+
+    # --- 变更通知：派生索引（搜索等）注册监听，随仓库增量更新 ---
+    def add_listener(self, listener):
+        """
+        listener(event, problem)，event 为 'added' / 'updated' / 'removed' / 'reset'（reset 时 problem 为 None），
+        或 'stats'：只有练习统计（attempts / correct）被原地修改。
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, problem=None):
+        for listener in list(self._listeners):
+            listener(event, problem)
+
+    def load(self, problems):
+        """
+        用一组题目整体重建仓库和所有索引。
+        无法建立索引的记录（见 indexable）不进入仓库，原样保留在 skipped 中：由题库校验报告，保存时照常写回。
+        """
+        self._by_id = {}  # dict 保持插入顺序，等价于原来列表的顺序
+        self._order = {}  # id -> 在题库中的先后序号，用于把筛选结果恢复成原顺序
+        self._next_order = 0
+        self._all = IdPool()
+        self._by_tag = defaultdict(IdPool)
+        self._by_source = defaultdict(IdPool)
+        self._saved = IdPool()
+        self.skipped = []
+        for p in problems:
+            if not indexable(p):
+                self.skipped.append(p)
+                continue
+            self._by_id[p['id']] = p
+            self._order[p['id']] = self._next_order; self._next_order += 1
+            self._index(p)
+        self.generation += 1
+        self._notify('reset')
+
+    # --- 索引维护 ---
+    def _index(self, problem):
+        problem_id = problem['id']
+        self._all.add(problem_id)
+        for tag in problem.get('tags', []):
+            self._by_tag[tag].add(problem_id)
+        source = problem.get('source', '').strip()
+        if source:
+            self._by_source[source].add(problem_id)
+        if problem.get('is_saved', False):
+            self._saved.add(problem_id)
+
+    def _unindex(self, problem):
+        problem_id = problem['id']
+        self._all.discard(problem_id)
+        for tag in problem.get('tags', []):
+            ids = self._by_tag.get(tag)
+            if ids is not None:
+                ids.discard(problem_id)
+                if not ids: del self._by_tag[tag]
+        source = problem.get('source', '').strip()
+        ids = self._by_source.get(source)
+        if ids is not None:
+            ids.discard(problem_id)
+            if not ids: del self._by_source[source]
+        self._saved.discard(problem_id)
+
+    # --- 查询 ---
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, problem_id):
+        return problem_id in self._by_id
+
+    def get(self, problem_id):
+        """按 id 取题目，O(1)"""
+        return self._by_id.get(problem_id)
+
+    def all(self):
+        """按原始顺序返回所有题目组成的新列表"""
+        return list(self._by_id.values())
+
+    def position(self, problem):
+        """题目在题库中的先后序号，可直接用作 sort 的 key"""
+        return self._order[problem['id']]
+
+    def all_ids(self):
+        return self._all
+
+    def ids_with_tag(self, tag):
+        return self._by_tag.get(tag, IdPool())
+
+    def ids_from_source(self, source):
+        return self._by_source.get(source, IdPool())
+
+    def saved_ids(self):
+        return self._saved
+
+    def tags(self):
+        return sorted(self._by_tag)
+
+    def sources(self):
+        return sorted(self._by_source)
+
+    def next_id(self):
+        return max(self._by_id, default=0) + 1
+
+    # --- 练习分类 ---
+    def category_pools(self, category):
+        """
+        把练习分类解析成若干个需要同时满足的 id 集合。
+        分类可以是 "all"、"saved"、标签名或公司名，也可以用 " AND " 组合多个条件。
+        """
+        pools = []
+        for term in category.split(self.CATEGORY_SEPARATOR):
+            term = term.strip()
+            if term == self.ALL_CATEGORY:
+                pools.append(self._all)
+            elif term == self.SAVED_CATEGORY:
+                pools.append(self._saved)
+            elif term in self._by_tag:
+                pools.append(self._by_tag[term])
+            else:
+                pools.append(self._by_source.get(term, IdPool()))
+        return pools
+
+    def category_ids(self, category):
+        """分类下所有题目的 id 集合（多个条件时按从小到大的顺序求交集）"""
+        pools = sorted(self.category_pools(category), key=len)
+        if len(pools) == 1:
+            return pools[0]
+        return set(pools[0]).intersection(*pools[1:])
+
+    def random_id(self, category, rng=random):
+        """从分类中随机抽一道题的 id，分类为空时返回 None"""
+        pools = sorted(self.category_pools(category), key=len)
+        if not pools[0]:
+            return None
+        if len(pools) == 1:
+            return pools[0].choice(rng)
+        # 在最小的集合里抽样并检查是否属于其他集合，交集较大时期望几次就能抽中
+        for _ in range(self.MAX_REJECTION_SAMPLES):
+            problem_id = pools[0].choice(rng)
+            if all(problem_id in pool for pool in pools[1:]):
+                return problem_id
+        ids = list(set(pools[0]).intersection(*pools[1:]))
+        return rng.choice(ids) if ids else None
+
+    # --- 修改 ---
+    def add(self, problem):
+        """添加一道新题（调用方负责分配 id）"""
+        self._by_id[problem['id']] = problem
+        self._order[problem['id']] = self._next_order; self._next_order += 1
+        self._index(problem)
+        self._notify('added', problem)
+
+    def update(self, problem_id, data):
+        """用新数据整体替换一道题，保持其在题库中的位置"""
+        old = self._by_id.get(problem_id)
+        if old is None:
+            return None
+        self._unindex(old)
+        data['id'] = problem_id
+        self._by_id[problem_id] = data
+        self._index(data)
+        self._notify('updated', data)
+        return data
+
+    def remove(self, problem_id):
+        problem = self._by_id.pop(problem_id, None)
+        if problem is not None:
+            del self._order[problem_id]
+            self._unindex(problem)
+            self._notify('removed', problem)
+        return problem
+
+    def stats_changed(self, problem_id):
+        """题目的练习统计被原地修改后调用，通知关心统计的监听者"""
+        problem = self._by_id.get(problem_id)
+        if problem is not None:
+            self._notify('stats', problem)
+
+    def reindex(self, problem_id):
+        """题目的可索引字段（如 is_saved）被原地修改后，刷新它的索引"""
+        problem = self._by_id.get(problem_id)
+        if problem is None:
+            return
+        # 标签和公司可能已经改变，无法从旧值定位，直接从所有索引中清除这个 id
+        for tag in [t for t, ids in self._by_tag.items() if problem_id in ids]:
+            self._by_tag[tag].discard(problem_id)
+            if not self._by_tag[tag]: del self._by_tag[tag]
+        for source in [s for s, ids in self._by_source.items() if problem_id in ids]:
+            self._by_source[source].discard(problem_id)
+            if not self._by_source[source]: del self._by_source[source]
+        self._saved.discard(problem_id)
+        self._index(problem)
+        self._notify('updated', problem)
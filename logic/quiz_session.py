@@ -0,0 +1,117 @@
+# logic/quiz_session.py
+
+import random
+import time
+
+QUIZ_LENGTH = 10 # 默认每轮题数
+SECONDS_PER_QUESTION = 120 # 整轮的时间限制 = 题数 × 每题时间
+
+
+class QuizSession:
+    """
+    一轮限时测验：从练习分类中不重复地抽 N 道题，依次作答并记录每道题的结果和用时。
+    答题结果只保存在内存里，整轮结束后由调用方通过 data_manager.record_attempts 一次性提交。
+    跳过或超时没答的题在得分中算错，但不计入题目的练习统计。
+    """
+
+    def __init__(self, problem_ids, time_limit=None, clock=time.monotonic):
+        self.problem_ids = list(problem_ids)
+        self.time_limit = len(self.problem_ids) * SECONDS_PER_QUESTION if time_limit is None else time_limit
+        self.clock = clock
+        self.results = [] # 每道题一条 (题目id, 是否正确, 用时秒数)；没作答的题“是否正确”为 None
+        self.index = 0    # 当前题目的位置
+        self.finished = False
+        self._started_at = self._question_started_at = clock()
+        self._finished_at = None
+
+    @classmethod
+    def draw(cls, problem_ids, count=QUIZ_LENGTH, rng=random, **kwargs):
+        """从候选题目（如 data_manager.filter_problem_ids 的结果）中随机抽 count 道不同的题（不足时全部使用）组成一轮测验"""
+        ids = list(problem_ids)
+        return cls(rng.sample(ids, min(count, len(ids))), **kwargs)
+
+    def __len__(self):
+        return len(self.problem_ids)
+
+    # --- 进度 ---
+    @property
+    def current_id(self):
+        return None if self.finished else self.problem_ids[self.index]
+
+    @property
+    def answered(self):
+        """当前题目是否已经作答"""
+        return len(self.results) > self.index
+
+    @property
+    def is_last(self):
+        return self.index == len(self.problem_ids) - 1
+
+    def elapsed(self):
+        return (self._finished_at if self.finished else self.clock()) - self._started_at
+
+    def remaining_time(self):
+        return max(0.0, self.time_limit - self.elapsed())
+
+    def is_over_time(self):
+        return not self.finished and self.elapsed() >= self.time_limit
+
+    # --- 作答 ---
+    def answer(self, was_correct):
+        """记录当前题目的结果，重复作答时忽略"""
+        if self.finished or self.answered:
+            return
+        self.results.append((self.current_id, was_correct, self.clock() - self._question_started_at))
+
+    def advance(self):
+        """进入下一题（当前题没答就记为跳过），已经是最后一题时结束测验"""
+        if self.finished:
+            return
+        if not self.answered:
+            self.answer(None)
+        self.index += 1
+        self._question_started_at = self.clock()
+        if self.index >= len(self.problem_ids):
+            self.finish()
+
+    def finish(self):
+        """结束测验（包括超时或中途退出），没答到的题都记为跳过"""
+        if self.finished:
+            return
+        if self.index < len(self.problem_ids) and not self.answered:
+            self.answer(None)
+        for problem_id in self.problem_ids[len(self.results):]:
+            self.results.append((problem_id, None, 0.0))
+        self.index = len(self.problem_ids)
+        self._finished_at = self.clock()
+        self.finished = True
+
+    def attempts(self):
+        """需要提交到练习统计的结果 [(题目id, 是否正确)]，只包括真正作答过的题"""
+        return [(problem_id, was_correct) for problem_id, was_correct, _ in self.results if was_correct is not None]
+
+    # --- 汇总 ---
+    def summary(self, repository):
+        """
+        返回本轮的汇总：得分、作答数、总用时、平均每题用时、各标签的正确率，以及逐题的结果。
+        平均用时只按作答过的题计算。
+        """
+        answered = [r for r in self.results if r[1] is not None]
+        by_tag = {} # 标签 -> [答对数, 题数]
+        questions = []
+        for problem_id, was_correct, seconds in self.results:
+            problem = repository.get(problem_id) or {}
+            for tag in problem.get('tags', []):
+                counts = by_tag.setdefault(tag, [0, 0])
+                counts[0] += 1 if was_correct else 0
+                counts[1] += 1
+            questions.append({"id": problem_id, "title": problem.get('title', ''), "correct": was_correct, "seconds": seconds})
+        return {
+            "score": sum(1 for r in self.results if r[1]),
+            "total": len(self.problem_ids),
+            "answered": len(answered),
+            "elapsed": self.elapsed(),
+            "average_seconds": sum(r[2] for r in answered) / len(answered) if answered else 0.0,
+            "tags": {tag: (correct, total) for tag, (correct, total) in sorted(by_tag.items())},
+            "questions": questions,
+        }
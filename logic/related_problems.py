@@ -0,0 +1,337 @@
+# logic/related_problems.py
+
+import json
+import numpy as np
+from logic.problem_repository import content_hash
+from logic.search_index import tokenize
+
+RELATED_COUNT = 5        # 每道题保留的相关题目数
+TAG_WEIGHT = 3.0         # 一个标签相当于正文中出现几次
+MAX_DF_RATIO = 0.05      # 出现在超过 max(5% 的题目, MIN_MAX_DF 道题) 中的词视为常用词，不参与相似度计算
+MIN_MAX_DF = 1000
+MIN_SIMILARITY = 0.05    # 余弦相似度低于这个值的不算相关
+BLOCK_SIZE = 256         # 批量计算时每块最多的题目数
+BLOCK_ELEMENTS = 1 << 22 # 每块相似度矩阵最多的元素数（约 32MB），题库越大每块的题目越少
+FULL_REBUILD_RATIO = 0.25 # 变化的题目超过这个比例时整体重算
+RELATED_VERSION = 1      # 切词或权重的算法变化时递增，旧的缓存文件会被丢弃
+
+
+def _document_terms(problem):
+    """题目的词频：标题、描述切词，标签作为带权重的特殊词"""
+    terms = {}
+    for token in tokenize(f"{problem.get('title', '')}\n{problem.get('description', '')}"):
+        terms[token] = terms.get(token, 0.0) + 1.0
+    for tag in problem.get('tags', []):
+        key = "#" + tag.lower()
+        terms[key] = terms.get(key, 0.0) + TAG_WEIGHT
+    return terms
+
+def _ranges(starts, ends):
+    """把多个区间 [start, end) 展开成一个下标数组（向量化的 concatenate(arange(...))）"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return offsets + np.arange(total)
+
+def _splice(keys, columns, keep, new_keys, new_columns):
+    """按 keys 有序的若干平行数组：去掉 keep 为假的项，再把（已按键排序的）新项插入到对应位置"""
+    keys = keys[keep]
+    positions = np.searchsorted(keys, new_keys, side='right')
+    return np.insert(keys, positions, new_keys), [np.insert(column[keep], positions, new) for column, new in zip(columns, new_columns)]
+
+
+def encode_related(entries, k=RELATED_COUNT):
+    """把 {题目id: (内容哈希, ((相关题目id, 相似度), ...))} 序列化成 JSON 字节串"""
+    problems = {str(i): [key, [list(item) for item in items]] for i, (key, items) in entries.items()}
+    return json.dumps({"version": RELATED_VERSION, "k": k, "problems": problems}).encode('utf-8')
+
+def decode_related(data, k=RELATED_COUNT):
+    """读取 encode_related 写出的内容，版本或 k 不一致时返回空字典"""
+    raw = json.loads(data)
+    if raw.get("version") != RELATED_VERSION or raw.get("k") != k:
+        return {}
+    return {int(i): (key, tuple((int(n), float(score)) for n, score in items)) for i, (key, items) in raw["problems"].items()}
+
+
+class TfidfModel:
+    """
+    整个题库的 TF-IDF 向量（次线性词频 × 平滑 idf，按行 L2 归一化），用 NumPy 数组存成稀疏矩阵。
+    向量长度按全部词计算；只出现在一道题里的词和常用词不会影响与其他题的点积大小的排序，计算相似度时跳过。
+    建立后词表和 idf 固定：题目变化时 update 只替换它自己的一行，不重新切词和统计整个题库。
+    """
+
+    def __init__(self, problems, document_terms=_document_terms):
+        self.ids = [p['id'] for p in problems]
+        self.rows = {problem_id: row for row, problem_id in enumerate(self.ids)}
+        self._document_terms = document_terms
+        vocabulary, row_of, cols, counts = {}, [], [], []
+        for row, problem in enumerate(problems):
+            for term, count in document_terms(problem).items():
+                row_of.append(row); cols.append(vocabulary.setdefault(term, len(vocabulary))); counts.append(count)
+        count = len(self.ids)
+        row_of = np.array(row_of, dtype=np.int64); cols = np.array(cols, dtype=np.int64)
+        df = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log((1 + count) / (1 + df)) + 1
+        weights = (1 + np.log(np.array(counts, dtype=np.float64))) * idf[cols]
+        norms = np.sqrt(np.bincount(row_of, weights=weights ** 2, minlength=count))
+        weights /= np.where(norms > 0, norms, 1)[row_of]
+
+        max_df = max(MAX_DF_RATIO * count, MIN_MAX_DF)
+        self._vocabulary, self._idf = vocabulary, idf
+        self._new_term_idf = np.log((1 + count) / 2) + 1 # 词表里没有的词只出现在这一道题里
+        self._kept = (df >= 2) & (df <= max_df)
+        keep = self._kept[cols]
+        row_of, cols, weights = row_of[keep], cols[keep], weights[keep]
+        # 行压缩（每道题的词）和列压缩（每个词的倒排）两份
+        self._row_ptr = np.concatenate(([0], np.cumsum(np.bincount(row_of, minlength=count))))
+        self._row_cols, self._row_weights = cols, weights # row_of 本来就是有序的
+        order = np.argsort(cols, kind='stable')
+        self._col_ptr = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=len(vocabulary)))))
+        self._col_rows, self._col_weights = row_of[order], weights[order]
+
+    def _row_vector(self, problem):
+        """按固定的词表和 idf 计算一道题参与相似度计算的 (列号, 权重)，按列号排序；范数按全部词计算"""
+        cols, weights, total = [], [], 0.0
+        for term, count in self._document_terms(problem).items():
+            col = self._vocabulary.get(term)
+            weight = (1 + np.log(count)) * (self._new_term_idf if col is None else self._idf[col])
+            total += weight * weight
+            if col is not None and self._kept[col]:
+                cols.append(col); weights.append(weight)
+        order = np.argsort(cols)
+        weights = np.array(weights, dtype=np.float64)[order] / (np.sqrt(total) or 1.0)
+        return np.array(cols, dtype=np.int64)[order], weights
+
+    def update(self, problems, removed_ids=()):
+        """
+        替换（或新增）若干道题的行、删除若干行，其他行和词表、idf 保持不变。
+        删除的题留下空行，新题追加在最后；两份压缩矩阵都是“去掉旧项 + 二分插入新项”，只需线性时间。
+        """
+        affected = [self.rows[i] for i in removed_ids if i in self.rows]
+        for problem_id in removed_ids:
+            row = self.rows.pop(problem_id, None)
+            if row is not None:
+                self.ids[row] = None
+        new_rows, new_cols, new_weights = [], [], []
+        for problem in problems:
+            row = self.rows.get(problem['id'])
+            if row is None:
+                row = self.rows[problem['id']] = len(self.ids); self.ids.append(problem['id'])
+            else:
+                affected.append(row)
+            cols, weights = self._row_vector(problem)
+            new_rows.append(np.full(len(cols), row, dtype=np.int64)); new_cols.append(cols); new_weights.append(weights)
+        count, old_count = len(self.ids), len(self._row_ptr) - 1
+        dropped = np.zeros(count, dtype=bool); dropped[affected] = True
+        new_rows, new_cols, new_weights = (np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64) for parts in (new_rows, new_cols, new_weights))
+        new_weights = new_weights.astype(np.float64)
+
+        row_of = np.repeat(np.arange(old_count), np.diff(self._row_ptr))
+        order = np.argsort(new_rows, kind='stable') # 新的行按行号排好，行内已按列号排序
+        row_of, (self._row_cols, self._row_weights) = _splice(row_of, (self._row_cols, self._row_weights), ~dropped[row_of],
+                                                              new_rows[order], (new_cols[order], new_weights[order]))
+        self._row_ptr = np.concatenate(([0], np.cumsum(np.bincount(row_of, minlength=count))))
+
+        col_count = len(self._col_ptr) - 1
+        col_keys = np.repeat(np.arange(col_count), np.diff(self._col_ptr)) * count + self._col_rows
+        order = np.lexsort((new_rows, new_cols))
+        col_keys, (self._col_rows, self._col_weights) = _splice(col_keys, (self._col_rows, self._col_weights), ~dropped[self._col_rows],
+                                                                new_cols[order] * count + new_rows[order], (new_rows[order], new_weights[order]))
+        self._col_ptr = np.concatenate(([0], np.cumsum(np.bincount(col_keys // count if count else col_keys, minlength=col_count))))
+
+    def live_rows(self):
+        """还对应着题目的行号（删除的题留下的空行除外）"""
+        return [row for row, problem_id in enumerate(self.ids) if problem_id is not None]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _blocks(self, rows):
+        """按块计算若干行与所有题目的相似度矩阵（稠密，自己的位置为 0），依次返回 (块内行号, 矩阵)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        count = len(self.ids)
+        size = max(1, min(BLOCK_SIZE, BLOCK_ELEMENTS // max(count, 1)))
+        for start in range(0, len(rows), size):
+            block = rows[start:start + size]
+            lengths = self._row_ptr[block + 1] - self._row_ptr[block]
+            entries = _ranges(self._row_ptr[block], self._row_ptr[block + 1])
+            queries = np.repeat(np.arange(len(block)), lengths)
+            cols, weights = self._row_cols[entries], self._row_weights[entries]
+            # 稀疏 × 稀疏：每个词展开成它的倒排记录，再按 (查询, 题目) 累加到稠密块里
+            lengths = self._col_ptr[cols + 1] - self._col_ptr[cols]
+            postings = _ranges(self._col_ptr[cols], self._col_ptr[cols + 1])
+            keys = np.repeat(queries * count, lengths) + self._col_rows[postings]
+            products = np.repeat(weights, lengths) * self._col_weights[postings]
+            scores = np.bincount(keys, weights=products, minlength=len(block) * count).reshape(len(block), count)
+            scores[np.arange(len(block)), block] = 0.0
+            yield block, np.round(scores, 4) # 统一保留 4 位，和增量更新时的比较保持一致
+
+    def similarities(self, rows):
+        """若干行与其他题目的相似度，返回稀疏结果 (查询序号, 题目行号, 相似度)，只包含相似度不低于 MIN_SIMILARITY 的"""
+        result, offset = [], 0
+        for block, scores in self._blocks(rows):
+            query_index, target_rows = np.nonzero(scores >= MIN_SIMILARITY)
+            result.append((query_index + offset, target_rows, scores[query_index, target_rows]))
+            offset += len(block)
+        if not result:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        return tuple(np.concatenate(parts) for parts in zip(*result))
+
+    def top_neighbors(self, rows, k=RELATED_COUNT):
+        """分块计算每一行最相似的 k 道题（同分时行号小的在前），返回 {题目id: ((题目id, 相似度), ...)}"""
+        result = {}
+        for block, scores in self._blocks(rows):
+            neighbors = {self.ids[row]: [] for row in block}
+            width = min(k, scores.shape[1])
+            if width:
+                # 先用部分排序找到每行第 k 大的分数，只对不低于它的候选排序
+                kth = -np.partition(-scores, width - 1, axis=1)[:, width - 1]
+                query_index, target_rows = np.nonzero((scores >= np.maximum(kth, MIN_SIMILARITY)[:, None]) & (scores > 0))
+                values = scores[query_index, target_rows]
+                order = np.lexsort((target_rows, -values, query_index))
+                query_index, target_rows, values = query_index[order], target_rows[order], values[order]
+                top = np.arange(len(query_index)) - np.searchsorted(query_index, query_index) < k
+                for q, target, score in zip(query_index[top].tolist(), target_rows[top].tolist(), values[top].tolist()):
+                    neighbors[self.ids[block[q]]].append((self.ids[target], score))
+            result.update((problem_id, tuple(items)) for problem_id, items in neighbors.items())
+        return result
+
+
+def _fit(problems, k, with_neighbors):
+    """整体建立 TF-IDF 模型（可以在后台线程执行：题目的内容字段只会被整体替换，不会原地修改）"""
+    model = TfidfModel(problems)
+    hashes = {p['id']: content_hash(p) for p in problems}
+    neighbors = model.top_neighbors(model.live_rows(), k) if with_neighbors else None
+    return model, hashes, neighbors
+
+
+class RelatedProblems:
+    """
+    每道题最相关的 k 道题（TF-IDF 余弦相似度），预先算好并按内容哈希缓存，查询只是一次字典读取。
+    注册为 ProblemRepository 的监听器：题目内容变化时只记下这道题，下一次查询前增量更新——
+    在固定词表和 idf 的模型里替换变化的题目的行，重算它们自己的列表，并用它们与其他题目的相似度修正其他题目的列表。
+    需要整体建立模型时（第一次使用、累计变化太多）交给 executor 在后台线程完成，期间查询返回原来的列表；
+    没有 executor 时同步建立。列表有变化时调用 on_changed(本对象)，由调用方负责保存。
+    """
+
+    def __init__(self, repository, cache=None, k=RELATED_COUNT, on_changed=None, executor=None):
+        self.repository = repository
+        self.k = k
+        self.on_changed = on_changed
+        self.executor = executor
+        self._entries = dict(cache or {}) # 题目id -> (内容哈希, ((相关题目id, 相似度), ...))
+        self._model = None        # 当前的 TF-IDF 模型
+        self._model_hashes = {}   # 模型中每道题的行是按哪个内容哈希算的
+        self._building = None     # 后台正在整体建立的模型（Future）
+        self._check_all = True  # 需要和仓库逐题核对内容哈希（刚加载缓存或仓库整体重新加载后）
+        self._dirty = set()     # 内容变化过、列表需要重算的题目
+        self._incremental_changes = 0 # 模型建立以来替换过的行数
+        repository.add_listener(self._on_repository_changed)
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._check_all = True
+        elif event in ('added', 'updated', 'removed'):
+            self._dirty.add(problem['id']) # 收藏状态等的变化在刷新时按内容哈希排除
+
+    def snapshot(self):
+        """列表字典的浅拷贝，用于保存（元组不会被原地修改，可以在后台线程调用）"""
+        return dict(self._entries)
+
+    def related(self, problem_id):
+        """一道题的相关题目 ((题目id, 相似度), ...)，按相似度从高到低排列"""
+        if self._dirty or self._check_all or self._building is not None:
+            self.refresh()
+        entry = self._entries.get(problem_id)
+        return entry[1] if entry else ()
+
+    @property
+    def building(self):
+        """是否正在后台整体建立模型"""
+        return self._building is not None and not self._building.done()
+
+    # --- 更新 ---
+    def _changed_ids(self):
+        """内容哈希和缓存不一致（新增或修改）的题目，以及已经被删除的题目"""
+        candidates = self.repository if self._check_all else (self.repository.get(i) for i in self._dirty if i in self.repository)
+        hashes = {p['id']: content_hash(p) for p in candidates}
+        changed = {i for i, h in hashes.items() if self._entries.get(i, (None,))[0] != h}
+        existing = set(self._entries) | set(self._model.rows if self._model else ()) if self._check_all else self._dirty
+        removed = {i for i in existing if i not in self.repository and (i in self._entries or self._model and i in self._model.rows)}
+        return changed, removed, hashes
+
+    def _start_build(self, with_neighbors):
+        problems = self.repository.all()
+        if self.executor is None:
+            self._install(_fit(problems, self.k, with_neighbors))
+        else:
+            self._building = self.executor.submit(_fit, problems, self.k, with_neighbors)
+
+    def _install(self, result):
+        self._model, self._model_hashes, neighbors = result
+        self._incremental_changes = 0
+        if neighbors is not None:
+            self._entries = {i: (self._model_hashes[i], items) for i, items in neighbors.items()}
+            if self.on_changed:
+                self.on_changed(self)
+
+    def refresh(self):
+        if self._building is not None:
+            if not self._building.done():
+                return # 建立期间沿用原来的列表，变化的题目留到建好以后处理
+            building, self._building = self._building, None
+            self._install(building.result()) # 触发建立的变化和建立期间的变化都还记着，下面照常增量处理
+        changed, removed, hashes = self._changed_ids()
+        if not changed and not removed:
+            self._check_all = False; self._dirty = set()
+            return
+        count = max(len(self.repository), 1)
+        if self._model is None or not self._entries or self._incremental_changes + len(changed) + len(removed) > FULL_REBUILD_RATIO * count:
+            # 没有模型（只读取了缓存的列表）时只建模型，列表由下面的增量更新修正；变化太多时连列表一起重算
+            self._start_build(with_neighbors=self._model is not None or not self._entries)
+            if self._building is not None:
+                return
+            changed, removed, hashes = self._changed_ids()
+        self._check_all = False; self._dirty = set()
+        if not changed and not removed:
+            return
+        model = self._model
+        rows_changed = [self.repository.get(i) for i in changed if self._model_hashes.get(i) != hashes[i]]
+        rows_removed = [i for i in removed if i in model.rows]
+        model.update(rows_changed, rows_removed)
+        self._model_hashes.update((p['id'], hashes[p['id']]) for p in rows_changed)
+        for problem_id in rows_removed:
+            self._model_hashes.pop(problem_id, None)
+        self._incremental_changes += len(rows_changed) + len(rows_removed)
+        self._update(model, changed, removed, hashes)
+        if self.on_changed:
+            self.on_changed(self)
+
+    def _update(self, model, changed, removed, hashes):
+        for problem_id in removed:
+            self._entries.pop(problem_id, None)
+        changed_rows = [model.rows[i] for i in changed]
+        self._entries.update((i, (hashes[i], items)) for i, items in model.top_neighbors(changed_rows, self.k).items())
+        # 变化的题目与其他题目的相似度是对称的：用它修正其他题目的列表
+        new_scores = {}
+        if changed_rows:
+            query_index, target_rows, scores = model.similarities(changed_rows)
+            for q, target, score in zip(query_index.tolist(), target_rows.tolist(), scores.tolist()):
+                new_scores.setdefault(model.ids[target], {})[model.ids[changed_rows[q]]] = score
+        affected = changed | removed
+        recompute = []
+        for problem_id, (key, items) in list(self._entries.items()):
+            if problem_id in changed:
+                continue
+            scores = new_scores.get(problem_id, {})
+            kept = [item for item in items if item[0] not in affected]
+            merged = sorted(kept + list(scores.items()), key=lambda item: (-item[1], model.rows[item[0]]))[:self.k]
+            # 原来已满的列表去掉了变化的题目时，没有列出的题目里可能有比补上的更相似的（它们的得分不超过原来的第 k 名）
+            if len(kept) < len(items) and len(items) == self.k and (len(merged) < self.k or merged[-1][1] < items[-1][1]):
+                recompute.append(model.rows[problem_id])
+            elif merged != list(items):
+                self._entries[problem_id] = (key, tuple(merged))
+        if recompute:
+            self._entries.update((i, (self._entries[i][0], items)) for i, items in model.top_neighbors(recompute, self.k).items())
@@ -0,0 +1,118 @@
+# logic/review_scheduler.py
+
+import heapq
+import time
+
+DAY = 24 * 60 * 60
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+LAPSE_INTERVAL_DAYS = 10 / (24 * 60) # 答错后 10 分钟内再复习一次
+QUALITY_CORRECT = 4 # SM-2 的回答质量（0-5），练习页只有“对/错”两种结果
+QUALITY_INCORRECT = 1
+
+
+class ReviewScheduler:
+    """
+    SM-2 间隔重复调度器。
+    每道题的复习状态为 (到期时间, 难度系数, 间隔天数, 连续答对次数)；所有题目的到期时间放在一个最小堆里，
+    取下一道到期题和答题后重新排期都是 O(log n)。堆中过期的条目不主动删除，弹出时按到期时间核对后丢弃。
+    从未复习过的题目视为立即到期，按历史正确率从低到高排在前面。
+    """
+
+    def __init__(self, repository, states=None, clock=time.time):
+        self.repository = repository
+        self.clock = clock
+        self._states = dict(states or {}) # 题目id -> (due, ease, interval, reps)，只保存复习过的题目
+        self._due = {}   # 题目id -> 当前有效的到期时间（未复习过的题目为 0）
+        self._heap = []  # (到期时间, 排序键, 题目id)
+        self.rebuild()
+        repository.add_listener(self._on_repository_changed)
+
+    @staticmethod
+    def _history_rank(problem):
+        """未复习过的题目之间的先后：正确率低的在前，没做过的排在做过的后面"""
+        attempts = problem.get('attempts', 0)
+        return problem.get('correct', 0) / attempts if attempts > 0 else 1.0
+
+    def _entry(self, problem):
+        problem_id = problem['id']
+        state = self._states.get(problem_id)
+        if state is None:
+            return (0.0, self._history_rank(problem), problem_id)
+        return (state[0], 0.0, problem_id)
+
+    def rebuild(self):
+        self._states = {i: s for i, s in self._states.items() if i in self.repository}
+        self._heap = [self._entry(p) for p in self.repository]
+        heapq.heapify(self._heap)
+        self._due = {problem_id: due for due, _, problem_id in self._heap}
+
+    def _push(self, problem):
+        entry = self._entry(problem)
+        self._due[problem['id']] = entry[0]
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self.rebuild() # 过期条目太多时整体重建，避免堆无限增长
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self.rebuild()
+        elif event == 'added':
+            self._push(problem)
+        elif event == 'removed':
+            self._due.pop(problem['id'], None); self._states.pop(problem['id'], None)
+
+    # --- 查询 ---
+    def state(self, problem_id):
+        return self._states.get(problem_id)
+
+    def states(self):
+        return self._states
+
+    def _peek(self):
+        """丢弃堆顶的过期条目，返回真正的堆顶 (到期时间, 题目id)"""
+        while self._heap:
+            due, _, problem_id = self._heap[0]
+            if self._due.get(problem_id) == due:
+                return due, problem_id
+            heapq.heappop(self._heap)
+        return None
+
+    def next_due(self, now=None):
+        """返回已经到期的、最该复习的题目id，没有到期题目时返回None"""
+        top = self._peek()
+        now = self.clock() if now is None else now
+        if top is None or top[0] > now:
+            return None
+        return top[1]
+
+    def next_due_time(self):
+        """最早的到期时间（时间戳），题库为空时返回None"""
+        top = self._peek()
+        return top[0] if top else None
+
+    # --- 排期 ---
+    def review(self, problem_id, was_correct, now=None):
+        """按 SM-2 根据这次的结果重新计算间隔并放回堆中，返回新的复习状态"""
+        problem = self.repository.get(problem_id)
+        if problem is None:
+            return None
+        now = self.clock() if now is None else now
+        _, ease, interval, reps = self._states.get(problem_id, (0.0, DEFAULT_EASE, 0.0, 0))
+        quality = QUALITY_CORRECT if was_correct else QUALITY_INCORRECT
+        if quality >= 3:
+            interval = 1 if reps == 0 else 6 if reps == 1 else interval * ease
+            reps += 1
+        else:
+            interval = LAPSE_INTERVAL_DAYS
+            reps = 0
+        ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        state = (now + interval * DAY, ease, interval, reps)
+        self._states[problem_id] = state
+        self._push(problem)
+        return state
+
+    def reset(self):
+        """清空所有复习记录"""
+        self._states = {}
+        self.rebuild()
@@ -0,0 +1,231 @@
+# logic/search_index.py
+
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+
+# 参与检索的字段及其权重（标题命中比正文更重要）
+SEARCH_FIELDS = {
+    "title": 3.0, "description": 1.0, "answer": 1.0, "notes": 1.0,
+    "python_solution": 0.5, "cpp_solution": 0.5,
+}
+# 同权重的字段拼在一起切词，减少逐字段的开销
+FIELDS_BY_WEIGHT = [(weight, [f for f, w in SEARCH_FIELDS.items() if w == weight]) for weight in sorted(set(SEARCH_FIELDS.values()))]
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def tokenize(text):
+    """英文按单词（小写）切分，中文按相邻两个字切分成二元组"""
+    if not isinstance(text, str):
+        return []
+    text = text.lower()
+    tokens = WORD_PATTERN.findall(text)
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def _document_terms(problem):
+    """词 -> 按字段权重加权后的词频"""
+    terms = Counter()
+    for weight, fields in FIELDS_BY_WEIGHT:
+        text = "\n".join(value for value in (problem.get(field) for field in fields) if isinstance(value, str))
+        for token, count in Counter(tokenize(text)).items():
+            terms[token] += count * weight
+    return terms
+
+def _build(problems):
+    """整体建立倒排索引（可以在后台线程执行：题目的内容字段只会被整体替换），返回 (倒排, 每道题的词, 每道题的长度)"""
+    postings, doc_terms, lengths = {}, {}, {}
+    for problem in problems:
+        terms = _document_terms(problem)
+        doc_terms[problem['id']] = tuple(terms); lengths[problem['id']] = sum(terms.values())
+        for term, frequency in terms.items():
+            postings.setdefault(term, {})[problem['id']] = frequency
+    return postings, doc_terms, lengths
+
+
+class SearchIndex:
+    """
+    题库的倒排索引，使用 BM25 排序。
+    注册为 ProblemRepository 的监听器，题目增删改时只更新这一道题的倒排记录。
+    倒排记录存放加权词频，每道题的长度和总长度随增删改维护，查询时按当前的平均长度做长度归一化。
+    整体建立（创建时、仓库整体重新加载后）有 executor 时在后台进行，搜索时如果还没建好就等它完成；
+    建立期间变化的题目在建好后逐一补上。
+    """
+
+    K1 = 1.2
+    B = 0.75
+    MAX_PREFIX_TERMS = 64 # 输入中的最后一个词按前缀匹配，最多展开成这么多个词（出现在最多题目里的那些）
+
+    def __init__(self, repository=None, executor=None):
+        self._postings = {}   # 词 -> {题目id: 加权词频}
+        self._doc_terms = {}  # 题目id -> 这道题的所有词，删除时用来定位倒排记录
+        self._lengths = {}    # 题目id -> 文档长度（加权词频之和）
+        self._total_length = 0.0 # 字段权重都是 0.5 的倍数，累加、扣减不会产生浮点误差
+        self._vocabulary = [] # 有序词表，用于前缀匹配
+        self.repository = None
+        self.executor = executor
+        self._stale = False
+        self._building = None # 后台正在进行的整体建立（Future）
+        self._pending = set() # 建立开始以后内容变化过的题目
+        if repository is not None:
+            self.attach(repository)
+
+    def attach(self, repository):
+        """从仓库建立索引（有 executor 时在后台），并监听之后的变更"""
+        self.repository = repository
+        repository.add_listener(self._on_repository_changed)
+        self.rebuild()
+
+    def rebuild(self):
+        self._pending = set()
+        problems = self.repository.all() if self.repository is not None else []
+        if self.executor is None:
+            self._install(_build(problems))
+        else:
+            self._stale = True
+            self._building = self.executor.submit(_build, problems)
+
+    def _install(self, result):
+        self._postings, self._doc_terms, self._lengths = result
+        self._total_length = sum(self._lengths.values())
+        self._vocabulary = sorted(self._postings)
+        self._stale = False
+        pending, self._pending = self._pending, set()
+        for problem_id in pending:
+            problem = self.repository.get(problem_id)
+            if problem is None:
+                self.remove(problem_id)
+            else:
+                self.update(problem)
+
+    def _ensure_fresh(self):
+        if self._stale and self._building is None:
+            self.rebuild()
+        if self._building is not None:
+            building, self._building = self._building, None
+            self._install(building.result())
+
+    @property
+    def ready(self):
+        """索引是否已经建好（搜索不需要等待）"""
+        return not self._stale or (self._building is not None and self._building.done())
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._stale = True; self._building = None # 整体重新加载时推迟到下一次搜索再重建
+        elif self._building is not None:
+            if event in ('added', 'updated', 'removed'):
+                self._pending.add(problem['id'])
+        elif self._stale:
+            return
+        elif event == 'added':
+            self.add(problem)
+        elif event == 'updated':
+            self.update(problem)
+        elif event == 'removed':
+            self.remove(problem['id'])
+
+    # --- 索引维护 ---
+    def add(self, problem):
+        terms = _document_terms(problem)
+        problem_id = problem['id']
+        self._doc_terms[problem_id] = tuple(terms)
+        self._lengths[problem_id] = length = sum(terms.values())
+        self._total_length += length
+        for term, frequency in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            posting[problem_id] = frequency
+
+    def remove(self, problem_id):
+        terms = self._doc_terms.pop(problem_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(problem_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[problem_id]
+            if not posting:
+                del self._postings[term]
+                index = bisect_left(self._vocabulary, term)
+                del self._vocabulary[index]
+
+    def update(self, problem):
+        self.remove(problem['id'])
+        self.add(problem)
+
+    # --- 查询 ---
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _expand_prefix(self, prefix):
+        """以 prefix 开头的词，超过 MAX_PREFIX_TERMS 个时保留文档频率最高的，而不是字母顺序最靠前的"""
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        end = bisect_left(vocabulary, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        if end - start <= self.MAX_PREFIX_TERMS:
+            return vocabulary[start:end]
+        postings = self._postings
+        return heapq.nlargest(self.MAX_PREFIX_TERMS, (vocabulary[i] for i in range(start, end)), key=lambda term: len(postings[term]))
+
+    def _query_groups(self, query):
+        """把查询切成若干组词：每组命中任意一个词即可，所有组都要命中"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        groups = []
+        for i, token in enumerate(tokens):
+            is_last_word = i == len(tokens) - 1 and query.rstrip() == query and WORD_PATTERN.fullmatch(token)
+            if is_last_word or (len(token) == 1 and CJK_PATTERN.fullmatch(token)):
+                # 正在输入的最后一个英文词、或单个汉字，按前缀匹配
+                groups.append(self._expand_prefix(token))
+            else:
+                groups.append([token] if token in self._postings else [])
+        return groups
+
+    def search(self, query, limit=None):
+        """返回按 BM25 得分从高到低排列的题目 id 列表"""
+        self._ensure_fresh()
+        groups = self._query_groups(query)
+        if not groups or not all(groups):
+            return []
+        count = len(self._doc_terms)
+        lengths = self._lengths
+        # BM25 的词频饱和与长度归一化：tf * (k1 + 1) / (tf + k1 * (1 - b + b * 长度 / 平均长度))
+        base, slope = self.K1 * (1 - self.B), self.K1 * self.B / ((self._total_length / count) or 1.0)
+        numerator = self.K1 + 1
+        scores = None
+        # 先处理命中文档最少的组，之后的组只需要在已有候选里计分
+        for terms in sorted(groups, key=lambda g: sum(len(self._postings[t]) for t in g)):
+            group_scores = {}
+            for term in terms:
+                posting = self._postings[term]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                if scores is None and not group_scores:
+                    group_scores = {problem_id: idf * tf * numerator / (tf + base + slope * lengths[problem_id]) for problem_id, tf in posting.items()}
+                    continue
+                candidates = posting.keys() if scores is None else (scores.keys() & posting.keys())
+                for problem_id in candidates:
+                    tf = posting[problem_id]
+                    score = idf * tf * numerator / (tf + base + slope * lengths[problem_id])
+                    if score > group_scores.get(problem_id, 0.0):
+                        group_scores[problem_id] = score # 同一组里的多个前缀展开词只取最高分
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {i: scores[i] + s for i, s in group_scores.items()}
+            if not scores:
+                return []
+        if limit is None:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [problem_id for problem_id, _ in ranked]
@@ -0,0 +1,95 @@
+# logic/sort_index.py
+
+import re
+from bisect import bisect_left
+
+TITLE_NUMBER = re.compile(r'#(\d+)$')
+
+def natural_sort_key(problem):
+    """为列表排序生成一个“自然排序”的键"""
+    title = problem.get('title', '').lower()
+    # 使用正则表达式尝试从标题末尾匹配 '#数字' 模式
+    match = TITLE_NUMBER.search(title)
+    if match:
+        # 如果匹配成功，返回一个元组 (文本部分, 数字部分)
+        # 比如 "coin problem #10" -> ("coin problem #", 10)
+        return (title[:match.start()], int(match.group(1)))
+    # 如果不匹配，返回 (标题, 0) 以便和其他项一起排序
+    return (title, 0)
+
+# 排序方式 -> 排序键（'title' 以外的三种与 SQLite 后端的 ORDER_CLAUSES 对应，排序键相同的题目保持题库原顺序）
+SORT_KEYS = {
+    'title': natural_sort_key,
+    'accuracy': lambda p: p.get('correct', 0) / p['attempts'] if p.get('attempts', 0) > 0 else 1.0,
+    'errors': lambda p: -(p.get('attempts', 0) - p.get('correct', 0)),
+    'attempts': lambda p: -p.get('attempts', 0),
+}
+
+
+class SortIndex:
+    """
+    某一种排序方式下整个题库的有序列表，每道题的排序键只在它的标题或练习统计变化时计算一次。
+    注册为 ProblemRepository 的监听器：一道题变化时用二分查找删除旧位置、插入新位置，不需要重新排序；
+    仓库整体重新加载后推迟到下一次查询再重建。
+    """
+
+    def __init__(self, repository, key):
+        self.repository = repository
+        self.key = key
+        self._keys = []   # 有序的 (排序键, 题库顺序)
+        self._ids = []    # 与 _keys 对应的题目id
+        self._key_of = {} # 题目id -> (排序键, 题库顺序)
+        self._stale = True
+        repository.add_listener(self._on_repository_changed)
+
+    def full_key(self, problem):
+        """一道题完整的排序键：排序键相同时按题库顺序，保证互不相同"""
+        return (self.key(problem), self.repository.position(problem))
+
+    def _rebuild(self):
+        entries = sorted((self.full_key(p), p['id']) for p in self.repository)
+        self._keys = [key for key, _ in entries]
+        self._ids = [problem_id for _, problem_id in entries]
+        self._key_of = dict(zip(self._ids, self._keys))
+        self._stale = False
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._stale = True
+        elif self._stale:
+            return
+        elif event == 'removed':
+            self._discard(problem['id'])
+        elif event in ('added', 'updated', 'stats'):
+            key = self.full_key(problem)
+            if self._key_of.get(problem['id']) != key:
+                self._discard(problem['id'])
+                row = bisect_left(self._keys, key)
+                self._keys.insert(row, key); self._ids.insert(row, problem['id']); self._key_of[problem['id']] = key
+
+    def _discard(self, problem_id):
+        key = self._key_of.pop(problem_id, None)
+        if key is not None:
+            row = bisect_left(self._keys, key)
+            del self._keys[row]; del self._ids[row]
+
+    # --- 查询 ---
+    def ordered_ids(self):
+        """按这种方式排好序的所有题目id（内部列表，调用方不要修改）"""
+        if self._stale:
+            self._rebuild()
+        return self._ids
+
+    def sort_key(self, problem_id):
+        """缓存的完整排序键，可以直接用作 sort 的 key"""
+        if self._stale:
+            self._rebuild()
+        return self._key_of[problem_id]
+
+    def order(self, problem_ids):
+        """把一组题目id按这种方式排序：数量少时按缓存的排序键排序，多时顺着整个有序列表挑出来"""
+        ordered = self.ordered_ids()
+        wanted = problem_ids if isinstance(problem_ids, (set, frozenset)) else set(problem_ids)
+        if len(wanted) * 8 < len(ordered):
+            return sorted(wanted, key=self._key_of.__getitem__)
+        return [problem_id for problem_id in ordered if problem_id in wanted]
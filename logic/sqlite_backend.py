@@ -0,0 +1,326 @@
+# logic/sqlite_backend.py
+
+import json
+import sqlite3
+import threading
+from logic.problem_repository import indexable
+
+# 题目表中的普通字段（id 和 tags 单独处理）
+PROBLEM_COLUMNS = [
+    "title", "source", "description", "is_programming", "python_solution",
+    "cpp_solution", "answer", "notes", "attempts", "correct", "is_saved"
+]
+BOOL_COLUMNS = {"is_programming", "is_saved"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS problems (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    description TEXT NOT NULL DEFAULT '',
+    is_programming INTEGER NOT NULL DEFAULT 0,
+    python_solution TEXT NOT NULL DEFAULT '',
+    cpp_solution TEXT NOT NULL DEFAULT '',
+    answer TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    is_saved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS problem_tags (
+    tag TEXT NOT NULL,
+    problem_id INTEGER NOT NULL REFERENCES problems(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, problem_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_problem_tags_problem ON problem_tags(problem_id);
+CREATE INDEX IF NOT EXISTS idx_problems_position ON problems(position);
+CREATE INDEX IF NOT EXISTS idx_problems_source ON problems(source);
+CREATE INDEX IF NOT EXISTS idx_problems_is_saved ON problems(is_saved);
+CREATE INDEX IF NOT EXISTS idx_problems_attempts ON problems(attempts);
+CREATE INDEX IF NOT EXISTS idx_problems_correct ON problems(correct);
+CREATE TABLE IF NOT EXISTS game_records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    score INTEGER NOT NULL DEFAULT 0,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_sessions (
+    session_index INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    total_score INTEGER NOT NULL,
+    num_rounds INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_sessions_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS review_schedule (
+    problem_id INTEGER PRIMARY KEY,
+    due REAL NOT NULL,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    reps INTEGER NOT NULL
+);
+"""
+
+# 编辑器的排序方式 -> SQL 排序子句（并列时保持题库原顺序，和 Python 的稳定排序一致）
+ORDER_CLAUSES = {
+    "accuracy": "CASE WHEN attempts > 0 THEN CAST(correct AS REAL) / attempts ELSE 1.0 END ASC, position",
+    "errors": "attempts - correct DESC, position",
+    "attempts": "attempts DESC, position",
+    None: "position",
+}
+
+
+class SqliteStore:
+    """
+    基于标准库 sqlite3 的存储后端（WAL 模式）。
+    提供和 data_manager 中 JSON 存储一一对应的操作，单题修改都是单行事务。
+    sqlite3 连接不能跨线程使用，每个线程（界面线程、后台写盘线程）各自持有一个连接。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def is_empty(self):
+        """数据库里既没有题目也没有游戏记录"""
+        has_problems = self.conn.execute("SELECT 1 FROM problems LIMIT 1").fetchone()
+        has_records = self.conn.execute("SELECT 1 FROM game_records LIMIT 1").fetchone()
+        return not has_problems and not has_records
+
+    # --- 行 <-> 字典 ---
+    def _row_to_problem(self, row):
+        problem = {"id": row["id"]}
+        for column in PROBLEM_COLUMNS:
+            value = row[column]
+            problem[column] = bool(value) if column in BOOL_COLUMNS else value
+            if column == "source":
+                problem["tags"] = json.loads(row["tags"]) # 保持和 JSON 文件相同的字段顺序
+        return problem
+
+    def _problem_values(self, problem):
+        values = []
+        for column in PROBLEM_COLUMNS:
+            default = 0 if column in ("attempts", "correct") or column in BOOL_COLUMNS else ""
+            value = problem.get(column)
+            if value is None:
+                value = default # 缺少的字段和 null 都按默认值存（列都是 NOT NULL）
+            values.append(int(bool(value)) if column in BOOL_COLUMNS else value)
+        return values
+
+    def _insert_problem(self, problem, position):
+        columns = ["id", "position", "tags"] + PROBLEM_COLUMNS
+        placeholders = ", ".join("?" for _ in columns)
+        tags = problem.get("tags", [])
+        self.conn.execute(
+            f"INSERT INTO problems ({', '.join(columns)}) VALUES ({placeholders})",
+            [problem["id"], position, json.dumps(tags, ensure_ascii=False)] + self._problem_values(problem))
+        self.conn.executemany("INSERT OR IGNORE INTO problem_tags (tag, problem_id) VALUES (?, ?)",
+                              [(tag, problem["id"]) for tag in tags])
+
+    # --- 题库 ---
+    def load_problems(self):
+        rows = self.conn.execute("SELECT * FROM problems ORDER BY position")
+        return [self._row_to_problem(row) for row in rows]
+
+    def save_problems(self, problems):
+        """整体替换题库（一个事务）"""
+        with self.conn:
+            self.conn.execute("DELETE FROM problem_tags")
+            self.conn.execute("DELETE FROM problems")
+            for position, problem in enumerate(problems):
+                self._insert_problem(problem, position)
+
+    def add_problem(self, problem):
+        with self.conn:
+            row = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM problems").fetchone()
+            self._insert_problem(problem, row[0])
+
+    def add_problems(self, problems):
+        """批量追加题目（一个事务）"""
+        with self.conn:
+            row = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM problems").fetchone()
+            for offset, problem in enumerate(problems):
+                self._insert_problem(problem, row[0] + offset)
+
+    def update_problem(self, problem):
+        assignments = ", ".join(f"{column} = ?" for column in PROBLEM_COLUMNS)
+        tags = problem.get("tags", [])
+        with self.conn:
+            self.conn.execute(f"UPDATE problems SET tags = ?, {assignments} WHERE id = ?",
+                              [json.dumps(tags, ensure_ascii=False)] + self._problem_values(problem) + [problem["id"]])
+            self.conn.execute("DELETE FROM problem_tags WHERE problem_id = ?", (problem["id"],))
+            self.conn.executemany("INSERT OR IGNORE INTO problem_tags (tag, problem_id) VALUES (?, ?)",
+                                  [(tag, problem["id"]) for tag in tags])
+
+    def delete_problem(self, problem_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
+
+    def update_problem_stats(self, problem_id, was_correct):
+        with self.conn:
+            cursor = self.conn.execute(
+                "UPDATE problems SET attempts = attempts + 1, correct = correct + ? WHERE id = ?",
+                (1 if was_correct else 0, problem_id))
+        return cursor.rowcount > 0
+
+    def record_attempts(self, attempts, review_states=None):
+        """在一个事务里提交一组答题结果 [(题目id, 是否正确)]，以及这些题目的新复习排期"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE problems SET attempts = attempts + 1, correct = correct + ? WHERE id = ?",
+                [(1 if was_correct else 0, problem_id) for problem_id, was_correct in attempts])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO review_schedule (problem_id, due, ease, interval, reps) VALUES (?, ?, ?, ?, ?)",
+                [(problem_id, *state) for problem_id, state in (review_states or {}).items()])
+
+    def set_problem_saved(self, problem_id, is_saved):
+        with self.conn:
+            self.conn.execute("UPDATE problems SET is_saved = ? WHERE id = ?", (int(bool(is_saved)), problem_id))
+
+    def reset_problem_practice_stats(self):
+        with self.conn:
+            self.conn.execute("UPDATE problems SET attempts = 0, correct = 0")
+
+    def query_problem_ids(self, tag=None, source=None, saved=None, unfinished=False, order_by=None):
+        """把筛选和排序下推到带索引的 SQL 查询中，返回题目 id 列表"""
+        sql = "SELECT id FROM problems"
+        conditions, params = [], []
+        if tag is not None:
+            conditions.append("id IN (SELECT problem_id FROM problem_tags WHERE tag = ?)")
+            params.append(tag)
+        if source is not None:
+            conditions.append("source = ?")
+            params.append(source)
+        if saved is not None:
+            conditions.append("is_saved = ?")
+            params.append(int(bool(saved)))
+        if unfinished:
+            conditions.append("correct = 0")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY " + ORDER_CLAUSES[order_by]
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    # --- 游戏记录 ---
+    def load_game_stats(self, max_seq=None):
+        return list(self.iter_game_records(max_seq))
+
+    def iter_game_records(self, max_seq=None):
+        """按顺序逐条读取游戏记录；给出 max_seq 时只读到这条为止"""
+        if max_seq is None:
+            rows = self.conn.execute("SELECT record FROM game_records ORDER BY seq")
+        else:
+            rows = self.conn.execute("SELECT record FROM game_records WHERE seq <= ? ORDER BY seq", (max_seq,))
+        for row in rows:
+            yield json.loads(row[0])
+
+    def last_game_seq(self):
+        """最后一条游戏记录的 seq，没有记录时为 0"""
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM game_records").fetchone()[0]
+
+    def add_game_record(self, record):
+        with self.conn:
+            self.conn.execute("INSERT INTO game_records (timestamp, score, record) VALUES (?, ?, ?)",
+                              (record.get("timestamp"), record.get("score", 0), json.dumps(record, ensure_ascii=False)))
+
+    def save_game_stats(self, stats):
+        with self.conn:
+            self.conn.execute("DELETE FROM game_records")
+            self._reset_game_sessions()
+            self.conn.executemany("INSERT INTO game_records (timestamp, score, record) VALUES (?, ?, ?)",
+                                  [(r.get("timestamp"), r.get("score", 0), json.dumps(r, ensure_ascii=False)) for r in stats])
+
+    def get_game_sessions(self, session_length=10, max_seq=None):
+        """
+        每 session_length 条记录聚合为一局；汇总表只并入上次之后新增的记录（给出 max_seq 时只并入到这条为止）。
+        只读不写，返回 (每局汇总列表, 汇总表的改动)；改动不为 None 时交给 save_game_sessions 保存。
+        """
+        row = self.conn.execute("SELECT last_seq FROM game_sessions_state WHERE id = 0").fetchone()
+        last_seq = row[0] if row else 0
+        sessions = [dict(row) for row in self.conn.execute(
+            "SELECT session_index, timestamp, total_score, num_rounds FROM game_sessions ORDER BY session_index")]
+        current = sessions[-1] if sessions else None
+        changed = {}
+        sql = "SELECT seq, timestamp, score FROM game_records WHERE seq > ?"
+        params = [last_seq]
+        if max_seq is not None:
+            sql += " AND seq <= ?"
+            params.append(max_seq)
+        for seq, timestamp, score in self.conn.execute(sql + " ORDER BY seq", params).fetchall():
+            if current is None or current["num_rounds"] >= session_length:
+                index = current["session_index"] + 1 if current else 0
+                current = {"session_index": index, "timestamp": timestamp, "total_score": 0, "num_rounds": 0}
+                sessions.append(current)
+            current["total_score"] += score
+            current["num_rounds"] += 1
+            changed[current["session_index"]] = current
+            last_seq = seq
+        changes = ([dict(session) for session in changed.values()], last_seq) if changed else None
+        return [{key: session[key] for key in ("timestamp", "total_score", "num_rounds")} for session in sessions], changes
+
+    def save_game_sessions(self, changes):
+        """把 get_game_sessions 返回的改动写回汇总表"""
+        rows, last_seq = changes
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO game_sessions (session_index, timestamp, total_score, num_rounds) "
+                "VALUES (:session_index, :timestamp, :total_score, :num_rounds)", rows)
+            self.conn.execute("INSERT OR REPLACE INTO game_sessions_state (id, last_seq) VALUES (0, ?)", (last_seq,))
+
+    # --- 复习排期 ---
+    def load_review_schedule(self):
+        rows = self.conn.execute("SELECT problem_id, due, ease, interval, reps FROM review_schedule")
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def clear_review_schedule(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM review_schedule")
+
+    def _reset_game_sessions(self):
+        self.conn.execute("DELETE FROM game_sessions")
+        self.conn.execute("DELETE FROM game_sessions_state")
+
+    # --- 迁移 ---
+    def migrate_from_json(self, problems, game_records):
+        """
+        一次性把现有 JSON 文件中的题目和游戏记录导入数据库。
+        与 ProblemRepository.load 一致：id 重复时保留最后一条（位置取第一次出现的位置），
+        无法建立索引的记录（缺少 id 等）不导入；JSON 文件本身不动，这些记录仍可以从中找回。
+        """
+        unique = {}
+        for problem in problems:
+            if indexable(problem):
+                unique[problem["id"]] = problem
+        with self.conn:
+            self.conn.execute("DELETE FROM problem_tags")
+            self.conn.execute("DELETE FROM problems")
+            self.conn.execute("DELETE FROM game_records")
+            self._reset_game_sessions()
+            for position, problem in enumerate(unique.values()):
+                self._insert_problem(problem, position)
+            self.conn.executemany("INSERT INTO game_records (timestamp, score, record) VALUES (?, ?, ?)",
+                                  [(r.get("timestamp"), r.get("score", 0), json.dumps(r, ensure_ascii=False)) for r in game_records])
@@ -0,0 +1,127 @@
+# logic/weighted_sampler.py
+
+import random
+
+
+def weakness_weight(problem):
+    """
+    薄弱程度：平滑后的错误率 (错误次数 + 1) / (尝试次数 + 2)。
+    和编辑器“正确率 (从低到高)”排序使用同样的尝试次数/正确次数；没做过的题为 0.5，
+    一直做对的题权重逐渐变小但不会为零。
+    """
+    attempts = problem.get('attempts', 0)
+    return (attempts - problem.get('correct', 0) + 1) / (attempts + 2)
+
+
+class FenwickTree:
+    """树状数组：单点修改、前缀和以及按前缀和查找位置都是 O(log n)"""
+
+    def __init__(self, weights=()):
+        self._tree = [0.0] + list(weights)
+        size = len(self._tree)
+        for i in range(1, size): # O(n) 建树
+            parent = i + (i & -i)
+            if parent < size:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def add(self, index, delta):
+        """第 index 个位置（从 0 开始）的权重加上 delta"""
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count):
+        """前 count 个位置的权重之和"""
+        total = 0.0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def total(self):
+        return self.prefix_sum(len(self))
+
+    def find(self, target):
+        """返回前缀和第一次超过 target 的位置（从 0 开始）"""
+        position = 0
+        step = 1 << (len(self).bit_length())
+        while step:
+            nxt = position + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                position = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return min(position, len(self) - 1)
+
+
+class WeightedSampler:
+    """
+    按薄弱程度加权随机抽题，候选范围是练习页分类对应的组合筛选条件（ProblemFilter）。
+    每道题占树状数组的一个位置；答题后只更新这一道题的权重，抽样和更新都是 O(log n)。
+    删除的题把权重置零并留下空位，空位太多或新增题目时整体重建。
+    """
+
+    REBUILD_INTERVAL = 100_000 # 浮点增量累积误差，更新这么多次后整体重建一次
+
+    def __init__(self, repository, problem_filter, facets, weight=weakness_weight):
+        self.repository = repository
+        self.problem_filter = problem_filter
+        self.facets = facets # 共享的 FacetIndex，用来一次取出候选题目
+        self.weight = weight
+        self.rebuild()
+        repository.add_listener(self._on_repository_changed)
+
+    def detach(self):
+        """不再使用时调用：注销仓库监听，之后题目的变化不再更新这个抽题器"""
+        self.repository.remove_listener(self._on_repository_changed)
+
+    def rebuild(self):
+        self._ids = self.facets.ids(self.problem_filter)
+        self._slots = {problem_id: slot for slot, problem_id in enumerate(self._ids)}
+        self._weights = [self.weight(self.repository.get(i)) for i in self._ids]
+        self._tree = FenwickTree(self._weights)
+        self._updates = 0
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self.rebuild()
+        elif event == 'removed':
+            self._set_weight(problem['id'], None)
+        elif event in ('added', 'updated', 'stats'):
+            problem_id = problem['id']
+            if problem_id not in self._slots and self.problem_filter.matches(problem):
+                self.rebuild() # 新加入分类的题目需要新位置
+            elif problem_id in self._slots:
+                self._set_weight(problem_id, problem if self.problem_filter.matches(problem) else None)
+
+    def _set_weight(self, problem_id, problem):
+        """更新一道题的权重；problem 为 None 表示它已不在候选范围内"""
+        slot = self._slots.get(problem_id)
+        if slot is None:
+            return
+        new_weight = self.weight(problem) if problem is not None else 0.0
+        if problem is None:
+            del self._slots[problem_id]; self._ids[slot] = None
+        self._tree.add(slot, new_weight - self._weights[slot])
+        self._weights[slot] = new_weight
+        self._updates += 1
+        if self._updates >= self.REBUILD_INTERVAL or len(self._ids) > 2 * len(self._slots) + 64:
+            self.rebuild()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def sample(self, rng=random):
+        """按权重随机返回一道题的id，分类为空时返回None"""
+        total = self._tree.total()
+        if not self._slots or total <= 0:
+            return None
+        for _ in range(8):
+            problem_id = self._ids[self._tree.find(rng.random() * total)]
+            if problem_id is not None: # 浮点误差可能落到刚删除的空位上，重抽即可
+                return problem_id
+        return rng.choice(list(self._slots))
@@ -5,13 +5,20 @@
 
 
 import sys
-from PyQt6.QtWidgets import QApplication, QMainWindow, QStackedWidget
+import multiprocessing
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QApplication, QMainWindow, QStackedWidget, QMessageBox
 from ui.welcome_page import WelcomePage
 from ui.editor_page import EditorPage
 from ui.practice_menu_page import PracticeMenuPage
 from ui.practice_page import PracticePage
 from ui.game_page import GamePage
+from ui.quiz_page import QuizPage
 from ui.stats_page import StatsPage # <-- 导入新页面
+from logic.data_manager import compact_attempt_journal, flush_pending_writes, validate_problem_bank_async, warm_up_indexes
+from logic.bank_validator import ERROR
+
+VALIDATION_POLL_MS = 200 # 后台校验题库期间，隔这么久看一次是否完成
 
 
 class MainWindow(QMainWindow):
@@ -24,6 +31,7 @@ class MainWindow(QMainWindow):
         self.welcome_page = WelcomePage(); self.editor_page = EditorPage()
         self.practice_menu_page = PracticeMenuPage(); self.practice_page = PracticePage()
         self.game_page = GamePage(); self.stats_page = StatsPage() # <-- 创建新页面实例
+        self.quiz_page = QuizPage()
         
         self.stacked_widget.addWidget(self.welcome_page)
         self.stacked_widget.addWidget(self.editor_page)
@@ -31,6 +39,7 @@ class MainWindow(QMainWindow):
         self.stacked_widget.addWidget(self.practice_page)
         self.stacked_widget.addWidget(self.game_page)
         self.stacked_widget.addWidget(self.stats_page) # <-- 添加到页面栈
+        self.stacked_widget.addWidget(self.quiz_page)
         
         self.welcome_page.navigateToEditor.connect(self.go_to_editor_page)
         self.welcome_page.navigateToPractice.connect(self.go_to_practice_menu_page)
@@ -39,14 +48,31 @@ class MainWindow(QMainWindow):
         self.practice_menu_page.navigateToWelcome.connect(self.go_to_welcome_page)
         self.practice_menu_page.startPracticeSession.connect(self.start_actual_practice_session)
         self.practice_menu_page.navigateToGame.connect(self.go_to_game_page)
+        self.practice_menu_page.navigateToQuiz.connect(self.go_to_quiz_page)
         
         self.editor_page.navigateToWelcome.connect(self.go_to_welcome_page)
         self.practice_page.navigateToWelcome.connect(self.go_to_welcome_page)
         self.game_page.navigateToWelcome.connect(self.go_to_welcome_page)
+        self.quiz_page.navigateToWelcome.connect(self.go_to_welcome_page)
         self.stats_page.navigateToWelcome.connect(self.go_to_welcome_page) # <-- 连接新页面的返回信号
         
         self.go_to_welcome_page()
 
+    def check_problem_bank(self):
+        """启动时在后台校验整个题库，界面不必等待"""
+        self.bank_check = validate_problem_bank_async()
+        self._show_bank_check_result()
+
+    def _show_bank_check_result(self):
+        """校验完成后有错误时提示到编辑器中查看（只有警告时不打扰）"""
+        if not self.bank_check.done():
+            QTimer.singleShot(VALIDATION_POLL_MS, self._show_bank_check_result); return
+        errors = [issue for issue in self.bank_check.result() if issue[2] == ERROR]
+        if errors:
+            details = "\n".join(f"第 {position + 1} 条 (id {problem_id}): {message}" for position, problem_id, _, message in errors[:5])
+            more = "\n..." if len(errors) > 5 else ""
+            QMessageBox.warning(self, "题库校验", f"题库中有 {len(errors)} 个错误:\n{details}{more}\n\n可以在编辑器中点击“校验”查看全部。")
+
     def go_to_stats_page(self): # <-- 新增跳转方法
         """跳转到统计页面并刷新数据"""
         self.stats_page.load_and_display_stats()
@@ -64,9 +90,17 @@ class MainWindow(QMainWindow):
         self.stacked_widget.setCurrentWidget(self.practice_page)
     def go_to_game_page(self):
         self.stacked_widget.setCurrentWidget(self.game_page)
+    def go_to_quiz_page(self):
+        self.quiz_page.prepare()
+        self.stacked_widget.setCurrentWidget(self.quiz_page)
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # 打包后题库校验的进程池需要它
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(compact_attempt_journal) # 退出前把练习日志合并回题库
+    app.aboutToQuit.connect(flush_pending_writes) # 等后台线程把排队中的写操作全部落盘
     window = MainWindow()
     window.show()
+    QTimer.singleShot(0, window.check_problem_bank) # 窗口显示后再校验
+    QTimer.singleShot(0, warm_up_indexes) # 耗时的索引在后台建立
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,77 +1,33 @@
 # ui/editor_page.py
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QTextEdit,
     QPushButton, QSplitter, QListWidgetItem, QDialog, QFormLayout,
     QLineEdit, QDialogButtonBox, QMessageBox, QCheckBox, QLabel, QComboBox,
-    QCompleter
+    QCompleter, QFileDialog, QListView
 )
-from logic.data_manager import load_problems, save_problems, toggle_problem_saved_status
-import re
+from logic.data_manager import (
+    get_problem_repository, add_problem, update_problem, delete_problem,
+    toggle_problem_saved_status, filter_problem_ids, validate_problem,
+    import_problems, export_problems, search_problems, find_similar_problems, find_duplicate_pairs,
+    validate_problem_bank, get_sort_index
+)
+from logic.bank_validator import KNOWN_TAGS, ERROR
+from logic.problem_filter import ProblemFilter
+from ui.problem_renderer import rendered_parts
+from ui.problem_list_model import ProblemListModel, ProblemOrderProxyModel, ProblemItemDelegate, PROBLEM_ID_ROLE
+import csv
+import os
 import html
 
-def natural_sort_key(problem):
-    """为列表排序生成一个“自然排序”的键"""
-    title = problem.get('title', '').lower()
-    # 使用正则表达式尝试从标题末尾匹配 '#数字' 模式
-    match = re.search(r'#(\d+)$', title)
-    if match:
-        # 如果匹配成功，返回一个元组 (文本部分, 数字部分)
-        # 比如 "coin problem #10" -> ("coin problem #", 10)
-        number = int(match.group(1))
-        text_part = title[:match.start()]
-        return (text_part, number)
-    else:
-        # 如果不匹配，返回 (标题, 0) 以便和其他项一起排序
-        return (title, 0)
-
-def format_text_for_display(text):
-    """一个辅助函数，用于将简单的标记转换为HTML富文本"""
-    if not isinstance(text, str):
-        return ""
-    # 替换换行符为<br>
-    formatted_text = text.replace('\n', '<br>')
-    # 使用正则表达式替换上标 (e.g., A^2 -> A<sup>2</sup>, B^n -> B<sup>n</sup>)
-    formatted_text = re.sub(r'(\w+)\^([\w\d]+)', r'\1<sup>\2</sup>', formatted_text)
-    # 使用正则表达式替换下标 (e.g., X_i -> X<sub>i</sub>, Y_1 -> Y<sub>1</sub>)
-    formatted_text = re.sub(r'(\w+)_([\w\d]+)', r'\1<sub>\2</sub>', formatted_text)
-    return formatted_text
-
-def display_problem_details(self, item):
-    problem_id = item.data(Qt.ItemDataRle.UserRole)
-    problem = next((p for p in self.problems if p['id'] == problem_id), None)
-    if not problem: self.details_area.setText("未找到题目详情。"); return
-    
-    # ... (获取统计数据的代码和之前一样) ...
-    attempts = problem.get("attempts", 0); correct = problem.get("correct", 0)
-    accuracy = f"{(correct / attempts * 100):.1f}%" if attempts > 0 else "N/A"
-    is_saved = problem.get("is_saved", False); is_completed = correct > 0
-    status_text = f"✅ 已完成" if is_completed else "❌ 未完成"; saved_text = "❤️ 已收藏" if is_saved else "🤍 未收藏"
-    is_programming = problem.get("is_programming", False)
-    
-    # --- 【核心改动】在放入HTML前，对所有数据进行转义 ---
-    title = html.escape(problem.get('title', ''))
-    company = html.escape(problem.get('source', ''))
-    tags = html.escape(', '.join(problem.get('tags', [])))
-    description = html.escape(problem.get('description', '')).replace('\n', '<br>')
-    
-    html_content = f"""<h3>{title}</h3><p><b>公司:</b> {company}</p><p><b>标签:</b> {tags}</p><p><b>状态:</b> {status_text} | {saved_text} | <b>正确率:</b> {accuracy} ({correct}/{attempts})</p><hr><h3>描述</h3><p>{description}</p>"""
-    
-    if is_programming:
-        # 代码部分不需要转义，<pre>标签会保留其格式
-        py_solution = problem.get('python_solution', '')
-        cpp_solution = problem.get('cpp_solution', '')
-        html_content += f"""<hr><h3>Python 解法</h3><pre><code>{html.escape(py_solution)}</code></pre><hr><h3>C++ 解法</h3><pre><code>{html.escape(cpp_solution)}</code></pre>"""
-    else:
-        answer = html.escape(problem.get('answer', '')).replace('\n', '<br>')
-        html_content += f"""<hr><h3>答案与解析</h3><p>{answer}</p>"""
-        
-    notes = html.escape(problem.get('notes', '')).replace('\n', '<br>')
-    html_content += f"""<hr><h3>备注</h3><p>{notes}</p>"""
-    self.details_area.setHtml(html_content)
-
-PREDEFINED_TAGS = ["", "Math", "Probability", "Coding", "Finance", "Brain Teaser"]
+PREDEFINED_TAGS = [""] + list(KNOWN_TAGS)
+# 排序选项 -> filter_problem_ids 的 order_by 参数
+SORT_ORDERS = {"按字母排序 (A-Z)": "title", "正确率 (从低到高)": "accuracy", "错误次数 (从多到少)": "errors", "总次数 (从多到少)": "attempts"}
+ALL_TAGS_TEXT = "全部标签"
+SEARCH_RESULT_LIMIT = 500 # 搜索时最多列出的题目数
+SEARCH_DEBOUNCE_MS = 150  # 停止输入这么久之后才搜索，连续输入时不在每次按键时查询
+SIMILAR_PROBLEM_LIMIT = 5 # 保存或查看题目时最多提示的相似题目数
 class AddProblemDialog(QDialog):
 
     def __init__(self, all_problems, problem_data=None, parent=None):
@@ -131,9 +87,50 @@ class AddProblemDialog(QDialog):
         self.code_label.setVisible(is_coding); self.language_selector.setVisible(is_coding); self.code_input_area.setVisible(is_coding)
         self.answer_label.setVisible(not is_coding); self.answer_input.setVisible(not is_coding)
 
+class DuplicatePairsDialog(QDialog):
+    """列出题库中可能重复的题目对，双击一项跳转到其中的第一道题"""
+
+    def __init__(self, repository, pairs, parent=None):
+        super().__init__(parent); self.selected_id = None
+        self.setWindowTitle("可能重复的题目"); self.setMinimumSize(600, 400)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"共发现 {len(pairs)} 对可能重复的题目（双击查看）:"))
+        self.pair_list = QListWidget()
+        for a, b, score in pairs:
+            item = QListWidgetItem(f"{score:.0%}    {repository.get(a)['title']}  ⟷  {repository.get(b)['title']}")
+            item.setData(Qt.ItemDataRole.UserRole, a); self.pair_list.addItem(item)
+        layout.addWidget(self.pair_list)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close, self); buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.pair_list.itemDoubleClicked.connect(self._select_item)
+
+    def _select_item(self, item):
+        self.selected_id = item.data(Qt.ItemDataRole.UserRole); self.accept()
+
+class ValidationIssuesDialog(QDialog):
+    """列出整个题库校验发现的问题，双击一项跳转到对应的题目"""
+
+    def __init__(self, issues, parent=None):
+        super().__init__(parent); self.selected_id = None
+        self.setWindowTitle("题库校验"); self.setMinimumSize(600, 400)
+        layout = QVBoxLayout(self)
+        errors = sum(1 for issue in issues if issue[2] == ERROR)
+        layout.addWidget(QLabel(f"共发现 {errors} 个错误、{len(issues) - errors} 个警告（双击查看）:"))
+        self.issue_list = QListWidget()
+        for position, problem_id, level, message in issues:
+            item = QListWidgetItem(f"{'❌ 错误' if level == ERROR else '⚠️ 警告'}    第 {position + 1} 条 (id {problem_id}): {message}")
+            item.setData(Qt.ItemDataRole.UserRole, problem_id); self.issue_list.addItem(item)
+        layout.addWidget(self.issue_list)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close, self); buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self.issue_list.itemDoubleClicked.connect(self._select_item)
+
+    def _select_item(self, item):
+        self.selected_id = item.data(Qt.ItemDataRole.UserRole); self.accept()
+
 class EditorPage(QWidget):
     navigateToWelcome = pyqtSignal()
-    def __init__(self): super().__init__(); self.problems = []; self.initUI()
+    def __init__(self): super().__init__(); self.repository = get_problem_repository(); self.initUI()
 
     def initUI(self):
         main_layout = QVBoxLayout(self)
@@ -144,6 +141,10 @@ class EditorPage(QWidget):
         self.edit_button = QPushButton("编辑")
         self.delete_button = QPushButton("删除")
         self.save_button = QPushButton("收藏/取消收藏")
+        self.import_button = QPushButton("导入")
+        self.export_button = QPushButton("导出")
+        self.duplicates_button = QPushButton("查重")
+        self.validate_button = QPushButton("校验")
         
         self.sort_label = QLabel("排序:")
         self.sort_combo = QComboBox()
@@ -157,6 +158,11 @@ class EditorPage(QWidget):
 
         self.filter_label = QLabel("筛选:")
         self.filter_combo = QComboBox()
+        self.tag_filter_combo = QComboBox()
+        # 更多筛选条件，写法和练习页的组合练习相同，和上面两个下拉框同时生效
+        self.condition_input = QLineEdit(); self.condition_input.setPlaceholderText("更多条件，如 accuracy<50% AND programming"); self.condition_input.setClearButtonEnabled(True)
+
+        self.search_input = QLineEdit(); self.search_input.setPlaceholderText("搜索标题/描述/答案/备注..."); self.search_input.setClearButtonEnabled(True)
         
         self.back_button = QPushButton("返回主菜单")
 
@@ -165,215 +171,265 @@ class EditorPage(QWidget):
         controls_layout.addWidget(self.edit_button)
         controls_layout.addWidget(self.delete_button)
         controls_layout.addWidget(self.save_button)
+        controls_layout.addWidget(self.import_button)
+        controls_layout.addWidget(self.export_button)
+        controls_layout.addWidget(self.duplicates_button)
+        controls_layout.addWidget(self.validate_button)
         controls_layout.addStretch()
+        controls_layout.addWidget(self.search_input)
         controls_layout.addWidget(self.sort_label)
         controls_layout.addWidget(self.sort_combo)
         controls_layout.addWidget(self.filter_label)
         controls_layout.addWidget(self.filter_combo)
+        controls_layout.addWidget(self.tag_filter_combo)
+        controls_layout.addWidget(self.condition_input)
         controls_layout.addWidget(self.back_button)
         main_layout.addLayout(controls_layout)
         
         splitter = QSplitter(Qt.Orientation.Horizontal)
-        self.problem_list_widget = QListWidget()
+        # 题目列表：模型只存题目id，排序和筛选在代理模型里完成，委托只绘制可见的行
+        self.problem_model = ProblemListModel(self)
+        self.problem_proxy = ProblemOrderProxyModel(self); self.problem_proxy.setSourceModel(self.problem_model)
+        self.problem_list_view = QListView(); self.problem_list_view.setModel(self.problem_proxy)
+        self.problem_list_view.setItemDelegate(ProblemItemDelegate(self.problem_list_view)); self.problem_list_view.setUniformItemSizes(True)
         self.details_area = QTextEdit(); self.details_area.setReadOnly(True)
-        splitter.addWidget(self.problem_list_widget); splitter.addWidget(self.details_area); splitter.setSizes([300, 900])
+        splitter.addWidget(self.problem_list_view); splitter.addWidget(self.details_area); splitter.setSizes([300, 900])
         main_layout.addWidget(splitter)
         
         # --- 连接信号 ---
-        self.problem_list_widget.itemClicked.connect(self.display_problem_details)
+        self.problem_list_view.clicked.connect(self.display_problem_details)
+        self.problem_model.modelReset.connect(lambda: QTimer.singleShot(0, self._refresh_problem_list)) # 题库文件被外部修改、整体重新加载时；等其他监听者（有序索引等）也收到通知后再刷新
         self.add_button.clicked.connect(self.show_add_dialog)
         self.edit_button.clicked.connect(self.show_edit_dialog)
         self.delete_button.clicked.connect(self.delete_selected_problem)
         self.save_button.clicked.connect(self.toggle_save_status)
+        self.import_button.clicked.connect(self.import_problems_from_file)
+        self.export_button.clicked.connect(self.export_problems_to_file)
+        self.duplicates_button.clicked.connect(self.show_duplicate_pairs)
+        self.validate_button.clicked.connect(self.show_validation_issues)
         self.back_button.clicked.connect(self.navigateToWelcome.emit)
         
         self.sort_combo.currentIndexChanged.connect(self._refresh_problem_list)
         self.filter_combo.currentIndexChanged.connect(self._refresh_problem_list)
+        self.tag_filter_combo.currentIndexChanged.connect(self._refresh_problem_list)
+        self.condition_input.textChanged.connect(self._refresh_problem_list)
+        self.search_timer = QTimer(self); self.search_timer.setSingleShot(True); self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self._refresh_problem_list)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start()) # 边输入边搜索，每次按键重新计时
 
     def _validate_and_save_data(self, data, problem_id=None):
-        if not data['title']:
-            QMessageBox.warning(self, "错误", "标题不能为空！"); return False
-        is_coding = data['is_programming']
-        if is_coding and not data['python_solution'] and not data['cpp_solution']:
-            QMessageBox.warning(self, "错误", "编程题至少需要提供一种代码解法！"); return False
-        if not is_coding and not data['answer']:
-            QMessageBox.warning(self, "错误", "非编程题必须提供答案与解析！"); return False
+        error = validate_problem(data)
+        if error:
+            QMessageBox.warning(self, "错误", error); return False
+
+        # 保存前用 MinHash 查重，提示换了说法的重复题
+        similar = find_similar_problems(dict(data, id=problem_id), limit=SIMILAR_PROBLEM_LIMIT)
+        if similar:
+            lines = "\n".join(f"• {self.repository.get(i)['title']}（相似度 {score:.0%}）" for i, score in similar)
+            reply = QMessageBox.question(self, "可能重复", f"这道题和题库中的以下题目很相似:\n{lines}\n\n仍然保存吗？", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes: return False
         
         if problem_id is None:
-            new_id = max([p['id'] for p in self.problems], default=0) + 1
-            data['id'] = new_id; self.problems.append(data)
+            add_problem(data)
         else:
-            index_to_update = next((i for i, p in enumerate(self.problems) if p['id'] == problem_id), -1)
-            if index_to_update != -1:
-                data['id'] = problem_id; self.problems[index_to_update] = data
-        save_problems(self.problems)
+            update_problem(problem_id, data)
         return True
 
     def show_add_dialog(self):
-        dialog = AddProblemDialog(self.problems, None, self)
+        dialog = AddProblemDialog(self.repository.all(), None, self)
         if dialog.exec():
             new_data = dialog.get_data()
             if self._validate_and_save_data(new_data):
-                self.load_and_display_problems()
+                self._after_problem_changed()
+
+    def _selected_index(self):
+        """列表中选中的一行，没有选中时返回None"""
+        indexes = self.problem_list_view.selectionModel().selectedIndexes()
+        return indexes[0] if indexes else None
 
     def show_edit_dialog(self):
         """【核心改动】修复了编辑后刷新UI导致崩溃的Bug"""
-        selected_items = self.problem_list_widget.selectedItems()
-        if not selected_items:
+        selected_index = self._selected_index()
+        if selected_index is None:
             QMessageBox.information(self, "提示", "请先在左侧列表中选择一个要编辑的题目。")
             return
         
-        problem_id_to_edit = selected_items[0].data(Qt.ItemDataRole.UserRole)
-        problem_to_edit = next((p for p in self.problems if p['id'] == problem_id_to_edit), None)
+        problem_id_to_edit = selected_index.data(PROBLEM_ID_ROLE)
+        problem_to_edit = self.repository.get(problem_id_to_edit)
         if not problem_to_edit:
             QMessageBox.critical(self, "错误", "找不到要编辑的题目数据。")
             return
         
-        dialog = AddProblemDialog(self.problems, problem_to_edit, self)
+        dialog = AddProblemDialog(self.repository.all(), problem_to_edit, self)
         if dialog.exec():
             updated_data = dialog.get_data()
             # 调用验证和保存，如果成功再继续
             if self._validate_and_save_data(updated_data, problem_id_to_edit):
-                # 重新加载列表
-                self.load_and_display_problems()
-                
-                # 在新列表中找到并重新选中该项
-                new_item_to_select = None
-                for i in range(self.problem_list_widget.count()):
-                    item = self.problem_list_widget.item(i)
-                    if item.data(Qt.ItemDataRole.UserRole) == problem_id_to_edit:
-                        new_item_to_select = item
-                        break
-                
-                if new_item_to_select:
-                    self.problem_list_widget.setCurrentItem(new_item_to_select)
-                    self.display_problem_details(new_item_to_select)
+                # 列表只更新这一行，选中项和滚动位置保持不变
+                self._after_problem_changed()
+                if self._select_in_list(problem_id_to_edit):
+                    self.show_problem_details(problem_id_to_edit)
+
+    def import_problems_from_file(self):
+        """从CSV或JSON Lines文件批量导入题目（整批只写一次文件）"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入题目", "", "题库文件 (*.csv *.jsonl *.ndjson)")
+        if not path: return
+        try:
+            result = import_problems(path)
+        except (OSError, ValueError, csv.Error) as e:
+            QMessageBox.critical(self, "导入失败", str(e)); return
+        message = f"成功导入 {result['added']} 道题目，跳过重复题目 {result['duplicates']} 道。"
+        if result['errors']:
+            details = "\n".join(f"第 {line} 行: {error}" for line, error in result['errors'][:10])
+            more = "\n..." if len(result['errors']) > 10 else ""
+            message += f"\n\n有 {len(result['errors'])} 条记录未通过校验:\n{details}{more}"
+        if result['similar']:
+            details = "\n".join(f"第 {line} 行 {title} ≈ {self.repository.get(i)['title']}（{score:.0%}）" for line, title, i, score in result['similar'][:10])
+            more = "\n..." if len(result['similar']) > 10 else ""
+            message += f"\n\n有 {len(result['similar'])} 道新题和已有题目很相似，可以用“查重”核对:\n{details}{more}"
+        QMessageBox.information(self, "导入完成", message)
+        if result['added']: self._after_problem_changed() # 新题已经逐行插入列表
+
+    def show_duplicate_pairs(self):
+        """列出整个题库中可能重复的题目对（只比较 LSH 落在同一个桶里的题目）"""
+        pairs = find_duplicate_pairs()
+        if not pairs: QMessageBox.information(self, "查重", "没有发现可能重复的题目。"); return
+        dialog = DuplicatePairsDialog(self.repository, pairs, self)
+        if dialog.exec() and dialog.selected_id is not None:
+            self._select_problem(dialog.selected_id)
+
+    def show_validation_issues(self):
+        """检查整个题库（保存规则、字段类型、重复 id 等），列出发现的问题"""
+        issues = validate_problem_bank()
+        if not issues: QMessageBox.information(self, "题库校验", "没有发现问题。"); return
+        dialog = ValidationIssuesDialog(issues, self)
+        if dialog.exec() and dialog.selected_id in self.repository:
+            self._select_problem(dialog.selected_id)
+
+    def _select_in_list(self, problem_id):
+        """在列表中选中一道题并滚动到它，被筛选条件隐藏时返回 False"""
+        index = self.problem_proxy.index_of(problem_id)
+        if not index.isValid(): return False
+        self.problem_list_view.setCurrentIndex(index); self.problem_list_view.scrollTo(index)
+        return True
+
+    def _select_problem(self, problem_id):
+        """在列表中选中一道题并显示详情（被筛选条件隐藏时只显示详情）"""
+        self._select_in_list(problem_id)
+        self.show_problem_details(problem_id)
+
+    def export_problems_to_file(self):
+        """把整个题库导出为CSV或JSON Lines文件"""
+        path, selected_filter = QFileDialog.getSaveFileName(self, "导出题目", "quant_problems.csv", "CSV 文件 (*.csv);;JSON Lines 文件 (*.jsonl)")
+        if not path: return
+        if not os.path.splitext(path)[1]:
+            path += ".jsonl" if "jsonl" in selected_filter else ".csv"
+        try:
+            count = export_problems(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "导出失败", str(e)); return
+        QMessageBox.information(self, "导出完成", f"已导出 {count} 道题目到:\n{path}")
 
     def toggle_save_status(self):
-        selected_items = self.problem_list_widget.selectedItems()
-        if not selected_items: QMessageBox.information(self, "提示", "请先在左侧列表中选择一个题目。"); return
-        problem_id_to_find = selected_items[0].data(Qt.ItemDataRole.UserRole)
-        toggle_problem_saved_status(problem_id_to_find)
-        self.load_and_display_problems()
-        new_item_to_select = None
-        for i in range(self.problem_list_widget.count()):
-            item = self.problem_list_widget.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == problem_id_to_find:
-                new_item_to_select = item; break
-        if new_item_to_select:
-            self.problem_list_widget.setCurrentItem(new_item_to_select)
-            self.display_problem_details(new_item_to_select)
+        selected_index = self._selected_index()
+        if selected_index is None: QMessageBox.information(self, "提示", "请先在左侧列表中选择一个题目。"); return
+        problem_id_to_find = selected_index.data(PROBLEM_ID_ROLE)
+        toggle_problem_saved_status(problem_id_to_find) # 列表通过仓库的变更通知只更新这一行
+        if self.problem_proxy.index_of(problem_id_to_find).isValid(): self.show_problem_details(problem_id_to_find)
         else: self.details_area.clear()
 
     def load_and_display_problems(self):
-        self.problems = load_problems()
-        
-        # 动态更新公司筛选列表
-        # 先断开信号，避免填充时触发刷新
-        self.filter_combo.blockSignals(True)
-        current_filter = self.filter_combo.currentText()
-        self.filter_combo.clear()
-        
-        # 添加固定选项
-        self.filter_combo.addItem("显示全部")
-        self.filter_combo.addItem("只显示收藏的")
-        self.filter_combo.addItem("只显示未完成的")
-        
-        # 添加所有公司作为筛选选项
-        all_companies = sorted(list({p.get("source", "").strip() for p in self.problems if p.get("source", "").strip()}))
-        self.filter_combo.addItems(all_companies)
-        
-        # 尝试恢复之前的筛选选项
-        if current_filter in [self.filter_combo.itemText(i) for i in range(self.filter_combo.count())]:
-            self.filter_combo.setCurrentText(current_filter)
-        
-        # 重新连接信号
-        self.filter_combo.blockSignals(False)
-        
+        self.repository = get_problem_repository() # 文件没有变化时不会重新解析
+        if self.problem_model.repository is not self.repository:
+            self.problem_model.set_repository(self.repository) # 之后的增删改由仓库的变更通知逐行更新
+        self._update_filter_sources()
         # 调用核心函数刷新列表
         self._refresh_problem_list()
 
-    def display_problem_details(self, item):
-        problem_id = item.data(Qt.ItemDataRole.UserRole)
-        problem = next((p for p in self.problems if p['id'] == problem_id), None)
+    def _update_filter_sources(self):
+        """动态更新公司和标签筛选列表，没有变化时什么都不做；当前选项不存在了返回 True"""
+        source_gone = self._set_filter_items(self.filter_combo, ["显示全部", "只显示收藏的", "只显示未完成的"] + self.repository.sources())
+        tag_gone = self._set_filter_items(self.tag_filter_combo, [ALL_TAGS_TEXT] + self.repository.tags())
+        return source_gone or tag_gone
+
+    def _set_filter_items(self, combo, items):
+        if items == [combo.itemText(i) for i in range(combo.count())]:
+            return False
+        # 先断开信号，避免填充时触发刷新
+        combo.blockSignals(True)
+        current_filter = combo.currentText()
+        combo.clear(); combo.addItems(items)
+        # 尝试恢复之前的筛选选项
+        if current_filter in items: combo.setCurrentText(current_filter)
+        combo.blockSignals(False)
+        return current_filter != combo.currentText()
+
+    def _current_filter(self):
+        """把筛选下拉框、标签下拉框和条件输入框组合成一个 ProblemFilter"""
+        filter_text = self.filter_combo.currentText(); tag = self.tag_filter_combo.currentText()
+        if filter_text == "只显示收藏的": problem_filter = ProblemFilter(saved=True)
+        elif filter_text == "只显示未完成的": problem_filter = ProblemFilter(finished=False)
+        elif filter_text not in ["显示全部", ""]: problem_filter = ProblemFilter(sources=[filter_text])
+        else: problem_filter = ProblemFilter()
+        if tag not in [ALL_TAGS_TEXT, ""]: problem_filter &= ProblemFilter(tags=[tag])
+        return problem_filter & ProblemFilter.parse(self.condition_input.text())
+
+    def _after_problem_changed(self):
+        """添加、编辑或删除一道题之后：列表已经逐行更新，只需处理公司、标签列表和搜索结果的变化"""
+        if self._update_filter_sources() or self.search_input.text().strip():
+            self._refresh_problem_list() # 筛选的公司或标签被删光了，或者搜索结果需要重新计算
+
+    def display_problem_details(self, index):
+        self.show_problem_details(index.data(PROBLEM_ID_ROLE))
+
+    def show_problem_details(self, problem_id):
+        problem = self.repository.get(problem_id)
         if not problem: self.details_area.setText("未找到题目详情。"); return
         
         attempts = problem.get("attempts", 0); correct = problem.get("correct", 0)
         accuracy = f"{(correct / attempts * 100):.1f}%" if attempts > 0 else "N/A"
         is_saved = problem.get("is_saved", False); is_completed = correct > 0
         status_text = f"✅ 已完成" if is_completed else "❌ 未完成"; saved_text = "❤️ 已收藏" if is_saved else "🤍 未收藏"
-        is_programming = problem.get("is_programming", False)
-        
-        # --- 【核心改动】对所有从json读取的数据进行转义 ---
-        title = html.escape(problem.get('title', ''))
-        company = html.escape(problem.get('source', ''))
-        tags = html.escape(', '.join(problem.get('tags', [])))
-        description = html.escape(problem.get('description', '')).replace('\n', '<br>')
         
-        # --- 【核心改动】将 <h1> 换成 <h3> ---
-        html_content = f"""<h3>{title}</h3><p><b>公司:</b> {company}</p><p><b>标签:</b> {tags}</p><p><b>状态:</b> {status_text} | {saved_text} | <b>正确率:</b> {accuracy} ({correct}/{attempts})</p><hr><h3>描述</h3><p>{description}</p>"""
-        
-        if is_programming:
-            py_solution = problem.get('python_solution', '')
-            cpp_solution = problem.get('cpp_solution', '')
-            html_content += f"""<hr><h3>Python 解法</h3><pre><code>{html.escape(py_solution)}</code></pre><hr><h3>C++ 解法</h3><pre><code>{html.escape(cpp_solution)}</code></pre>"""
-        else:
-            answer = html.escape(problem.get('answer', '')).replace('\n', '<br>')
-            html_content += f"""<hr><h3>答案与解析</h3><p>{answer}</p>"""
-            
-        notes = html.escape(problem.get('notes', '')).replace('\n', '<br>')
-        html_content += f"""<hr><h3>备注</h3><p>{notes}</p>"""
+        # 标题、描述和解答由共享的渲染模块按内容哈希缓存，这里只拼上会随练习变化的状态
+        heading, description, solution = rendered_parts(problem)
+        html_content = heading + f"""<p><b>状态:</b> {status_text} | {saved_text} | <b>正确率:</b> {accuracy} ({correct}/{attempts})</p>"""
+        similar = find_similar_problems(problem, limit=SIMILAR_PROBLEM_LIMIT, wait=False) # 查重索引还在后台建立时先不提示
+        if similar:
+            similar_titles = ", ".join(f"{html.escape(self.repository.get(i)['title'])} ({score:.0%})" for i, score in similar)
+            html_content += f"""<p><b>可能重复:</b> <font color='#c0392b'>{similar_titles}</font></p>"""
+        html_content += description + "<hr>" + solution
         self.details_area.setHtml(html_content)
 
     def delete_selected_problem(self):
-        selected_items = self.problem_list_widget.selectedItems();
-        if not selected_items: QMessageBox.information(self, "提示", "请先在左侧列表中选择一个要删除的题目。"); return
-        selected_item = selected_items[0]; problem_id = selected_item.data(Qt.ItemDataRole.UserRole); problem_title = selected_item.text()
+        selected_index = self._selected_index()
+        if selected_index is None: QMessageBox.information(self, "提示", "请先在左侧列表中选择一个要删除的题目。"); return
+        problem_id = selected_index.data(PROBLEM_ID_ROLE); problem_title = selected_index.data(Qt.ItemDataRole.DisplayRole)
         reply = QMessageBox.question(self, '确认删除', f"你确定要删除题目 '{problem_title}' 吗？\n这个操作无法撤销。", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            self.problems = [p for p in self.problems if p['id'] != problem_id]
-            save_problems(self.problems); self.load_and_display_problems(); self.details_area.clear()
+            delete_problem(problem_id); self._after_problem_changed(); self.details_area.clear()
 
     def _refresh_problem_list(self):
         """核心函数：根据当前的排序和筛选条件，刷新问题列表"""
-        filter_text = self.filter_combo.currentText()
         sort_text = self.sort_combo.currentText()
-        
-        display_list = self.problems.copy()
-
-        # --- 筛选逻辑 (不变) ---
-        if filter_text == "只显示收藏的":
-            display_list = [p for p in display_list if p.get('is_saved', False)]
-        elif filter_text == "只显示未完成的":
-            display_list = [p for p in display_list if p.get('correct', 0) == 0]
-        elif filter_text not in ["显示全部", ""]:
-            display_list = [p for p in display_list if p.get('source', '') == filter_text]
-            
-        # --- 排序逻辑 ---
-        if sort_text == "正确率 (从低到高)":
-            def sort_key(p):
-                attempts = p.get('attempts', 0)
-                return p.get('correct', 0) / attempts if attempts > 0 else 1.0
-            display_list.sort(key=sort_key)
-        elif sort_text == "错误次数 (从多到少)":
-            display_list.sort(key=lambda p: p.get('attempts', 0) - p.get('correct', 0), reverse=True)
-        elif sort_text == "总次数 (从多到少)":
-            display_list.sort(key=lambda p: p.get('attempts', 0), reverse=True)
-        else: # 默认的 "按字母排序 (A-Z)"
-            # --- 【核心改动】使用新的自然排序函数 ---
-            display_list.sort(key=natural_sort_key)
-
-        # --- 刷新UI列表的逻辑 (不变) ---
-        self.problem_list_widget.clear()
-        for p in display_list:
-            item = QListWidgetItem() 
-            item.setData(Qt.ItemDataRole.UserRole, p['id'])
-            label = QLabel()
-            escaped_title = html.escape(p['title'])
-            if p.get('is_saved', False):
-                label.setText(f"❤️ {escaped_title}")
-            else:
-                label.setText(escaped_title)
-            self.problem_list_widget.addItem(item)
-            self.problem_list_widget.setItemWidget(item, label)
+
+        # --- 组合筛选在位图索引上完成，按维护好的有序索引排列，不重新计算排序键 ---
+        order_by = SORT_ORDERS.get(sort_text, 'title')
+        problem_filter = self._current_filter()
+        problem_ids = filter_problem_ids(problem_filter, order_by); accepts = problem_filter.matches
+        # 同样的条件和排序键之后用来插入或移动新增、修改的题目
+        sort_index = get_sort_index(order_by)
+
+        # --- 全文搜索：默认排序时按相关度排列，否则保持所选的排序 ---
+        query = self.search_input.text().strip()
+        if query:
+            matches = search_problems(query, SEARCH_RESULT_LIMIT)
+            rank = {problem_id: n for n, problem_id in enumerate(matches)}
+            accepts = lambda p, base=accepts: p['id'] in rank and base(p)
+            if order_by == 'title':
+                allowed = set(problem_ids); problem_ids = [i for i in matches if i in allowed]; repository = self.repository
+                self.problem_proxy.set_view(problem_ids, lambda p: (rank[p['id']], repository.position(p)), accepts)
+                return
+            problem_ids = [i for i in problem_ids if i in rank]
+        self.problem_proxy.set_view(problem_ids, sort_index.full_key, accepts, keys=[sort_index.sort_key(i) for i in problem_ids])
 
@@ -1,13 +1,15 @@
 # ui/practice_menu_page.py
 
+import re
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit
 from PyQt6.QtGui import QFont
 
 class PracticeMenuPage(QWidget):
     """练习子菜单页面 (已更新类别)"""
     startPracticeSession = pyqtSignal(str)
     navigateToGame = pyqtSignal()
+    navigateToQuiz = pyqtSignal()
     navigateToWelcome = pyqtSignal()
 
     def __init__(self):
@@ -25,6 +27,11 @@ class PracticeMenuPage(QWidget):
         btn_coding = QPushButton("3. Coding")
         btn_finance = QPushButton("4. Finance") # <-- 新增按钮
         btn_game = QPushButton("5. Game")
+        btn_review = QPushButton("6. 复习") # 按间隔重复排期练习到期的题目
+        btn_quiz = QPushButton("7. 限时测验")
+        # 组合练习：多个标签/公司/状态/练习统计条件同时满足，如 "Probability AND Citadel AND accuracy<50%"
+        self.combo_input = QLineEdit(); self.combo_input.setPlaceholderText("组合练习，如 Probability AND Citadel AND unfinished")
+        btn_combo = QPushButton("开始")
         btn_back = QPushButton("返回主菜单")
         
         button_size = (250, 50)
@@ -33,6 +40,8 @@ class PracticeMenuPage(QWidget):
         btn_coding.setFixedSize(*button_size)
         btn_finance.setFixedSize(*button_size) # 设置大小
         btn_game.setFixedSize(*button_size)
+        btn_review.setFixedSize(*button_size)
+        btn_quiz.setFixedSize(*button_size)
         btn_back.setFixedSize(*button_size)
 
         # --- 【改动2】连接新按钮的信号 ---
@@ -41,6 +50,10 @@ class PracticeMenuPage(QWidget):
         btn_coding.clicked.connect(lambda: self.startPracticeSession.emit("Coding"))
         btn_finance.clicked.connect(lambda: self.startPracticeSession.emit("Finance"))
         btn_game.clicked.connect(self.navigateToGame.emit)
+        btn_review.clicked.connect(lambda: self.startPracticeSession.emit("review"))
+        btn_quiz.clicked.connect(self.navigateToQuiz.emit)
+        btn_combo.clicked.connect(self.start_combined_practice)
+        self.combo_input.returnPressed.connect(self.start_combined_practice)
         btn_back.clicked.connect(self.navigateToWelcome.emit)
 
         # --- 【改动3】更新布局 ---
@@ -55,5 +68,19 @@ class PracticeMenuPage(QWidget):
         layout.addWidget(btn_finance) # <-- 添加到布局
         layout.addSpacing(20)
         layout.addWidget(btn_game)
+        layout.addSpacing(20)
+        layout.addWidget(btn_review)
+        layout.addSpacing(20)
+        layout.addWidget(btn_quiz)
+        layout.addSpacing(20)
+        combo_widget = QWidget(); combo_widget.setFixedWidth(button_size[0]); combo_layout = QHBoxLayout(combo_widget); combo_layout.setContentsMargins(0, 0, 0, 0)
+        combo_layout.addWidget(self.combo_input); combo_layout.addWidget(btn_combo)
+        layout.addWidget(combo_widget)
         layout.addSpacing(40)
-        layout.addWidget(btn_back)
\ No newline at end of file
+        layout.addWidget(btn_back)
+
+    def start_combined_practice(self):
+        """把输入的多个条件规范成 "A AND B" 的形式后开始练习"""
+        terms = [t.strip() for t in re.split(r'\s+AND\s+|[,，&+]', self.combo_input.text(), flags=re.IGNORECASE) if t.strip()]
+        if terms:
+            self.startPracticeSession.emit(" AND ".join(terms))
@@ -1,19 +1,19 @@
 # ui/practice_page.py
 
-import random
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QMessageBox, QLabel, QLineEdit
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QMessageBox, QLabel, QLineEdit, QCheckBox, QListWidget, QListWidgetItem
 from PyQt6.QtGui import QFont
-from logic.data_manager import load_problems, update_problem_stats, toggle_problem_saved_status
-import re
-import html
+from logic.data_manager import (
+    get_problem_repository, update_problem_stats, toggle_problem_saved_status,
+    next_review_problem_id, next_review_time, sample_problem_id, sample_weak_problem_id, check_problem_answer, find_related_problems,
+    related_problems_building
+)
+from logic.problem_filter import ProblemFilter
+from ui.problem_renderer import problem_html, solution_html, prerender
+import datetime
 
-def format_text_for_display(text):
-    if not isinstance(text, str): return ""
-    formatted_text = text.replace('\n', '<br>')
-    formatted_text = re.sub(r'(\w+)\^([\w\d]+)', r'\1<sup>\2</sup>', formatted_text)
-    formatted_text = re.sub(r'(\w+)_([\w\d]+)', r'\1<sub>\2</sub>', formatted_text)
-    return formatted_text
+RELATED_LIST_HEIGHT = 120
+RELATED_RETRY_MS = 500 # 相关题目还在后台建立时，隔这么久再取一次
 
 class PracticePage(QWidget):
     """交互式练习页面，优化了按钮文本"""
@@ -22,6 +22,7 @@ class PracticePage(QWidget):
     def __init__(self):
         super().__init__()
         self.current_problem = None
+        self._prefetched = None # (抽题方式, 题目id)：空闲时预先选好的下一题
         self.initUI()
 
     def initUI(self):
@@ -32,9 +33,11 @@ class PracticePage(QWidget):
         self.next_button = QPushButton("开始随机练习")
         self.save_button = QPushButton("收藏 🤍") # <-- 新增按钮
         self.back_button = QPushButton("返回练习菜单")
+        self.weighted_checkbox = QCheckBox("优先练习薄弱题") # 按错误率加权抽题
         
         control_layout.addWidget(self.next_button)
         control_layout.addWidget(self.save_button) # <-- 添加到布局
+        control_layout.addWidget(self.weighted_checkbox)
         control_layout.addStretch()
         control_layout.addWidget(self.back_button)
         main_layout.addLayout(control_layout)
@@ -53,6 +56,11 @@ class PracticePage(QWidget):
         self.feedback_label = QLabel(""); self.feedback_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.solution_display = QTextEdit(); self.solution_display.setReadOnly(True); self.solution_display.setFont(QFont("Arial", 11))
         main_layout.addWidget(self.feedback_label); main_layout.addWidget(self.solution_display)
+        # 答题后显示的相关题目，双击跳转
+        self.related_widget = QWidget(); related_layout = QVBoxLayout(self.related_widget); related_layout.setContentsMargins(0, 0, 0, 0)
+        self.related_list = QListWidget(); self.related_list.setMaximumHeight(RELATED_LIST_HEIGHT)
+        related_layout.addWidget(QLabel("相关题目（双击跳转）:")); related_layout.addWidget(self.related_list)
+        main_layout.addWidget(self.related_widget)
         
         # --- 连接信号 ---
         self.next_button.clicked.connect(self.show_next_problem)
@@ -60,6 +68,7 @@ class PracticePage(QWidget):
         self.submit_button.clicked.connect(self.check_answer)
         self.correct_button.clicked.connect(lambda: self.record_self_assessment(True))
         self.incorrect_button.clicked.connect(lambda: self.record_self_assessment(False))
+        self.related_list.itemDoubleClicked.connect(self.open_related_problem)
         self.back_button.clicked.connect(self.navigateToWelcome.emit)
         
         self.problem_display.setText("<h1>请点击“开始随机练习”</h1>")
@@ -67,6 +76,8 @@ class PracticePage(QWidget):
 
     def set_practice_category(self, category):
         self.current_category = category
+        self.problem_filter = None if category == "review" else ProblemFilter.parse(category) # 复习模式不按分类筛选
+        self._prefetched = None
 
     def set_initial_state(self):
         """设置所有组件的初始可见性"""
@@ -74,19 +85,23 @@ class PracticePage(QWidget):
         self.self_assess_widget.setVisible(False)
         self.feedback_label.setVisible(False)
         self.solution_display.setVisible(False)
+        self.related_widget.setVisible(False)
         self._update_save_button_text() # <-- 在这里也调用一次，处理初始状态
 
-    def show_next_problem(self):
-        # 1. 重置UI状态
+    def _reset_answer_area(self):
         self.set_initial_state()
         self.user_answer_input.clear()
         self.feedback_label.setText("")
         self.solution_display.clear()
         self.next_button.setText("下一题")
 
-        # 2. 加载和筛选题目
-        all_problems = load_problems()
-        if not all_problems:
+    def show_next_problem(self):
+        # 1. 重置UI状态
+        self._reset_answer_area()
+
+        # 2. 从共享仓库筛选题目
+        repository = get_problem_repository()
+        if not len(repository):
             self.problem_display.setText("<h1>题库为空，请先在编辑器中添加题目。</h1>")
             self.current_problem = None
             self._update_save_button_text() # 会禁用收藏按钮
@@ -95,28 +110,28 @@ class PracticePage(QWidget):
 
         self.next_button.setEnabled(True)
 
-        # 根据分类筛选题目
-        if self.current_category == "all":
-            filtered_problems = all_problems
-        elif self.current_category == "saved":
-            filtered_problems = [p for p in all_problems if p.get('is_saved', False)]
-        else: # 按标签筛选
-            filtered_problems = [p for p in all_problems if self.current_category in p.get('tags', [])]
+        problem_id = self._take_prefetched_id(repository)
+        if problem_id is None:
+            problem_id = self._choose_problem_id(repository)
 
-        if not filtered_problems:
+        if problem_id is None and self.current_category == "review":
+            due = next_review_time()
+            when = datetime.datetime.fromtimestamp(due).strftime('%Y-%m-%d %H:%M') if due else ""
+            self.problem_display.setText(f"<h1>暂时没有需要复习的题目。</h1><p>下一道题将在 {when} 到期。</p>")
+            self.current_problem = None
+            self._update_save_button_text()
+            return
+        if problem_id is None:
             self.problem_display.setText(f"<h1>分类 '{self.current_category}' 下没有题目。</h1>")
             self.current_problem = None
             self._update_save_button_text()
             return
+        self._show_problem(problem_id)
 
-        # 3. 选择并显示题目
-        self.current_problem = random.choice(filtered_problems)
-        title = html.escape(self.current_problem.get('title', ''))
-        company = html.escape(self.current_problem.get('source', ''))
-        tags = html.escape(', '.join(self.current_problem.get('tags', [])))
-        description = html.escape(self.current_problem.get('description', '')).replace('\n', '<br>')
-        html_desc = f"""<h3>{title}</h3><p><b>公司:</b> {company}</p><p><b>标签:</b> {tags}</p><hr><h3>描述</h3><p>{description}</p>"""
-        self.problem_display.setHtml(html_desc)
+    def _show_problem(self, problem_id):
+        # 3. 显示题目（预取时已经渲染好的直接从缓存取）
+        self.current_problem = get_problem_repository().get(problem_id)
+        self.problem_display.setHtml(self._rendered(self.current_problem)[0])
 
         # 4. 根据题目类型显示不同控件
         is_programming = self.current_problem.get("is_programming", False)
@@ -126,40 +141,122 @@ class PracticePage(QWidget):
         # 5. 更新收藏按钮状态
         self._update_save_button_text()
 
+        # 6. 用户答题时预取下一题（复习模式的下一题取决于这次的结果，答题后再预取）
+        if self.current_category != "review":
+            self._schedule_prefetch()
+
+    # --- 抽题与预取 ---
+    def _selection_mode(self):
+        return (self.current_category, self.weighted_checkbox.isChecked())
+
+    def _choose_problem_id(self, repository):
+        if self.current_category == "review":
+            # 复习模式：从排期堆中取最该复习的到期题目
+            return next_review_problem_id()
+        if self.weighted_checkbox.isChecked():
+            return sample_weak_problem_id(self.current_category)
+        # 在组合筛选的位图索引中随机抽题（all / saved / 标签 / 公司 / 练习统计，或用 AND 组合的多个条件）
+        return sample_problem_id(self.problem_filter)
+
+    def _take_prefetched_id(self, repository):
+        """取出预取的下一题；抽题方式变了、题目被删除或已不属于这个分类时作废"""
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is None or prefetched[0] != self._selection_mode():
+            return None
+        problem_id = prefetched[1]
+        if problem_id not in repository:
+            return None
+        if self.problem_filter is not None and not self.problem_filter.matches(repository.get(problem_id)):
+            return None
+        return problem_id
+
+    def _schedule_prefetch(self):
+        mode = self._selection_mode()
+        QTimer.singleShot(0, lambda: self._prefetch_next(mode))
+        if self.current_problem is not None:
+            # 题库有变化时趁空闲增量更新相关题目，答题后直接读取（整体重建在后台线程，这里不会等它）
+            problem_id = self.current_problem['id']
+            QTimer.singleShot(0, lambda: find_related_problems(problem_id))
+
+    def _prefetch_next(self, mode):
+        """
+        空闲时预先选出下一题（界面线程上只是一次索引抽样），题面和解析交给后台线程渲染进缓存。
+        期间切换了抽题方式就放弃。
+        """
+        if mode != self._selection_mode():
+            return
+        repository = get_problem_repository()
+        problem_id = self._choose_problem_id(repository)
+        if problem_id is not None and self.current_problem and problem_id == self.current_problem['id'] and self.current_category != "review":
+            problem_id = self._choose_problem_id(repository) # 尽量不连续出同一道题
+        if problem_id is None:
+            return
+        self._prefetched = (self._selection_mode(), problem_id)
+        prerender(repository.get(problem_id))
+
+    # --- 渲染 ---
+    def _rendered(self, problem):
+        """返回 (题面HTML, 解析HTML)，由共享的渲染模块按内容哈希缓存，题目被编辑后自动重新渲染"""
+        return problem_html(problem), solution_html(problem)
+
     def show_solution(self):
-        # ... (前面的逻辑不变) ...
-        is_programming = self.current_problem.get("is_programming", False)
-        
-        html_solution = ""
-        if is_programming:
-            py_solution = self.current_problem.get('python_solution', '')
-            cpp_solution = self.current_problem.get('cpp_solution', '')
-            html_solution = f"""<h3>Python 解法</h3><pre><code>{html.escape(py_solution)}</code></pre><hr><h3>C++ 解法</h3><pre><code>{html.escape(cpp_solution)}</code></pre>"""
-        else:
-            answer = html.escape(self.current_problem.get('answer', '')).replace('\n', '<br>')
-            html_solution = f"""<h3>答案与解析</h3><p>{answer}</p>"""
-        
-        notes = html.escape(self.current_problem.get('notes', '')).replace('\n', '<br>')
-        html_solution += f"""<hr><h3>备注</h3><p>{notes}</p>"""
-        
-        self.solution_display.setHtml(html_solution)
+        self.solution_display.setHtml(self._rendered(self.current_problem)[1])
         self.solution_display.setVisible(True)
 
+    # --- 相关题目 ---
+    def _show_related(self):
+        """答题后列出最相关的几道题（预先算好的列表，这里只是一次字典读取）"""
+        repository = get_problem_repository()
+        self.related_list.clear()
+        for problem_id, score in find_related_problems(self.current_problem['id']):
+            problem = repository.get(problem_id)
+            if problem is None:
+                continue
+            item = QListWidgetItem(f"{problem.get('title', '')}  (相似度 {score:.2f})")
+            item.setData(Qt.ItemDataRole.UserRole, problem_id)
+            self.related_list.addItem(item)
+        self.related_widget.setVisible(self.related_list.count() > 0)
+        if related_problems_building():
+            problem_id = self.current_problem['id']
+            QTimer.singleShot(RELATED_RETRY_MS, lambda: self._retry_related(problem_id))
+
+    def _retry_related(self, problem_id):
+        """后台建好以后补上相关题目（期间已经换了题或收起了解析就不再显示）"""
+        if self.current_problem is not None and self.current_problem['id'] == problem_id and not self.solution_display.isHidden():
+            self._show_related()
+
+    def open_related_problem(self, item):
+        """跳转到一道相关题目，之后的“下一题”照常按当前分类抽题"""
+        problem_id = item.data(Qt.ItemDataRole.UserRole)
+        if problem_id not in get_problem_repository():
+            return
+        self._prefetched = None
+        self._reset_answer_area()
+        self.next_button.setEnabled(True)
+        self._show_problem(problem_id)
+
     def check_answer(self):
         """检查非编程题答案"""
         user_answer = self.user_answer_input.text().strip()
-        correct_answer = self.current_problem.get("answer", "").strip()
-        was_correct = user_answer.lower() == correct_answer.lower()
+        was_correct = check_problem_answer(self.current_problem['id'], user_answer)
         
         self.feedback_label.setText(f"<font color='green'>回答正确！</font>" if was_correct else f"<font color='red'>回答错误。</font>")
         self.feedback_label.setVisible(True)
         update_problem_stats(self.current_problem['id'], was_correct)
         self.show_solution()
+        self._show_related()
+        self._prefetch_after_answer()
         
     def record_self_assessment(self, was_correct):
         """记录编程题的自我评估结果"""
         update_problem_stats(self.current_problem['id'], was_correct)
         self.show_solution()
+        self._show_related()
+        self._prefetch_after_answer()
+
+    def _prefetch_after_answer(self):
+        if self.current_category == "review":
+            self._schedule_prefetch()
 
     def toggle_save_status(self):
         """处理收藏按钮点击事件"""
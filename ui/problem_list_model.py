@@ -0,0 +1,239 @@
+# ui/problem_list_model.py
+
+from bisect import bisect_left
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractProxyModel, QModelIndex
+from PyQt6.QtWidgets import QStyledItemDelegate
+
+PROBLEM_ID_ROLE = Qt.ItemDataRole.UserRole
+SAVED_ROLE = Qt.ItemDataRole.UserRole + 1
+SAVED_MARKER = "❤️ "
+
+
+class ProblemListModel(QAbstractListModel):
+    """
+    题库中所有题目的列表模型，按仓库顺序每行一道题。
+    模型里只存题目id，视图绘制某一行时才从仓库读取标题和收藏状态，不为每一行创建控件。
+    注册为 ProblemRepository 的监听器，新增、修改、删除一道题时只通知对应的一行。
+    行号不直接存：每道题记下它在仓库中的先后序号（只增不减、删除时其他题不变），行号按序号二分查找，
+    删除一道题时不必给后面的每一行重新编号。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.repository = None
+        self._ids = []         # 行号 -> 题目id
+        self._positions = []   # 与 _ids 对应的仓库先后序号，始终有序
+        self._position_of = {} # 题目id -> 仓库先后序号
+
+    def set_repository(self, repository):
+        if self.repository is not None:
+            self.repository.remove_listener(self._on_repository_changed)
+        self.repository = repository
+        repository.add_listener(self._on_repository_changed)
+        self._reload()
+
+    def _reload(self):
+        self.beginResetModel()
+        self._ids = [p['id'] for p in self.repository]
+        self._positions = [self.repository.position(p) for p in self.repository]
+        self._position_of = dict(zip(self._ids, self._positions))
+        self.endResetModel()
+
+    def _on_repository_changed(self, event, problem):
+        if event == 'reset':
+            self._reload()
+        elif event == 'added':
+            row = len(self._ids)
+            self.beginInsertRows(QModelIndex(), row, row)
+            position = self.repository.position(problem)
+            self._ids.append(problem['id']); self._positions.append(position); self._position_of[problem['id']] = position
+            self.endInsertRows()
+        elif event in ('updated', 'stats'):
+            row = self.row_of(problem['id'])
+            if row is not None:
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, [])
+        elif event == 'removed':
+            row = self.row_of(problem['id'])
+            if row is None:
+                return
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ids[row]; del self._positions[row]; del self._position_of[problem['id']]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._ids):
+            return None
+        problem_id = self._ids[index.row()]
+        if role == PROBLEM_ID_ROLE:
+            return problem_id
+        problem = self.repository.get(problem_id)
+        if problem is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return problem.get('title', '')
+        if role == SAVED_ROLE:
+            return problem.get('is_saved', False)
+        return None
+
+    def contains(self, problem_id):
+        return problem_id in self._position_of
+
+    def row_of(self, problem_id):
+        position = self._position_of.get(problem_id)
+        return None if position is None else bisect_left(self._positions, position)
+
+    def problem_id(self, row):
+        return self._ids[row]
+
+    def problem_at(self, row):
+        return self.repository.get(self._ids[row])
+
+
+class ProblemOrderProxyModel(QAbstractProxyModel):
+    """
+    排序和筛选用的代理模型：按排序键从小到大显示通过筛选的题目。
+    set_view 一次给出题目、排序键和筛选条件，整个列表在 Python 里一次排好（或直接使用已经排好的顺序）；之后源模型的单行变化
+    （新增、修改、删除）只用缓存的排序键二分查找插入、移动或删除这一行，视图的选中项和滚动位置保持不变。
+    不用 QSortFilterProxyModel 是因为它要为每次比较、每一行回调 Python 的 lessThan/filterAcceptsRow，十万行时太慢。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ids = []    # 显示顺序的题目id
+        self._keys = []   # 与 _ids 对应的排序键，始终有序
+        self._key_of = {} # 题目id -> 显示时使用的排序键
+        self._sort_key = None
+        self._accepts = None
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._on_source_reset)
+        model.rowsInserted.connect(self._on_source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_source_rows_about_to_be_removed)
+        model.dataChanged.connect(self._on_source_data_changed)
+
+    def set_view(self, problem_ids, sort_key, accepts, keys=None):
+        """
+        显示 problem_ids 中的题目，按 sort_key(题目) 从小到大排列；排序键必须互不相同（带上题库顺序等作为最后一项）。
+        之后新增或修改的题目用 accepts(题目) 决定是否显示。
+        problem_ids 已经排好序时（来自维护好的有序索引）可以同时给出对应的排序键 keys，不再逐个计算和排序。
+        """
+        source = self.sourceModel()
+        if keys is not None:
+            keyed = [(key, problem_id) for key, problem_id in zip(keys, problem_ids) if source.contains(problem_id)]
+        else:
+            keyed = sorted((sort_key(problem), problem['id']) for problem in
+                           (source.repository.get(problem_id) for problem_id in problem_ids if source.contains(problem_id)))
+        self.beginResetModel()
+        self._sort_key, self._accepts = sort_key, accepts
+        self._keys = [key for key, _ in keyed]
+        self._ids = [problem_id for _, problem_id in keyed]
+        self._key_of = {problem_id: key for key, problem_id in keyed}
+        self.endResetModel()
+
+    def index_of(self, problem_id):
+        """题目在当前列表中的位置，被筛选掉时返回无效的索引"""
+        key = self._key_of.get(problem_id)
+        return QModelIndex() if key is None else self.index(bisect_left(self._keys, key), 0)
+
+    # --- 单行更新 ---
+    def _insert(self, problem):
+        key = self._sort_key(problem)
+        row = bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._keys.insert(row, key); self._ids.insert(row, problem['id']); self._key_of[problem['id']] = key
+        self.endInsertRows()
+
+    def _remove(self, problem_id):
+        row = bisect_left(self._keys, self._key_of[problem_id])
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._keys[row]; del self._ids[row]; del self._key_of[problem_id]
+        self.endRemoveRows()
+
+    def _move(self, problem, key):
+        """排序键变了：把这一行移到新位置（Qt 的目标行号按移动前的位置计算）"""
+        old_row = bisect_left(self._keys, self._key_of[problem['id']])
+        del self._keys[old_row]; del self._ids[old_row]
+        new_row = bisect_left(self._keys, key)
+        if new_row != old_row:
+            self.beginMoveRows(QModelIndex(), old_row, old_row, QModelIndex(), new_row if new_row < old_row else new_row + 1)
+        self._keys.insert(new_row, key); self._ids.insert(new_row, problem['id']); self._key_of[problem['id']] = key
+        if new_row != old_row:
+            self.endMoveRows()
+        return new_row
+
+    def _on_source_reset(self):
+        # 源模型的内容全部失效，等调用方重新给出要显示的题目
+        self.beginResetModel()
+        self._ids, self._keys, self._key_of = [], [], {}
+        self.endResetModel()
+
+    def _on_source_rows_inserted(self, parent, first, last):
+        if self._accepts is None:
+            return
+        for row in range(first, last + 1):
+            problem = self.sourceModel().problem_at(row)
+            if problem is not None and self._accepts(problem):
+                self._insert(problem)
+
+    def _on_source_rows_about_to_be_removed(self, parent, first, last):
+        for row in range(first, last + 1):
+            problem_id = self.sourceModel().problem_id(row)
+            if problem_id in self._key_of:
+                self._remove(problem_id)
+
+    def _on_source_data_changed(self, top_left, bottom_right, roles=()):
+        if self._accepts is None:
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            problem = self.sourceModel().problem_at(row)
+            if problem is None:
+                continue
+            shown, wanted = problem['id'] in self._key_of, self._accepts(problem)
+            if shown and not wanted:
+                self._remove(problem['id'])
+            elif wanted and not shown:
+                self._insert(problem)
+            elif shown:
+                key = self._sort_key(problem)
+                new_row = self._move(problem, key) if key != self._key_of[problem['id']] else bisect_left(self._keys, key)
+                index = self.index(new_row, 0)
+                self.dataChanged.emit(index, index, roles)
+
+    # --- QAbstractProxyModel 接口 ---
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < len(self._ids):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or not 0 <= proxy_index.row() < len(self._ids):
+            return QModelIndex()
+        return self.sourceModel().index(self.sourceModel().row_of(self._ids[proxy_index.row()]), 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        return self.index_of(self.sourceModel().problem_id(source_index.row()))
+
+
+class ProblemItemDelegate(QStyledItemDelegate):
+    """绘制一行题目：收藏的题目在标题前加 ❤️，过长的标题由样式省略；背景、选中状态沿用默认的绘制"""
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if index.data(SAVED_ROLE):
+            option.text = SAVED_MARKER + option.text
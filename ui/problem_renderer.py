@@ -0,0 +1,126 @@
+# ui/problem_renderer.py
+
+import base64
+import html
+import io
+import re
+import threading
+from logic.background_executor import BackgroundExecutor
+from logic.lru_cache import LRUCache
+from logic.problem_repository import content_hash
+
+FRAGMENT_CACHE_BYTES = 16 * 1024 * 1024 # 渲染好的题目HTML（含内嵌的公式图片）最多占用的字节数
+FORMULA_CACHE_BYTES = 8 * 1024 * 1024   # 单个公式图片的缓存，不同题目里相同的公式只渲染一次
+FORMULA_FONT_SIZE = 12 # 与题目正文的字号一致
+FORMULA_DPI = 100
+
+# $$公式$$ 单独成行；\(公式\) 和 $公式$ 嵌在正文里。
+# $ 紧挨着的两侧不能是空白、右边的 $ 后面不能紧跟数字，这样 "$100 ... $1" 这样的金额不会被当成公式
+MATH_PATTERN = re.compile(r'\$\$(.+?)\$\$|\\\((.+?)\\\)|(?<![\\$])\$(?=\S)([^$\n]*?\S)\$(?![\d$])', re.DOTALL)
+SUPERSCRIPT_PATTERN = re.compile(r'(\w+)\^([\w\d]+)') # A^2 -> A<sup>2</sup>
+SUBSCRIPT_PATTERN = re.compile(r'(\w+)_([\w\d]+)')    # X_i -> X<sub>i</sub>
+
+_fragments = LRUCache(FRAGMENT_CACHE_BYTES, sizeof=lambda parts: sum(map(len, parts))) # (内容哈希, simple_markup) -> (标题部分, 描述部分, 解答部分)
+_formulas = LRUCache(FORMULA_CACHE_BYTES, sizeof=len) # 公式源码 -> <img> 标签
+# 预取时在后台线程渲染：两个缓存的读写、以及 matplotlib（字体对象不是线程安全的）各用一把锁，
+# 界面线程最多等后台线程画完一个公式
+_cache_lock = threading.Lock()
+_mathtext_lock = threading.Lock()
+_prerender_executor = BackgroundExecutor(name="ProblemRenderer")
+
+
+def render_formula_png(tex):
+    """用 matplotlib 的 mathtext 把一个公式栅格化成 PNG，无法解析时返回None"""
+    # 第一次遇到公式时才导入 matplotlib，不拖慢程序启动
+    from matplotlib import mathtext
+    from matplotlib.font_manager import FontProperties
+    buffer = io.BytesIO()
+    try:
+        with _mathtext_lock:
+            mathtext.math_to_image(f"${tex}$", buffer, prop=FontProperties(size=FORMULA_FONT_SIZE), dpi=FORMULA_DPI, format='png')
+    except ValueError:
+        return None
+    return buffer.getvalue()
+
+def _formula_html(tex, source):
+    """公式对应的 <img>（图片以 data URL 内嵌，QTextEdit 可以直接显示）；无法渲染时原样显示源码"""
+    with _cache_lock:
+        tag = _formulas.get(tex)
+    if tag is None:
+        png = render_formula_png(tex.strip())
+        if png is None:
+            tag = html.escape(source)
+        else:
+            tag = f"<img src='data:image/png;base64,{base64.b64encode(png).decode('ascii')}' alt='{html.escape(tex)}' align='middle'>"
+        with _cache_lock:
+            _formulas.put(tex, tag)
+    return tag
+
+def _plain_html(text, simple_markup):
+    text = html.escape(text, quote=False)
+    if simple_markup:
+        text = SUPERSCRIPT_PATTERN.sub(r'\1<sup>\2</sup>', text)
+        text = SUBSCRIPT_PATTERN.sub(r'\1<sub>\2</sub>', text)
+    return text.replace('\\$', '$').replace('\n', '<br>')
+
+def format_text_for_display(text, simple_markup=True):
+    """
+    把题目中的换行和 LaTeX 公式转换为HTML富文本。
+    simple_markup 为 True 时还把 A^2、X_i 显示成上标、下标（编辑器的详情）；练习页保持原样显示，
+    否则 x_1 + a^b 这类本来就按原文书写的答案会被改写。
+    """
+    if not isinstance(text, str):
+        return ""
+    parts, last = [], 0
+    for match in MATH_PATTERN.finditer(text):
+        parts.append(_plain_html(text[last:match.start()], simple_markup))
+        display, inline, dollar = match.groups()
+        formula = _formula_html(display or inline or dollar, match.group(0))
+        parts.append(f"<br>{formula}<br>" if display else formula)
+        last = match.end()
+    parts.append(_plain_html(text[last:], simple_markup))
+    return "".join(parts)
+
+def _code_html(code):
+    return f"<pre><code>{html.escape(code if isinstance(code, str) else '')}</code></pre>"
+
+def _render(problem, simple_markup):
+    heading = (f"<h3>{html.escape(problem.get('title', ''))}</h3><p><b>公司:</b> {html.escape(problem.get('source', ''))}</p>"
+               f"<p><b>标签:</b> {html.escape(', '.join(problem.get('tags', [])))}</p>")
+    description = f"<hr><h3>描述</h3><p>{format_text_for_display(problem.get('description', ''), simple_markup)}</p>"
+    if problem.get("is_programming", False):
+        solution = f"<h3>Python 解法</h3>{_code_html(problem.get('python_solution', ''))}<hr><h3>C++ 解法</h3>{_code_html(problem.get('cpp_solution', ''))}"
+    else:
+        solution = f"<h3>答案与解析</h3><p>{format_text_for_display(problem.get('answer', ''), simple_markup)}</p>"
+    solution += f"<hr><h3>备注</h3><p>{format_text_for_display(problem.get('notes', ''), simple_markup)}</p>"
+    return (heading, description, solution)
+
+def rendered_parts(problem, simple_markup=True):
+    """
+    (标题/公司/标签, 描述, 解答与备注) 三段HTML，按题目的内容哈希（和 simple_markup）缓存：
+    再次查看同一道题时不再重新渲染，题目被编辑后内容哈希改变，自动重新渲染。
+    """
+    key = (content_hash(problem), simple_markup)
+    with _cache_lock:
+        parts = _fragments.get(key)
+    if parts is None:
+        parts = _render(problem, simple_markup)
+        with _cache_lock:
+            _fragments.put(key, parts)
+    return parts
+
+def prerender(problem):
+    """
+    在后台线程把一道题渲染进缓存（预取下一题时用），返回 Future；之后的 problem_html / solution_html 直接命中缓存。
+    题目的内容字段只会被整体替换、不会原地修改，后台线程可以直接读取。
+    """
+    return _prerender_executor.submit(rendered_parts, problem, False)
+
+def problem_html(problem):
+    """练习时显示的题面（不做 ^ / _ 的上下标转换，见 format_text_for_display）"""
+    heading, description, _ = rendered_parts(problem, False)
+    return heading + description
+
+def solution_html(problem):
+    """答题后显示的答案、代码解法和备注"""
+    return rendered_parts(problem, False)[2]
@@ -0,0 +1,173 @@
+# ui/quiz_page.py
+
+import html
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QHBoxLayout, QPushButton, QLabel, QComboBox, QSpinBox
+from logic.data_manager import get_problem_repository, check_problem_answer, record_attempts, filter_problem_ids
+from logic.problem_filter import ProblemFilter
+from logic.quiz_session import QuizSession, QUIZ_LENGTH
+from ui.practice_page import PracticePage
+
+MAX_QUIZ_LENGTH = 50
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+class QuizPage(PracticePage):
+    """
+    限时测验页面：沿用练习页的题目显示、判分和收藏，按分类抽 N 道题限时作答。
+    每题的结果先留在内存里，整轮结束（答完、超时或中途返回）时一次性提交到练习统计，并显示本轮汇总。
+    """
+
+    def __init__(self):
+        self.session = None
+        super().__init__()
+        self.timer = QTimer(self); self.timer.timeout.connect(self._update_timer_display)
+
+    def initUI(self):
+        super().initUI()
+        # --- 测验设置：分类（可输入 "Probability AND Citadel" 这样的组合）、题数 ---
+        setup_layout = QHBoxLayout()
+        self.category_combo = QComboBox(); self.category_combo.setEditable(True); self.category_combo.setMinimumWidth(200)
+        self.count_spinbox = QSpinBox(); self.count_spinbox.setRange(1, MAX_QUIZ_LENGTH); self.count_spinbox.setValue(QUIZ_LENGTH)
+        self.start_button = QPushButton("开始测验")
+        self.progress_label = QLabel(""); self.timer_label = QLabel("")
+        setup_layout.addWidget(QLabel("分类:")); setup_layout.addWidget(self.category_combo)
+        setup_layout.addWidget(QLabel("题数:")); setup_layout.addWidget(self.count_spinbox)
+        setup_layout.addWidget(self.start_button); setup_layout.addStretch()
+        setup_layout.addWidget(self.progress_label); setup_layout.addSpacing(20); setup_layout.addWidget(self.timer_label)
+        self.layout().insertLayout(0, setup_layout)
+
+        self.weighted_checkbox.setVisible(False) # 测验的题目在开始时一次抽好
+        self.start_button.clicked.connect(self.start_quiz)
+        self.back_button.clicked.connect(self.abandon_quiz)
+        self._show_intro()
+
+    def _show_intro(self):
+        self.set_initial_state()
+        self.current_problem = None; self._update_save_button_text()
+        self.next_button.setText("下一题"); self.next_button.setEnabled(False)
+        self.progress_label.setText(""); self.timer_label.setText("")
+        self.problem_display.setText("<h1>选择分类和题数后点击“开始测验”</h1>")
+
+    def prepare(self):
+        """进入页面时刷新可选的分类；上一轮已经结束时回到初始界面"""
+        repository = get_problem_repository()
+        current = self.category_combo.currentText()
+        self.category_combo.clear()
+        self.category_combo.addItems(["all", "saved"] + repository.tags() + repository.sources())
+        self.category_combo.setCurrentText(current or "all")
+        if self.session is None or self.session.finished:
+            self.session = None
+            self._show_intro()
+
+    # --- 测验流程 ---
+    def start_quiz(self):
+        if self.session is not None and not self.session.finished:
+            self._finish_quiz() # 重新开始前先提交上一轮已经答过的题
+        category = self.category_combo.currentText().strip() or "all"
+        self.current_category = category
+        # 分类和练习页一样按 ProblemFilter 的写法解析，如 "Probability AND Citadel AND unfinished"
+        session = QuizSession.draw(filter_problem_ids(ProblemFilter.parse(category)), self.count_spinbox.value())
+        if not len(session):
+            self.session = None; self._show_intro()
+            self.problem_display.setText(f"<h1>分类 '{html.escape(category)}' 下没有题目。</h1>")
+            return
+        self.session = session
+        self.timer.start(1000); self._update_timer_display()
+        self._show_current_problem()
+
+    def _show_current_problem(self):
+        repository = get_problem_repository()
+        while not self.session.finished and self.session.current_id not in repository:
+            self.session.advance() # 测验途中被删除的题直接跳过
+        if self.session.finished:
+            self._finish_quiz()
+            return
+        self.set_initial_state()
+        self.user_answer_input.clear(); self.feedback_label.setText(""); self.solution_display.clear()
+        self.current_problem = repository.get(self.session.current_id)
+        self.problem_display.setHtml(self._rendered(self.current_problem)[0])
+        is_programming = self.current_problem.get("is_programming", False)
+        self.answer_widget.setVisible(not is_programming)
+        self.self_assess_widget.setVisible(is_programming)
+        self._update_save_button_text()
+        self.progress_label.setText(f"第 {self.session.index + 1} / {len(self.session)} 题")
+        self.next_button.setText("跳过"); self.next_button.setEnabled(True)
+        # 作答期间预先渲染下一题
+        if not self.session.is_last:
+            next_id = self.session.problem_ids[self.session.index + 1]
+            QTimer.singleShot(0, lambda: next_id in repository and self._rendered(repository.get(next_id)))
+
+    def show_next_problem(self):
+        if self.session is None or self.session.finished:
+            return
+        self.session.advance()
+        if self.session.finished:
+            self._finish_quiz()
+        else:
+            self._show_current_problem()
+
+    def check_answer(self):
+        if self.session is None or self.session.finished or self.session.answered:
+            return
+        was_correct = check_problem_answer(self.current_problem['id'], self.user_answer_input.text().strip())
+        self.feedback_label.setText(f"<font color='green'>回答正确！</font>" if was_correct else f"<font color='red'>回答错误。</font>")
+        self.feedback_label.setVisible(True)
+        self._record_answer(was_correct)
+
+    def record_self_assessment(self, was_correct):
+        if self.session is None or self.session.finished or self.session.answered:
+            return
+        self._record_answer(was_correct)
+
+    def _record_answer(self, was_correct):
+        """结果只记在本轮测验里，统计留到整轮结束时一起提交"""
+        self.session.answer(was_correct)
+        self.answer_widget.setVisible(False); self.self_assess_widget.setVisible(False)
+        self.show_solution()
+        self.next_button.setText("查看结果" if self.session.is_last else "下一题")
+
+    def _update_timer_display(self):
+        if self.session is None or self.session.finished:
+            self.timer.stop()
+            return
+        self.timer_label.setText(f"剩余时间: {_format_duration(self.session.remaining_time())}")
+        if self.session.is_over_time():
+            self._finish_quiz(timed_out=True)
+
+    def abandon_quiz(self):
+        """中途返回时结束本轮，已经答过的题照常提交"""
+        if self.session is not None and not self.session.finished:
+            self._finish_quiz()
+
+    def _finish_quiz(self, timed_out=False):
+        self.timer.stop()
+        self.session.finish()
+        record_attempts(self.session.attempts()) # 整轮只写一次
+        self.set_initial_state()
+        self.current_problem = None; self._update_save_button_text()
+        self.next_button.setText("下一题"); self.next_button.setEnabled(False)
+        self.progress_label.setText(""); self.timer_label.setText(f"用时: {_format_duration(self.session.elapsed())}")
+        self.problem_display.setHtml(self._render_summary_html(self.session.summary(get_problem_repository()), timed_out))
+
+    # --- 汇总 ---
+    def _render_summary_html(self, summary, timed_out):
+        total = summary['total']
+        percent = summary['score'] / total * 100 if total else 0
+        text = "<h2>测验结束</h2>" + ("<p><font color='red'>时间到！未作答的题目记为错误。</font></p>" if timed_out else "")
+        text += f"<p><b>得分:</b> {summary['score']} / {total} ({percent:.0f}%)</p>"
+        text += (f"<p><b>作答:</b> {summary['answered']} 题 &nbsp; <b>总用时:</b> {_format_duration(summary['elapsed'])}"
+                 f" &nbsp; <b>平均每题:</b> {summary['average_seconds']:.1f} 秒</p>")
+        if summary['tags']:
+            text += "<h3>各标签正确率</h3><table cellpadding='4'><tr><th align='left'>标签</th><th>答对</th><th>正确率</th></tr>"
+            for tag, (correct, count) in summary['tags'].items():
+                text += f"<tr><td>{html.escape(tag)}</td><td align='center'>{correct} / {count}</td><td align='center'>{correct / count * 100:.0f}%</td></tr>"
+            text += "</table>"
+        text += "<h3>逐题结果</h3><table cellpadding='4'><tr><th>#</th><th align='left'>题目</th><th>结果</th><th>用时</th></tr>"
+        for i, question in enumerate(summary['questions'], 1):
+            result = {True: "<font color='green'>正确</font>", False: "<font color='red'>错误</font>", None: "<font color='gray'>未作答</font>"}[question['correct']]
+            seconds = f"{question['seconds']:.1f} 秒" if question['correct'] is not None else "-"
+            text += f"<tr><td>{i}</td><td>{html.escape(question['title'])}</td><td align='center'>{result}</td><td align='center'>{seconds}</td></tr>"
+        return text + "</table>"